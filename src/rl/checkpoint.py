@@ -0,0 +1,181 @@
+"""
+Periodic, atomic training checkpoints shared by the tabular, linear and neural agents.
+
+A checkpoint holds everything needed to continue training exactly where it
+stopped: the agent's learned state (Q-table, weights or network, optimizer,
+replay buffer, ε schedule position and episode counter) plus the state of
+every random stream the train loops draw from (NumPy's and Python's global
+generators, torch, and the environment's and action space's generators).
+Resuming from a checkpoint therefore reproduces the uninterrupted run
+bit-for-bit.
+
+Files are written to a temporary name, fsync'ed and renamed, so a job killed
+mid-write never leaves a truncated checkpoint behind.
+"""
+
+import os
+import pickle
+import random
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+
+CHECKPOINT_FORMAT_VERSION = 1
+_EPISODE_PATTERN = re.compile(r"-ep(\d+)\.ckpt$")
+
+
+# ============================================================
+# Estado dos geradores aleatórios
+# ============================================================
+def _env_generators(env) -> Dict[str, object]:
+    """Random generators of an `rl.environment.Environment` (or Gymnasium env)."""
+    gym_env = getattr(env, "env", env)
+    generators = {"env": gym_env.unwrapped.np_random}
+    action_space = getattr(gym_env, "action_space", None)
+    if action_space is not None:
+        generators["action_space"] = action_space.np_random
+    return generators
+
+
+def capture_rng_state(env=None) -> Dict[str, object]:
+    state = {"numpy": np.random.get_state(), "python": random.getstate()}
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        state["torch"] = torch.get_rng_state()
+        if torch.cuda.is_available():
+            state["torch_cuda"] = torch.cuda.get_rng_state_all()
+    if env is not None:
+        for name, generator in _env_generators(env).items():
+            state[name] = generator.bit_generator.state
+    return state
+
+
+def restore_rng_state(state: Dict[str, object], env=None) -> None:
+    np.random.set_state(state["numpy"])
+    random.setstate(state["python"])
+    torch = sys.modules.get("torch")
+    if torch is not None and "torch" in state:
+        torch.set_rng_state(state["torch"])
+        if "torch_cuda" in state and torch.cuda.is_available():
+            torch.cuda.set_rng_state_all(state["torch_cuda"])
+    if env is not None:
+        for name, generator in _env_generators(env).items():
+            if name in state:
+                generator.bit_generator.state = state[name]
+
+
+# ============================================================
+# Arquivos
+# ============================================================
+def atomic_pickle_dump(obj, path) -> None:
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def checkpoint_episode(path) -> int:
+    match = _EPISODE_PATTERN.search(str(path))
+    return int(match.group(1)) if match else -1
+
+
+def resolve_checkpoint(path) -> Path:
+    """`path` itself, or the most advanced checkpoint when `path` is a directory."""
+    path = Path(path)
+    if path.is_dir():
+        candidates = sorted(path.glob("*-ep*.ckpt"), key=checkpoint_episode)
+        if not candidates:
+            raise FileNotFoundError(f"No checkpoints (*-ep*.ckpt) found in {path}")
+        return candidates[-1]
+    if not path.exists():
+        raise FileNotFoundError(f"Checkpoint not found: {path}")
+    return path
+
+
+def load_checkpoint_file(path) -> Dict[str, object]:
+    with open(path, "rb") as f:
+        checkpoint = pickle.load(f)
+    if not isinstance(checkpoint, dict) or checkpoint.get("format") != "rl-checkpoint":
+        raise ValueError(f"{path} is not a training checkpoint")
+    if checkpoint["version"] > CHECKPOINT_FORMAT_VERSION:
+        raise ValueError(f"Checkpoint format version {checkpoint['version']} is newer than supported "
+                         f"({CHECKPOINT_FORMAT_VERSION})")
+    return checkpoint
+
+
+# ============================================================
+# Mixin dos agentes
+# ============================================================
+class CheckpointMixin:
+    """
+    Periodic checkpoints for an agent. Subclasses set `agent_type` and implement
+    `_checkpoint_state` / `_restore_checkpoint_state`; train loops call
+    `_maybe_checkpoint(episode)` after each episode.
+    """
+
+    agent_type = "agent"
+    checkpoint_dir: Optional[Path] = None
+    checkpoint_interval: Optional[int] = None
+    checkpoint_prefix: str = "checkpoint"
+
+    def configure_checkpoints(self, checkpoint_dir=None, checkpoint_interval: Optional[int] = None,
+                              checkpoint_prefix: Optional[str] = None) -> None:
+        self.checkpoint_interval = checkpoint_interval if checkpoint_interval and checkpoint_interval > 0 else None
+        self.checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir else None
+        self.checkpoint_prefix = checkpoint_prefix or self.checkpoint_prefix
+        if self.checkpoint_dir:
+            self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+
+    def _checkpoint_state(self) -> Dict[str, object]:
+        raise NotImplementedError
+
+    def _restore_checkpoint_state(self, state: Dict[str, object]) -> None:
+        raise NotImplementedError
+
+    def _should_checkpoint(self, episode: int) -> bool:
+        return (
+            self.checkpoint_dir is not None
+            and self.checkpoint_interval is not None
+            and (episode + 1) % self.checkpoint_interval == 0
+        )
+
+    def _checkpoint_path(self, episode: int) -> Path:
+        if self.checkpoint_dir is None:
+            raise RuntimeError("Checkpoint directory not configured")
+        return self.checkpoint_dir / f"{self.checkpoint_prefix}-ep{episode + 1:05d}.ckpt"
+
+    def _maybe_checkpoint(self, episode: int) -> None:
+        if self._should_checkpoint(episode):
+            self.save_checkpoint(self._checkpoint_path(episode))
+
+    def save_checkpoint(self, path) -> None:
+        # Episódios já escritos no arquivo de métricas precisam estar no disco antes do checkpoint
+        writer = getattr(self, "metrics_writer", None)
+        if writer is not None:
+            writer.flush()
+        atomic_pickle_dump({
+            "format": "rl-checkpoint",
+            "version": CHECKPOINT_FORMAT_VERSION,
+            "agent_type": self.agent_type,
+            "trained_episodes": self.trained_episodes,
+            "state": self._checkpoint_state(),
+            "rng": capture_rng_state(self.env),
+        }, path)
+
+    def load_checkpoint(self, path) -> int:
+        """Restores agent and RNG state from `path`; returns the number of episodes already trained."""
+        checkpoint = load_checkpoint_file(path)
+        if checkpoint["agent_type"] != self.agent_type:
+            raise ValueError(f"Checkpoint {path} is for a {checkpoint['agent_type']} agent, "
+                             f"not {self.agent_type}")
+        self._restore_checkpoint_state(checkpoint["state"])
+        self.trained_episodes = checkpoint["trained_episodes"]
+        restore_rng_state(checkpoint["rng"], self.env)
+        return self.trained_episodes
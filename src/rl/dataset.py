@@ -0,0 +1,258 @@
+"""
+Offline datasets of (s, a, r, s', done) transitions.
+
+`RecordingEnvironment` wraps any `rl.environment.Environment` and streams every
+``step`` to a `TransitionDatasetWriter`, so a training run (``ql_train
+--record_dataset DIR``) leaves its experience on disk for `rl.offline` to reuse.
+
+On disk a dataset is a directory::
+
+    meta.json            env id, state shape/dtype, transitions per chunk
+    chunk-00000/         states.npy, actions.npy, rewards.npy,
+    chunk-00001/         next_states.npy, terminated.npy, truncated.npy
+    ...
+
+States are stored as the environment returns them (Taxi state ids, Blackjack
+tuples as rows, Box observations as float32 rows), i.e. in the same format as
+the replay buffer. Each chunk is written to a temporary directory and renamed,
+and `meta.json` is rewritten (also atomically) after every chunk, so a killed
+run leaves a readable dataset with all complete chunks. `TransitionDataset`
+memory-maps the chunks, so datasets larger than RAM are read chunk by chunk.
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+from gymnasium import spaces
+
+from rl.environment import Environment
+
+
+DATASET_FORMAT_VERSION = 1
+FIELDS = ("states", "actions", "rewards", "next_states", "terminated", "truncated")
+
+
+def observation_layout(observation_space) -> Tuple[Tuple[int, ...], np.dtype]:
+    """(state_shape, dtype) used to store observations of `observation_space`."""
+    if isinstance(observation_space, spaces.Discrete):
+        return (), np.dtype(np.int64)
+    if isinstance(observation_space, spaces.Tuple):
+        return (len(observation_space.spaces),), np.dtype(np.int64)
+    if isinstance(observation_space, spaces.Box):
+        return tuple(observation_space.shape), np.dtype(np.float32)
+    raise ValueError(f"Unsupported observation space: {observation_space}")
+
+
+# ============================================================
+# Escrita
+# ============================================================
+class TransitionDatasetWriter:
+    """Buffers transitions in pre-allocated arrays and writes one chunk every `chunk_size`."""
+
+    def __init__(self, path, env_id: str, state_shape: Tuple[int, ...] = (), state_dtype=np.int64,
+                 chunk_size: int = 100000):
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        self.path = Path(path)
+        if (self.path / "meta.json").exists():
+            raise ValueError(f"{self.path} already holds a dataset")
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.env_id = env_id
+        self.state_shape = tuple(state_shape)
+        self.state_dtype = np.dtype(state_dtype)
+        self.chunk_size = chunk_size
+        self.chunks = []  # número de transições de cada chunk gravado
+        self._buffer = {
+            "states": np.zeros((chunk_size, *self.state_shape), dtype=self.state_dtype),
+            "actions": np.zeros(chunk_size, dtype=np.int64),
+            "rewards": np.zeros(chunk_size, dtype=np.float32),
+            "next_states": np.zeros((chunk_size, *self.state_shape), dtype=self.state_dtype),
+            "terminated": np.zeros(chunk_size, dtype=bool),
+            "truncated": np.zeros(chunk_size, dtype=bool),
+        }
+        self._size = 0
+        self._write_meta()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def num_transitions(self) -> int:
+        return sum(self.chunks) + self._size
+
+    def add(self, state, action, reward, next_state, terminated, truncated) -> None:
+        i = self._size
+        buffer = self._buffer
+        buffer["states"][i] = state
+        buffer["actions"][i] = action
+        buffer["rewards"][i] = reward
+        buffer["next_states"][i] = next_state
+        buffer["terminated"][i] = terminated
+        buffer["truncated"][i] = truncated
+        self._size = i + 1
+        if self._size == self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes the buffered transitions as a new chunk (no-op when empty)."""
+        if self._size == 0:
+            return
+        chunk_dir = self.path / f"chunk-{len(self.chunks):05d}"
+        tmp_dir = self.path / f".{chunk_dir.name}.{os.getpid()}.tmp"
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        tmp_dir.mkdir()
+        for name in FIELDS:
+            np.save(tmp_dir / f"{name}.npy", self._buffer[name][:self._size])
+        os.replace(tmp_dir, chunk_dir)
+        self.chunks.append(self._size)
+        self._size = 0
+        self._write_meta()
+
+    def close(self) -> None:
+        self.flush()
+
+    def _write_meta(self) -> None:
+        meta = {
+            "format": "rl-transitions",
+            "version": DATASET_FORMAT_VERSION,
+            "env_id": self.env_id,
+            "state_shape": list(self.state_shape),
+            "state_dtype": self.state_dtype.str,
+            "chunks": self.chunks,
+            "num_transitions": sum(self.chunks),
+        }
+        tmp_path = self.path / f".meta.json.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.path / "meta.json")
+
+
+class RecordingEnvironment(Environment):
+    """
+    Environment wrapper that records every transition to `writer`.
+
+    `env` is an `rl.environment.Environment`; everything but `reset`/`step` is
+    delegated to it, and ``self.env`` stays the underlying Gymnasium env, so
+    agents (feature extractors, checkpoints) see the same objects as without
+    the recorder.
+    """
+
+    def __init__(self, env: Environment, writer: TransitionDatasetWriter):
+        super().__init__(env.env)
+        self.wrapped = env
+        self.writer = writer
+        self._state = None
+
+    @classmethod
+    def create(cls, env: Environment, path, chunk_size: int = 100000) -> "RecordingEnvironment":
+        """Wraps `env` with a writer for a new dataset at `path`."""
+        state_shape, state_dtype = observation_layout(env.env.observation_space)
+        writer = TransitionDatasetWriter(path, env.get_id(), state_shape, state_dtype, chunk_size)
+        return cls(env, writer)
+
+    def __getattr__(self, name):
+        # Só chamado para atributos ausentes: get_state_ids, get_observation_bounds...
+        if name == "wrapped":
+            raise AttributeError(name)
+        return getattr(self.wrapped, name)
+
+    def get_num_states(self):
+        return self.wrapped.get_num_states()
+
+    def get_num_actions(self):
+        return self.wrapped.get_num_actions()
+
+    def get_state_id(self, state):
+        return self.wrapped.get_state_id(state)
+
+    def get_random_action(self):
+        return self.wrapped.get_random_action()
+
+    def get_id(self):
+        return self.wrapped.get_id()
+
+    def reset(self):
+        state, info = self.wrapped.reset()
+        self._state = state
+        return state, info
+
+    def step(self, action):
+        next_state, reward, terminated, truncated, info = self.wrapped.step(action)
+        self.writer.add(self._state, action, reward, next_state, terminated, truncated)
+        self._state = next_state
+        return next_state, reward, terminated, truncated, info
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+# ============================================================
+# Leitura
+# ============================================================
+class TransitionDataset:
+    """Read-only view of a dataset directory; chunks are memory-mapped on access."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        meta_path = self.path / "meta.json"
+        if not meta_path.exists():
+            raise FileNotFoundError(f"No dataset (meta.json) found in {self.path}")
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get("format") != "rl-transitions":
+            raise ValueError(f"{self.path} is not a transition dataset")
+        if meta["version"] > DATASET_FORMAT_VERSION:
+            raise ValueError(f"Dataset format version {meta['version']} is newer than supported "
+                             f"({DATASET_FORMAT_VERSION})")
+        self.env_id = meta["env_id"]
+        self.state_shape = tuple(meta["state_shape"])
+        self.state_dtype = np.dtype(meta["state_dtype"])
+        self.chunk_sizes = list(meta["chunks"])
+
+    def __len__(self):
+        return sum(self.chunk_sizes)
+
+    @property
+    def num_chunks(self) -> int:
+        return len(self.chunk_sizes)
+
+    def chunk(self, index: int) -> Dict[str, np.ndarray]:
+        chunk_dir = self.path / f"chunk-{index:05d}"
+        return {name: np.load(chunk_dir / f"{name}.npy", mmap_mode="r") for name in FIELDS}
+
+    def chunks(self) -> Iterator[Dict[str, np.ndarray]]:
+        for index in range(self.num_chunks):
+            yield self.chunk(index)
+
+    def batches(self, batch_size: int, shuffle: bool = False) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        In-memory batches of at most `batch_size` transitions, one chunk at a time.
+        With `shuffle`, chunks and the transitions inside each chunk are visited in random order.
+        """
+        order = np.random.permutation(self.num_chunks) if shuffle else range(self.num_chunks)
+        for index in order:
+            chunk = self.chunk(int(index))
+            size = self.chunk_sizes[index]
+            positions = np.random.permutation(size) if shuffle else None
+            for start in range(0, size, batch_size):
+                if positions is None:
+                    yield {name: np.asarray(array[start:start + batch_size]) for name, array in chunk.items()}
+                else:
+                    # Índices ordenados: leitura sequencial do memmap dentro do lote
+                    rows = np.sort(positions[start:start + batch_size])
+                    yield {name: array[rows] for name, array in chunk.items()}
+
+    def load(self) -> Dict[str, np.ndarray]:
+        """The whole dataset as in-memory arrays."""
+        chunks = [self.chunk(i) for i in range(self.num_chunks)]
+        if not chunks:
+            raise ValueError(f"Dataset {self.path} has no transitions")
+        return {name: np.concatenate([c[name] for c in chunks]) for name in FIELDS}
@@ -1,5 +1,26 @@
 from abc import ABC, abstractmethod
 
+import numpy as np
+
+
+# Sucesso de um episódio a partir da última recompensa e de `terminated`; funciona com
+# escalares e com arrays (um elemento por sub-ambiente). Padrão: término com recompensa positiva.
+SUCCESS_RULES = {
+    "Taxi-v3": lambda reward, terminated: np.asarray(terminated, dtype=bool),
+    "CliffWalking-v0": lambda reward, terminated: np.asarray(terminated, dtype=bool),
+    "Blackjack-v1": lambda reward, terminated: np.logical_and(terminated, np.greater(reward, 0)),
+    # Objetivo alcançado com recompensa -1, como todos os outros passos
+    "MountainCar-v0": lambda reward, terminated: np.asarray(terminated, dtype=bool),
+    "Acrobot-v1": lambda reward, terminated: np.asarray(terminated, dtype=bool),
+    # O término é a queda do pêndulo: sucesso é chegar ao limite de passos sem terminar
+    "CartPole-v1": lambda reward, terminated: np.logical_not(terminated),
+}
+
+
+def _terminal_with_positive_reward(reward, terminated):
+    return np.logical_and(terminated, np.greater(reward, 0))
+
+
 class Environment(ABC):
     def __init__(self, env):
         self.env = env
@@ -28,3 +49,7 @@ class Environment(ABC):
 
     def get_id(self):
         return self.env.unwrapped.spec.id
+
+    def is_success(self, reward, terminated):
+        """Whether an episode that ended with `reward` (and `terminated`) reached the goal; vectorized."""
+        return SUCCESS_RULES.get(self.get_id(), _terminal_with_positive_reward)(reward, terminated)
@@ -0,0 +1,52 @@
+import numpy as np
+from gymnasium import spaces
+
+from rl.environment import Environment
+
+
+class BoxSpaceEnvironment(Environment):
+    """
+    Wrapper for environments with continuous (`Box`) observations and `Discrete`
+    actions (MountainCar, CartPole, Acrobot, LunarLander...). There are no state
+    ids: agents such as tile coding work on the observation vectors directly.
+
+    `get_observation_bounds` gives the range used to discretize each dimension;
+    infinite bounds of the observation space must be replaced by `bounds`.
+    """
+
+    # Faixas usuais das dimensões sem limite finito no observation_space
+    DEFAULT_BOUNDS = {
+        "CartPole-v1": [(-4.8, 4.8), (-3.0, 3.0), (-0.42, 0.42), (-3.5, 3.5)],
+    }
+
+    def __init__(self, env, bounds=None):
+        super().__init__(env)
+        if not isinstance(env.observation_space, spaces.Box) or not isinstance(env.action_space, spaces.Discrete):
+            raise ValueError(f"Unsupported spaces: {env.observation_space} / {env.action_space} "
+                             "(expected Box observations and Discrete actions)")
+        if bounds is None:
+            bounds = self.DEFAULT_BOUNDS.get(self.get_id())
+        if bounds is None:
+            bounds = np.stack([env.observation_space.low, env.observation_space.high], axis=1)
+        self.bounds = np.asarray(bounds, dtype=np.float64)
+        if self.bounds.shape != (self.get_num_dims(), 2) or not np.isfinite(self.bounds).all():
+            raise ValueError(f"Observation bounds must be finite with shape ({self.get_num_dims()}, 2); "
+                             f"got {self.bounds.tolist()}")
+
+    def get_num_dims(self):
+        return int(np.prod(self.env.observation_space.shape))
+
+    def get_observation_bounds(self) -> np.ndarray:
+        return self.bounds
+
+    def get_num_states(self):
+        raise ValueError(f"{self.get_id()} has continuous observations and no finite state set")
+
+    def get_num_actions(self):
+        return self.env.action_space.n
+
+    def get_state_id(self, state):
+        return np.asarray(state, dtype=np.float64)
+
+    def get_random_action(self):
+        return self.env.action_space.sample()
@@ -0,0 +1,88 @@
+import numpy as np
+from gymnasium import spaces
+
+from rl.environment import Environment
+
+
+class DiscreteSpaceEnvironment(Environment):
+    """
+    Wrapper for any environment whose observation space is `Discrete` or a
+    `Tuple` of `Discrete` spaces (Taxi, FrozenLake, CliffWalking, Blackjack...).
+
+    State ids are computed arithmetically in mixed radix: for components
+    x_0..x_{k-1} with sizes n_0..n_{k-1} and offsets start_i,
+    id = Σ (x_i - start_i) · stride_i, where the last component varies fastest.
+    Ids therefore cover exactly ``range(get_num_states())``.
+    """
+
+    def __init__(self, env):
+        super().__init__(env)
+        self._build_encoding()
+
+    def _build_encoding(self):
+        space = self.env.observation_space
+        if isinstance(space, spaces.Discrete):
+            components = [space]
+        elif isinstance(space, spaces.Tuple) and all(isinstance(s, spaces.Discrete) for s in space.spaces):
+            components = list(space.spaces)
+        else:
+            raise ValueError(f"Unsupported observation space: {space} "
+                             "(expected Discrete or Tuple of Discrete)")
+        self._is_tuple = isinstance(space, spaces.Tuple)
+        self._radices = np.array([int(s.n) for s in components], dtype=np.int64)
+        self._starts = np.array([int(s.start) for s in components], dtype=np.int64)
+        # stride_i = n_{i+1} · ... · n_{k-1}
+        self._strides = np.append(np.cumprod(self._radices[::-1])[-2::-1], 1).astype(np.int64)
+        self._num_states = int(np.prod(self._radices))
+
+    def __setstate__(self, state):
+        # Agentes salvos com wrappers antigos (dicionários de estados) recalculam a codificação
+        self.__dict__.update(state)
+        self.__dict__.pop("state_to_id_dict", None)
+        self.__dict__.pop("id_to_state_dict", None)
+        self._build_encoding()
+
+    def get_num_states(self):
+        return self._num_states
+
+    def get_num_actions(self):
+        return self.env.action_space.n
+
+    def get_state_id(self, state):
+        if not self._is_tuple:
+            return int(state) - int(self._starts[0])
+        state_id = 0
+        for x, start, stride in zip(state, self._starts.tolist(), self._strides.tolist()):
+            state_id += (int(x) - start) * stride
+        return state_id
+
+    def get_state_ids(self, states) -> np.ndarray:
+        """
+        Vectorized `get_state_id`. For tuple spaces `states` is either a tuple of
+        per-component arrays (as returned by ``gymnasium.vector``) or an (N, k) array.
+        """
+        if not self._is_tuple:
+            return np.asarray(states, dtype=np.int64) - self._starts[0]
+        if isinstance(states, tuple):
+            states = np.stack([np.asarray(c, dtype=np.int64) for c in states], axis=-1)
+        states = np.asarray(states, dtype=np.int64)
+        return (states - self._starts) @ self._strides
+
+    def get_state(self, state_id):
+        """Inverse of `get_state_id`."""
+        digits = (int(state_id) // self._strides) % self._radices + self._starts
+        if not self._is_tuple:
+            return int(digits[0])
+        return tuple(int(d) for d in digits)
+
+    def get_states(self, state_ids) -> np.ndarray:
+        """
+        Vectorized `get_state`: observations of `state_ids` as an (N,) array, or
+        (N, k) rows for tuple spaces (the batch format of the feature extractors).
+        """
+        state_ids = np.asarray(state_ids, dtype=np.int64)
+        digits = (state_ids[:, None] // self._strides) % self._radices + self._starts
+        return digits if self._is_tuple else digits[:, 0]
+
+    def get_random_action(self):
+        return self.env.action_space.sample()
@@ -0,0 +1,134 @@
+"""
+Exports the greedy policy of a trained agent as a lookup table.
+
+For discrete environments the agent is evaluated once over every state id, in
+vectorized batches (a Q-table slice, Φ·w for linear agents, batched forward
+passes for neural ones), and saved as a `.npz` model holding
+
+- ``actions``: one ``uint8`` greedy action per state id;
+- ``q_values``: the (states × actions) float32 Q-values behind them.
+
+Playing the table (``ql_play --agent table``, `rl.model_io.PolicyTable`) is a
+single array lookup per step, with no feature extraction and no torch import.
+
+Example::
+
+    python -m rl.export_policy --agent neural --env_name Taxi-v3
+    python -m rl.ql_play --agent table --env_name Taxi-v3 --eval 10000
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Optional
+
+if __package__ is None or __package__ == "":
+    package_root = Path(__file__).resolve().parents[1]
+    if str(package_root) not in sys.path:
+        sys.path.insert(0, str(package_root))
+
+import numpy as np
+from timeit import default_timer as timer
+
+from rl.model_io import save_model_npz
+
+
+def q_value_table(agent, env, batch_size: int = 65536) -> np.ndarray:
+    """
+    (states × actions) float32 Q-values of a tabular, linear or neural agent (or a
+    policy loaded from a `.npz` model) over every state id of `env`.
+    """
+    num_states = env.get_num_states()
+    num_actions = env.get_num_actions()
+    q_table = getattr(agent, "q_table", None)
+    if q_table is not None:
+        return np.asarray(q_table[:num_states], dtype=np.float32)
+    if not hasattr(env, "get_states"):
+        raise ValueError(f"{type(env).__name__} cannot enumerate its states")
+
+    q_values = np.zeros((num_states, num_actions), dtype=np.float32)
+    all_actions = np.arange(num_actions)
+    for start in range(0, num_states, batch_size):
+        ids = np.arange(start, min(start + batch_size, num_states))
+        states = env.get_states(ids)
+        n = len(ids)
+        if hasattr(agent, "w") and hasattr(agent, "fex"):
+            features = agent.fex.get_features_batch(np.repeat(states, num_actions, axis=0), np.tile(all_actions, n))
+            q_values[ids] = (features @ agent.w).reshape(n, num_actions)
+        elif hasattr(agent, "model"):
+            q_values[ids] = _neural_qvalues(agent, states, all_actions)
+        else:
+            raise ValueError(f"Cannot export a policy table from {type(agent).__name__}")
+    return q_values
+
+
+def _neural_qvalues(agent, states, all_actions) -> np.ndarray:
+    import torch
+
+    n, num_actions = len(states), len(all_actions)
+    if agent.q_head == "multi":
+        inputs = agent.fex.get_state_features_batch(states)
+    else:
+        inputs = agent.fex.get_features_batch(np.repeat(states, num_actions, axis=0), np.tile(all_actions, n))
+    x = torch.as_tensor(np.asarray(inputs, dtype=np.float32), device=agent.device)
+    with torch.no_grad():
+        return agent.model(x).reshape(n, num_actions).cpu().numpy()
+
+
+def greedy_actions(q_values: np.ndarray) -> np.ndarray:
+    """argmax_a Q(s, a) per state, as uint8 (first maximum on ties, like `np.argmax` in the agents)."""
+    if q_values.shape[1] > np.iinfo(np.uint8).max + 1:
+        raise ValueError(f"{q_values.shape[1]} actions do not fit in a uint8 action table")
+    return np.argmax(q_values, axis=1).astype(np.uint8)
+
+
+def export_policy(agent, env, filename, source: str = "") -> np.ndarray:
+    """Writes the greedy action table (and Q-values) of `agent` to `filename`; returns the actions."""
+    q_values = q_value_table(agent, env)
+    actions = greedy_actions(q_values)
+    save_model_npz(filename, "table", {"actions": actions, "q_values": q_values}, {
+        "env_id": env.get_id(),
+        "num_states": int(q_values.shape[0]),
+        "num_actions": int(q_values.shape[1]),
+        "source": source,
+    })
+    return actions
+
+
+def main(argv: Optional[list] = None) -> int:
+    from rl import ql_play
+
+    agent_choices = sorted(name for name in ql_play.AGENT_REGISTRY if name not in ("table", "tilecoding"))
+    parser = argparse.ArgumentParser(description="Export a trained agent's greedy policy as a uint8 action table")
+    parser.add_argument("--agent", choices=agent_choices, default="tabular", help="Agent type to export")
+    parser.add_argument("--env_name", type=str, default="Taxi-v3", help="Gymnasium environment name")
+    parser.add_argument("--model_path", type=str, default=None, help="Path to the trained agent")
+    parser.add_argument("--output", type=str, default=None,
+                        help="Output .npz (default: <env>-policy-table.npz, loaded by ql_play --agent table)")
+    args = parser.parse_args(argv)
+
+    if args.env_name not in ql_play.ENVIRONMENT_WRAPPERS:
+        raise ValueError(f"Unsupported environment: {args.env_name}")
+    spec = ql_play.AGENT_REGISTRY[args.agent]
+    model_path = Path(args.model_path) if args.model_path else ql_play._resolve_model_path(spec, args.env_name)
+    if not model_path.exists():
+        raise FileNotFoundError(f"Trained agent not found at {model_path}")
+
+    import gymnasium as gym
+    base_env = gym.make(args.env_name)
+    if hasattr(base_env, "env"):
+        base_env = base_env.env
+    wrapped_env = ql_play.ENVIRONMENT_WRAPPERS[args.env_name](base_env)
+    agent = ql_play._load_agent(spec, model_path, wrapped_env)
+
+    output = Path(args.output) if args.output else Path(ql_play.AGENT_REGISTRY["table"].default_model_path(args.env_name))
+    start = timer()
+    actions = export_policy(agent, wrapped_env, output, source=f"{args.agent}:{model_path.name}")
+    elapsed = timer() - start
+    print(f"Exported {actions.size} states x {wrapped_env.get_num_actions()} actions from {model_path} "
+          f"to {output} in {elapsed * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
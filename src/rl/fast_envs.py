@@ -0,0 +1,193 @@
+"""
+Pure-NumPy vectorized simulators for toy-text environments.
+
+`VectorTaxi` steps N independent Taxi-v3 episodes with a handful of array
+operations over the transition arrays compiled by `rl.planning`, instead of
+N Python calls through the Gymnasium wrappers and ``P[s][a]`` dict lookups.
+
+It reproduces Gymnasium exactly: sub-environment i owns the same random
+generator that ``env.reset(seed=seed + i)`` would create, and draws one uniform
+per reset and per step, as ``categorical_sample`` does. Trajectories under a
+shared seed are therefore identical (see `check_equivalence`, run by
+``tests/test_fast_envs.py`` and, as a convenience, by ``python -m rl.fast_envs``).
+
+The batch API follows ``gymnasium.vector`` with same-step autoreset (the final
+observation of a finished episode is in ``infos["final_obs"]``), so it plugs
+into `QLearningAgentTabular.train_vectorized`.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+if __package__ is None or __package__ == "":
+    package_root = Path(__file__).resolve().parents[1]
+    if str(package_root) not in sys.path:
+        sys.path.insert(0, str(package_root))
+
+import gymnasium as gym
+import numpy as np
+from gymnasium.utils import seeding
+
+from rl.environment import Environment
+from rl.planning import compile_transition_model
+
+
+class VectorTaxi(Environment):
+    """Batch of `num_envs` Taxi-v3 episodes simulated with NumPy."""
+
+    metadata = {"autoreset_mode": "SameStep"}
+    _UNIFORM_BLOCK = 256
+
+    def __init__(self, env: Optional[gym.Env] = None, num_envs: int = 1,
+                 max_episode_steps: Optional[int] = None):
+        if env is None:
+            env = gym.make("Taxi-v3")
+        super().__init__(getattr(env, "env", env))
+        if num_envs < 1:
+            raise ValueError("num_envs must be positive")
+        self.num_envs = num_envs
+        self.max_episode_steps = max_episode_steps
+
+        model = compile_transition_model(self.env)
+        self.num_states = model.num_states
+        self.num_actions = model.num_actions
+        self._deterministic = model.probs.shape[2] == 1
+        self._cum_probs = np.cumsum(model.probs, axis=2)
+        self._next_states = model.next_states
+        self._rewards = model.rewards
+        self._dones = model.dones
+        self._cum_initial = np.cumsum(model.initial_distribution)
+
+        self.states = np.zeros(num_envs, dtype=np.int64)
+        self.elapsed_steps = np.zeros(num_envs, dtype=np.int64)
+        self._all = np.arange(num_envs)
+        self._seed(None)
+
+    # =========================================================
+    # Interface rl.environment.Environment
+    # =========================================================
+    def get_num_states(self):
+        return self.num_states
+
+    def get_num_actions(self):
+        return self.num_actions
+
+    def get_state_id(self, state):
+        return state
+
+    def get_random_action(self):
+        return self.env.action_space.sample()
+
+    def close(self):
+        pass
+
+    # =========================================================
+    # Geradores por sub-ambiente
+    # =========================================================
+    def _seed(self, seed: Optional[int]) -> None:
+        # Mesmo gerador que o Gymnasium cria em env.reset(seed=seed + i)
+        self._rngs = [seeding.np_random(None if seed is None else seed + i)[0]
+                      for i in range(self.num_envs)]
+        self._uniforms = np.empty((self.num_envs, self._UNIFORM_BLOCK))
+        self._cursor = np.full(self.num_envs, self._UNIFORM_BLOCK, dtype=np.int64)
+
+    def _draw(self, envs: np.ndarray) -> np.ndarray:
+        """Next uniform of each sub-env in `envs` (pre-drawn in blocks: same stream as rng.random())."""
+        for i in envs[self._cursor[envs] >= self._UNIFORM_BLOCK]:
+            self._uniforms[i] = self._rngs[i].random(self._UNIFORM_BLOCK)
+            self._cursor[i] = 0
+        u = self._uniforms[envs, self._cursor[envs]]
+        self._cursor[envs] += 1
+        return u
+
+    def _reset_envs(self, envs: np.ndarray) -> None:
+        self.states[envs] = np.searchsorted(self._cum_initial, self._draw(envs), side="right")
+        self.elapsed_steps[envs] = 0
+
+    # =========================================================
+    # API em lote (gymnasium.vector, autoreset no mesmo passo)
+    # =========================================================
+    def reset(self, seed: Optional[int] = None) -> Tuple[np.ndarray, Dict]:
+        if seed is not None:
+            self._seed(seed)
+        self._reset_envs(self._all)
+        return self.states.copy(), {}
+
+    def step(self, actions) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict]:
+        actions = np.asarray(actions, dtype=np.int64)
+        u = self._draw(self._all)
+        if self._deterministic:
+            outcomes = np.zeros(self.num_envs, dtype=np.int64)
+        else:
+            outcomes = np.argmax(self._cum_probs[self.states, actions] > u[:, None], axis=1)
+
+        index = (self.states, actions, outcomes)
+        next_states = self._next_states[index]
+        rewards = self._rewards[index]
+        terminated = self._dones[index]
+        self.elapsed_steps += 1
+        if self.max_episode_steps is not None:
+            truncated = ~terminated & (self.elapsed_steps >= self.max_episode_steps)
+        else:
+            truncated = np.zeros(self.num_envs, dtype=bool)
+
+        self.states = next_states
+        infos = {}
+        done = np.flatnonzero(terminated | truncated)
+        if done.size:
+            infos["final_obs"] = next_states.copy()
+            self.states = next_states.copy()
+            self._reset_envs(done)
+        return self.states.copy(), rewards, terminated, truncated, infos
+
+
+# ============================================================
+# Equivalência com o Gymnasium
+# ============================================================
+def check_equivalence(num_envs: int = 16, num_steps: int = 5000, seed: int = 0) -> int:
+    """
+    Steps `VectorTaxi` and `num_envs` independent Gymnasium Taxi-v3 envs with the
+    same random actions and seeds, resetting finished episodes. Returns the
+    number of mismatching (observation, reward, terminated) entries; 0 means the
+    trajectories are identical.
+    """
+    reference = [gym.make("Taxi-v3").env for _ in range(num_envs)]
+    expected = np.array([env.reset(seed=seed + i)[0] for i, env in enumerate(reference)])
+    fast = VectorTaxi(num_envs=num_envs)
+    observations, _ = fast.reset(seed=seed)
+    mismatches = int(np.sum(observations != expected))
+
+    action_rng = np.random.default_rng(seed)
+    for _ in range(num_steps):
+        actions = action_rng.integers(fast.num_actions, size=num_envs)
+        observations, rewards, terminated, _, infos = fast.step(actions)
+        final_obs = infos.get("final_obs", observations)
+        for i, env in enumerate(reference):
+            obs, reward, term, _, _ = env.step(int(actions[i]))
+            mismatches += int(obs != final_obs[i]) + int(reward != rewards[i]) + int(term != terminated[i])
+            if term:
+                obs, _ = env.reset()
+            mismatches += int(obs != observations[i])
+    return mismatches
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check VectorTaxi trajectories against Gymnasium's Taxi-v3")
+    parser.add_argument("--num_envs", type=int, default=16, help="Sub-environments compared")
+    parser.add_argument("--num_steps", type=int, default=5000, help="Batched steps compared")
+    parser.add_argument("--seed", type=int, default=0, help="Shared seed")
+    args = parser.parse_args(argv)
+
+    mismatches = check_equivalence(args.num_envs, args.num_steps, args.seed)
+    total = args.num_envs * args.num_steps
+    if mismatches:
+        print(f"VectorTaxi diverged from Gymnasium: {mismatches} mismatches in {total} transitions")
+        return 1
+    print(f"VectorTaxi matches Gymnasium on {total} transitions ({args.num_envs} envs, seed {args.seed})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,155 @@
+"""
+Streaming per-episode metrics.
+
+`MetricsWriter` appends one CSV row per episode (``episode, reward, penalties,
+steps, epsilon, ...``) and flushes every `flush_every` episodes, so long runs
+keep constant memory and a crash loses at most the unflushed tail. It also
+keeps O(1) running means over the last `window` episodes for progress output.
+`load_metrics` reads the file back as one NumPy column per field, skipping a
+truncated last line.
+"""
+
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class MetricsWriter:
+    """Append-only CSV of per-episode records with live windowed means."""
+
+    def __init__(self, path, flush_every: int = 100, window: int = 100,
+                 progress_every: int = 0, append: bool = False):
+        if flush_every < 1 or window < 1:
+            raise ValueError("flush_every and window must be positive")
+        self.path = str(path)
+        self.flush_every = flush_every
+        self.window = window
+        self.progress_every = progress_every
+        self.fields: Optional[List[str]] = None
+        self.num_records = 0
+
+        if append and os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            with open(self.path) as f:
+                self.fields = f.readline().strip().split(",")
+            _truncate_partial_line(self.path)
+            self._file = open(self.path, "a")
+        else:
+            self._file = open(self.path, "w")
+        self._pending: List[str] = []
+        # Janela circular por campo: média móvel incremental, O(1) por episódio
+        self._ring: Optional[np.ndarray] = None
+        self._ring_sum: Optional[np.ndarray] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, **record) -> None:
+        if self.fields is None:
+            self.fields = list(record)
+            self._pending.append(",".join(self.fields))
+        elif list(record) != self.fields:
+            raise ValueError(f"Metrics record fields {list(record)} do not match the file header {self.fields}")
+
+        values = [float(record[k]) for k in self.fields]
+        self._pending.append(",".join(_format_value(v) for v in values))
+        self._update_window(values)
+        self.num_records += 1
+
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+        if self.progress_every and self.num_records % self.progress_every == 0:
+            print(self.progress_line())
+
+    def _update_window(self, values: List[float]) -> None:
+        if self._ring is None:
+            self._ring = np.zeros((self.window, len(values)))
+            self._ring_sum = np.zeros(len(values))
+        slot = self.num_records % self.window
+        row = np.asarray(values)
+        self._ring_sum += row - self._ring[slot]
+        self._ring[slot] = row
+
+    def smoothed(self, field: str) -> float:
+        """Mean of `field` over the last `window` records written by this writer."""
+        if self._ring is None:
+            return float("nan")
+        count = min(self.num_records, self.window)
+        return float(self._ring_sum[self.fields.index(field)] / count)
+
+    def last(self, field: str) -> float:
+        if self._ring is None:
+            return float("nan")
+        return float(self._ring[(self.num_records - 1) % self.window, self.fields.index(field)])
+
+    def progress_line(self) -> str:
+        count = min(self.num_records, self.window)
+        parts = [f"Episode {int(self.last('episode')) if 'episode' in self.fields else self.num_records}"]
+        for field in self.fields:
+            if field == "episode":
+                continue
+            if field == "epsilon":
+                parts.append(f"ε {self.last(field):.4f}")
+            else:
+                parts.append(f"{field} {self.smoothed(field):.2f}")
+        return " | ".join(parts) + f" (mean of last {count})"
+
+    def flush(self) -> None:
+        if self._pending:
+            self._file.write("\n".join(self._pending) + "\n")
+            self._pending = []
+        self._file.flush()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+def _truncate_partial_line(path: str) -> None:
+    """Drops a last line left incomplete by an interrupted run, so appends start on a fresh line."""
+    with open(path, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - 65536))
+        tail = f.read()
+        if tail.endswith(b"\n"):
+            return
+        f.truncate(size - len(tail) + tail.rfind(b"\n") + 1)
+
+
+def truncate_metrics(path, num_episodes: int) -> None:
+    """Keeps only the rows of episodes ``< num_episodes`` (e.g. before resuming from a checkpoint)."""
+    _truncate_partial_line(str(path))
+    with open(path, "rb+") as f:
+        header = f.readline()
+        fields = header.decode().strip().split(",")
+        if "episode" not in fields:
+            raise ValueError(f"{path} has no 'episode' column")
+        column = fields.index("episode")
+        keep = f.tell()
+        for line in iter(f.readline, b""):
+            if float(line.split(b",")[column]) >= num_episodes:
+                break
+            keep = f.tell()
+        f.truncate(keep)
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def load_metrics(path) -> Dict[str, np.ndarray]:
+    """Reads a metrics CSV as {field: column}; a partially written last line is ignored."""
+    with open(path) as f:
+        text = f.read()
+    lines = text.split("\n")
+    header = lines[0].strip().split(",")
+    rows = lines[1:-1]  # o último pedaço não termina em "\n": vazio ou linha truncada
+    if not rows:
+        return {field: np.zeros(0) for field in header}
+    data = np.loadtxt(rows, delimiter=",", ndmin=2)
+    return {field: data[:, i] for i, field in enumerate(header)}
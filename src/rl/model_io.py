@@ -0,0 +1,161 @@
+"""
+Compact, versioned `.npz` model files for the tabular, linear and tile-coding
+agents, and for greedy policy tables exported by `rl.export_policy`.
+
+A model file holds only the learned arrays (``q_table`` or ``w``) plus a JSON
+blob of hyperparameters, instead of a pickle of the whole agent (environment,
+feature extractor and training history included). Loading returns lightweight
+greedy policies, so playing a model does not rebuild the training-time agent.
+Large tables can be memory-mapped straight from the (uncompressed) archive.
+"""
+
+import json
+import zipfile
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+MODEL_FORMAT_VERSION = 1
+_ZIP_MAGIC = b"PK\x03\x04"
+
+
+def is_npz_file(filename) -> bool:
+    with open(filename, "rb") as f:
+        return f.read(4) == _ZIP_MAGIC
+
+
+def save_model_npz(filename, agent_type: str, arrays: Dict[str, np.ndarray], params: Dict) -> None:
+    """Writes an uncompressed `.npz` (so arrays stay memory-mappable)."""
+    with open(filename, "wb") as f:  # file object: np.savez would append ".npz" to the name
+        np.savez(
+            f,
+            format_version=np.array(MODEL_FORMAT_VERSION),
+            agent_type=np.array(agent_type),
+            params=np.array(json.dumps(params)),
+            **arrays,
+        )
+
+
+def _memmap_npz_member(filename, name: str, mode: str) -> np.ndarray:
+    """Memory-maps `name`.npy inside an uncompressed npz archive."""
+    with zipfile.ZipFile(filename) as archive:
+        info = archive.getinfo(f"{name}.npy")
+    if info.compress_type != zipfile.ZIP_STORED:
+        raise ValueError(f"{name} is compressed and cannot be memory-mapped")
+    with open(filename, "rb") as f:
+        # Cabeçalho local do zip: 30 bytes fixos + nome + campo extra
+        f.seek(info.header_offset)
+        local_header = f.read(30)
+        name_len = int.from_bytes(local_header[26:28], "little")
+        extra_len = int.from_bytes(local_header[28:30], "little")
+        f.seek(info.header_offset + 30 + name_len + extra_len)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+    return np.memmap(filename, dtype=dtype, mode=mode, shape=shape,
+                     order="F" if fortran_order else "C", offset=offset)
+
+
+def load_model_npz(filename, mmap_mode: Optional[str] = None) -> Tuple[str, Dict[str, np.ndarray], Dict]:
+    """Returns (agent_type, arrays, params); arrays are memory-mapped when `mmap_mode` is given."""
+    with np.load(filename, allow_pickle=False) as data:
+        version = int(data["format_version"])
+        if version > MODEL_FORMAT_VERSION:
+            raise ValueError(f"Model format version {version} is newer than supported "
+                             f"({MODEL_FORMAT_VERSION})")
+        agent_type = str(data["agent_type"])
+        params = json.loads(str(data["params"]))
+        names = [k for k in data.files if k not in ("format_version", "agent_type", "params")]
+        if mmap_mode is None:
+            arrays = {k: data[k] for k in names}
+    if mmap_mode is not None:
+        arrays = {k: _memmap_npz_member(filename, k, mmap_mode) for k in names}
+    return agent_type, arrays, params
+
+
+# ============================================================
+# Políticas gulosas carregadas de arquivos .npz
+# ============================================================
+class TabularPolicy:
+    """Greedy policy over a Q-table: argmax_a Q[s, a]."""
+
+    def __init__(self, q_table: np.ndarray, params: Optional[Dict] = None):
+        self.q_table = q_table
+        self.params = params or {}
+
+    def choose_action(self, state: int, is_in_exploration_mode: bool = False) -> int:
+        return int(np.argmax(self.q_table[state, :]))
+
+    def policy(self, state: int) -> int:
+        return self.choose_action(state)
+
+
+class LinearPolicy:
+    """Greedy policy over linear weights: argmax_a Φ(s)·w."""
+
+    def __init__(self, w: np.ndarray, fex, params: Optional[Dict] = None):
+        self.w = w
+        self.fex = fex
+        self.params = params or {}
+
+    def get_qvalues(self, state) -> np.ndarray:
+        return self.fex.get_features_all_actions(state) @ self.w
+
+    def policy(self, state) -> int:
+        return int(np.argmax(self.get_qvalues(state)))
+
+
+class PolicyTable:
+    """
+    Greedy policy exported by `rl.export_policy`: one uint8 action per state id
+    (plus the Q-values it was taken from), so acting is a single array lookup.
+    """
+
+    def __init__(self, actions: np.ndarray, q_values: Optional[np.ndarray] = None, params: Optional[Dict] = None):
+        self.actions = actions
+        self.q_values = q_values
+        self.params = params or {}
+
+    def choose_action(self, state: int, is_in_exploration_mode: bool = False) -> int:
+        return int(self.actions[state])
+
+    def policy(self, state: int) -> int:
+        return self.choose_action(state)
+
+
+def load_policy(filename, env=None, mmap_mode: Optional[str] = "r"):
+    """
+    Loads a `.npz` model as a greedy policy. `env` (an `rl.environment.Environment`)
+    is only needed by linear models, to build their feature extractor; tile-coding
+    models carry their tile coder configuration in `params`.
+    """
+    agent_type, arrays, params = load_model_npz(filename, mmap_mode=mmap_mode)
+    if agent_type == "tabular":
+        return TabularPolicy(arrays["q_table"], params)
+    if agent_type == "linear":
+        if env is None:
+            raise ValueError("Linear models need the environment to build their feature extractor")
+        from rl.qll import feature_extractors_dict
+        env_id = params["env_id"]
+        if env_id not in feature_extractors_dict:
+            raise ValueError(f"Unsupported environment: {env_id}")
+        fex = feature_extractors_dict[env_id](env.env)
+        # Pesos só valem para o φ com que foram treinados
+        saved_version = params.get("features_version")
+        current_version = getattr(fex, "FEATURES_VERSION", None)
+        if saved_version != current_version or arrays["w"].size != fex.get_num_features():
+            raise ValueError(f"{Path(filename).name} was trained with {params.get('feature_extractor')} "
+                             f"v{saved_version} ({arrays['w'].size} features); the current "
+                             f"{type(fex).__name__} is v{current_version} ({fex.get_num_features()} features)")
+        return LinearPolicy(np.asarray(arrays["w"]), fex, params)
+    if agent_type == "table":
+        return PolicyTable(arrays["actions"], arrays.get("q_values"), params)
+    if agent_type == "tilecoding":
+        from rl.tile_coding import TileCodingPolicy
+        return TileCodingPolicy.from_arrays(arrays, params)
+    raise ValueError(f"Unsupported agent type in {Path(filename).name}: {agent_type}")
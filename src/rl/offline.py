@@ -0,0 +1,204 @@
+"""
+Batch (offline) Q-learning from a recorded transition dataset.
+
+Fits an agent to a dataset written by ``ql_train --record_dataset`` without
+touching the environment, so one collection run can be reused across many
+model variants:
+
+- linear agents (``Q = Φ·w``): LSTD-Q policy iteration or least-squares fitted
+  Q iteration, both closed-form solves of a d×d system accumulated in
+  vectorized passes over the chunks;
+- neural agents: fitted Q iteration, regressing the network on targets from a
+  frozen copy of itself with large minibatches.
+
+Example::
+
+    python -m rl.ql_train --agent linear --num_episodes 2000 --record_dataset taxi-data
+    python -m rl.offline --dataset taxi-data --agent linear --method lstdq --gamma 0.9
+
+The fitted model is saved under the same name as ``ql_train`` uses, so
+``ql_play`` and ``rl.planning`` load it unchanged.
+"""
+
+import copy
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+if __package__ is None or __package__ == "":
+    package_root = Path(__file__).resolve().parents[1]
+    if str(package_root) not in sys.path:
+        sys.path.insert(0, str(package_root))
+
+import numpy as np
+from timeit import default_timer as timer
+
+from rl.dataset import TransitionDataset
+
+
+LINEAR_METHODS = ("lstdq", "fqi")
+
+
+# ============================================================
+# Agente linear: LSTD-Q e fitted Q iteration por mínimos quadrados
+# ============================================================
+def _linear_batch_terms(agent, batch, w: np.ndarray):
+    """φ(s,a) and φ(s', π_w(s')) of a batch, with π_w greedy in Q = Φ·w (zeros at terminal s')."""
+    num_actions = agent.env.get_num_actions()
+    n = len(batch["actions"])
+    features = agent.get_features_batch(batch["states"], batch["actions"])
+    next_features = agent.get_features_batch(np.repeat(batch["next_states"], num_actions, axis=0),
+                                             np.tile(np.arange(num_actions), n)).reshape(n, num_actions, -1)
+    greedy = np.argmax(next_features @ w, axis=1)
+    next_greedy = next_features[np.arange(n), greedy] * ~batch["terminated"][:, None]
+    return features, next_greedy
+
+
+def fit_linear(agent, dataset: TransitionDataset, method: str = "lstdq", iterations: int = 20,
+               ridge: float = 1e-3, batch_size: int = 16384, tol: float = 1e-6) -> List[float]:
+    """
+    Fits ``agent.w`` to `dataset`; returns ||Δw|| of each iteration.
+
+    - ``lstdq``: LSTD-Q policy iteration. Each iteration evaluates the greedy
+      policy of the current w in closed form,
+      w ← (Σ φ (φ − γ φ'_π)ᵀ + ridge·I)⁻¹ Σ φ r.
+    - ``fqi``: least-squares fitted Q iteration. The Gram matrix Σ φ φᵀ is
+      built once; each iteration regresses on r + γ max_a' Q_w(s', a').
+
+    Both stop early once ||Δw|| < `tol`.
+    """
+    if method not in LINEAR_METHODS:
+        raise ValueError(f"Unsupported method: {method}. Choose from {list(LINEAR_METHODS)}")
+    if len(dataset) == 0:
+        raise ValueError(f"Dataset {dataset.path} has no transitions")
+    num_features = agent.w.size
+    regularizer = ridge * np.eye(num_features)
+    w = agent.w.astype(np.float64)
+    gram = None
+    deltas = []
+
+    for _ in range(iterations):
+        A = np.zeros((num_features, num_features))
+        b = np.zeros(num_features)
+        for batch in dataset.batches(batch_size):
+            features, next_greedy = _linear_batch_terms(agent, batch, w)
+            rewards = batch["rewards"].astype(np.float64)
+            if method == "lstdq":
+                A += features.T @ (features - agent.gamma * next_greedy)
+                b += features.T @ rewards
+            else:
+                if gram is None:
+                    A += features.T @ features
+                b += features.T @ (rewards + agent.gamma * (next_greedy @ w))
+        if method == "fqi":
+            gram = A if gram is None else gram
+            A = gram
+        new_w = np.linalg.solve(A + regularizer, b)
+        deltas.append(float(np.linalg.norm(new_w - w)))
+        w = new_w
+        if deltas[-1] < tol:
+            break
+
+    agent.w = w
+    return deltas
+
+
+# ============================================================
+# Agente neural: fitted Q iteration
+# ============================================================
+def fit_neural(agent, dataset: TransitionDataset, iterations: int = 20, epochs: int = 1,
+               batch_size: int = 4096) -> List[float]:
+    """
+    Fitted Q iteration for `QLearningAgentNeural`; returns the mean Huber loss of each iteration.
+
+    Each iteration freezes a copy of the network as the target and runs `epochs`
+    shuffled passes of large-minibatch regression on r + γ max_a' Q_target(s', a').
+    """
+    import torch
+
+    if len(dataset) == 0:
+        raise ValueError(f"Dataset {dataset.path} has no transitions")
+    agent_target = agent.target_model
+    losses = []
+    try:
+        for _ in range(iterations):
+            # `_max_next_qvalues` usa a rede alvo: aqui, a cópia congelada desta iteração
+            agent.target_model = copy.deepcopy(agent.model).requires_grad_(False)
+            total, count = 0.0, 0
+            for _ in range(epochs):
+                for batch in dataset.batches(batch_size, shuffle=True):
+                    features = agent._transition_input_batch(batch["states"], batch["actions"])
+                    x = torch.as_tensor(np.asarray(features, dtype=np.float32), device=agent.device)
+                    actions = torch.as_tensor(batch["actions"], device=agent.device)
+                    rewards = torch.as_tensor(batch["rewards"], device=agent.device)
+                    dones = torch.as_tensor(batch["terminated"], device=agent.device)
+                    with torch.no_grad():
+                        targets = rewards + agent.gamma * agent._max_next_qvalues(batch["next_states"]) * (~dones)
+
+                    agent.optimizer.zero_grad()
+                    loss = agent.loss_fn(agent._predict_taken(x, actions), targets)
+                    loss.backward()
+                    torch.nn.utils.clip_grad_norm_(agent.model.parameters(), max_norm=5.0)
+                    agent.optimizer.step()
+                    agent.num_updates += 1
+                    total += loss.item() * len(actions)
+                    count += len(actions)
+            losses.append(total / count)
+    finally:
+        agent.target_model = agent_target
+    if agent.target_model is not None:
+        agent.sync_target_network()
+    return losses
+
+
+# ============================================================
+# CLI
+# ============================================================
+def main(argv: Optional[list] = None) -> int:
+    from rl import ql_train
+
+    # Mesmos hiperparâmetros de agente do ql_train (--gamma, --learning_rate, --hidden_dim, --q_head...)
+    parser = ql_train._prepare_parser()
+    parser.description = "Fit a linear or neural Q-Learning agent to a recorded transition dataset"
+    parser.add_argument("--dataset", type=str, required=True, help="Directory written by ql_train --record_dataset")
+    parser.add_argument("--method", choices=LINEAR_METHODS, default="lstdq",
+                        help="Linear agents: LSTD-Q policy iteration or least-squares fitted Q iteration")
+    parser.add_argument("--iterations", type=int, default=20, help="Policy / fitted-Q iterations")
+    parser.add_argument("--ridge", type=float, default=1e-3, help="Ridge regularization of the linear solves")
+    parser.add_argument("--epochs", type=int, default=1, help="Passes over the dataset per iteration (neural)")
+    parser.add_argument("--offline_batch_size", type=int, default=4096,
+                        help="Transitions per batch (minibatch size for the neural agent)")
+    args = parser.parse_args(argv)
+
+    if args.agent not in ("linear", "neural"):
+        raise ValueError("Offline fitting supports the linear and neural agents")
+    if args.iterations < 1 or args.epochs < 1 or args.offline_batch_size < 1:
+        raise ValueError("iterations, epochs and offline_batch_size must be positive")
+    dataset = TransitionDataset(args.dataset)
+    if dataset.env_id != args.env_name:
+        raise ValueError(f"Dataset {args.dataset} was recorded on {dataset.env_id}, not {args.env_name}")
+
+    agent, agent_spec = ql_train.build_from_args(args)
+    print(f"\nFitting {agent_spec.label} agent on {len(dataset)} transitions "
+          f"({dataset.num_chunks} chunks) from {args.dataset}...\n")
+
+    start = timer()
+    if args.agent == "linear":
+        deltas = fit_linear(agent, dataset, args.method, args.iterations, args.ridge, args.offline_batch_size)
+        for i, delta in enumerate(deltas):
+            print(f"Iteration {i}: ||Δw|| = {delta:.6f}")
+    else:
+        losses = fit_neural(agent, dataset, args.iterations, args.epochs, args.offline_batch_size)
+        for i, loss in enumerate(losses):
+            print(f"Iteration {i}: loss = {loss:.6f}")
+    elapsed = timer() - start
+    print(f"\nFitting finished in {elapsed:.2f} seconds.\n")
+
+    model_path = agent_spec.filename_fn(args.model_base_name)
+    agent.save(model_path)
+    print(f"Saved agent to {model_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
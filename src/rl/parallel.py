@@ -0,0 +1,58 @@
+"""Helpers shared by the multi-process runners (`ql_train --seeds`, `ql_sweep`, `ql_halving`)."""
+
+import contextlib
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS",
+                   "NUMEXPR_NUM_THREADS", "VECLIB_MAXIMUM_THREADS")
+
+
+@contextlib.contextmanager
+def worker_thread_limit(threads_per_worker: int):
+    """
+    Limits BLAS/OpenMP threads of worker processes started inside the block.
+    Workers are created with "spawn" and inherit the environment, so the limit
+    is in place before NumPy is imported in them.
+    """
+    saved_env = {var: os.environ.get(var) for var in THREAD_ENV_VARS}
+    os.environ.update({var: str(threads_per_worker) for var in THREAD_ENV_VARS})
+    try:
+        yield
+    finally:
+        for var, value in saved_env.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+
+def init_worker(threads_per_worker: int, initializer=None, initargs=(), torch_threads: bool = False) -> None:
+    """
+    Runs `initializer` and, when torch is loaded (or `torch_threads` is set), caps its
+    intra-op threads. Torch is never imported just for this: workers that only play
+    NumPy policies stay torch-free, and a later import honours OMP_NUM_THREADS anyway.
+    """
+    if initializer is not None:
+        initializer(*initargs)
+    if torch_threads or "torch" in sys.modules:
+        import torch
+        torch.set_num_threads(threads_per_worker)
+
+
+@contextlib.contextmanager
+def process_pool(workers: int, threads_per_worker: int = 1, initializer=None, initargs=(),
+                 torch_threads: bool = False):
+    """
+    Spawn-based ProcessPoolExecutor whose workers use `threads_per_worker` threads each.
+    `initializer(*initargs)` runs once per worker, e.g. to load a model; `torch_threads`
+    imports torch in every worker to cap its threads even if nothing loaded it yet.
+    """
+    with worker_thread_limit(threads_per_worker):
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=init_worker,
+                                 initargs=(threads_per_worker, initializer, initargs, torch_threads)) as pool:
+            yield pool
@@ -0,0 +1,182 @@
+"""
+Learning-curve plots, and a CLI that rebuilds them from a streamed metrics file.
+
+Usage::
+
+    python -m rl.plot_metrics taxi-v3-tabular-agent-metrics.csv --max_points 5000
+
+Runs with more episodes than ``--max_points`` are decimated by averaging
+consecutive blocks of episodes, so plotting a million-episode run needs only a
+few thousand points. Block means of at least `MIN_BLOCK_FOR_RAW` episodes are
+plotted as they are; shorter blocks still go through the Savitzky-Golay filter.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+if __package__ is None or __package__ == "":
+    package_root = Path(__file__).resolve().parents[1]
+    if str(package_root) not in sys.path:
+        sys.path.insert(0, str(package_root))
+
+import matplotlib.pyplot as plt
+import numpy as np
+from scipy.signal import savgol_filter
+
+from rl.metrics import load_metrics
+
+
+MIN_BLOCK_FOR_RAW = 50
+
+
+def _safe_savgol(values: np.ndarray) -> np.ndarray:
+    if values.size <= 10:
+        return values
+    max_window = 501 if values.size > 600 else 101
+    window = min(values.size, max_window)
+    if window % 2 == 0:
+        window -= 1
+    if window < 3:
+        return values
+    polyorder = min(3, window - 1)
+    return savgol_filter(values, window_length=window, polyorder=polyorder)
+
+
+def decimate(values: np.ndarray, max_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Block means of `values` with at most `max_points` blocks; returns (block centers, means)."""
+    n = values.size
+    if n <= max_points:
+        return np.arange(n, dtype=np.float64), values
+    block = int(np.ceil(n / max_points))
+    starts = np.arange(0, n, block)
+    counts = np.diff(np.append(starts, n))
+    means = np.add.reduceat(values.astype(np.float64), starts) / counts
+    return starts + (counts - 1) / 2.0, means
+
+
+def plot_learning_curves(base_name: str,
+                         env_name: str,
+                         agent_label: str,
+                         rewards: np.ndarray,
+                         epsilons: np.ndarray,
+                         show: bool,
+                         episodes: Optional[np.ndarray] = None,
+                         smooth: bool = True) -> None:
+    """
+    Plots one run, or the mean and 95% CI over seeds when `rewards` is (seeds × episodes).
+    `episodes` is the x coordinate of each point (default: 0, 1, 2, ...); `smooth=False`
+    plots single-run rewards without the Savitzky-Golay filter (e.g. block means).
+    """
+    reward_band = None
+    if rewards.ndim == 2:
+        per_seed = np.stack([_safe_savgol(r) for r in rewards])
+        smooth_rewards = per_seed.mean(axis=0)
+        half_width = 1.96 * per_seed.std(axis=0, ddof=1) / np.sqrt(len(per_seed)) if len(per_seed) > 1 else 0.0
+        reward_band = (smooth_rewards - half_width, smooth_rewards + half_width)
+        epsilons = epsilons.mean(axis=0)
+        reward_label = f"Smoothed reward (mean of {len(per_seed)} seeds, 95% CI)"
+    elif smooth:
+        smooth_rewards = _safe_savgol(rewards)
+        reward_label = "Smoothed reward"
+    else:
+        smooth_rewards = rewards
+        reward_label = "Mean reward per block of episodes"
+    if episodes is None:
+        episodes = np.arange(smooth_rewards.size)
+    epsilon_episodes = episodes[:epsilons.size]
+
+    plt.figure(figsize=(10, 4))
+    plt.plot(episodes, smooth_rewards, label=reward_label)
+    if reward_band is not None:
+        plt.fill_between(episodes, *reward_band, alpha=0.3)
+    plt.title(f"Learning Curve ({env_name}, {agent_label})")
+    plt.xlabel("Episode")
+    plt.ylabel("Total Reward")
+    plt.grid(True)
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig(f"{base_name}-learning_curve.png")
+    if show:
+        plt.show()
+    plt.close()
+
+    plt.figure(figsize=(10, 4))
+    plt.plot(epsilon_episodes, epsilons, color="orange")
+    plt.title(f"Epsilon Decay ({env_name}, {agent_label})")
+    plt.xlabel("Episode")
+    plt.ylabel("ε")
+    plt.grid(True)
+    plt.tight_layout()
+    plt.savefig(f"{base_name}-epsilons.png")
+    if show:
+        plt.show()
+    plt.close()
+
+    fig, ax = plt.subplots(1, 2, figsize=(10, 4))
+    ax[0].plot(episodes, smooth_rewards)
+    if reward_band is not None:
+        ax[0].fill_between(episodes, *reward_band, alpha=0.3)
+    ax[0].set_title("Learning Curve")
+    ax[0].set_xlabel("Episode")
+    ax[0].set_ylabel("Reward")
+    ax[0].grid(True)
+
+    ax[1].plot(epsilon_episodes, epsilons, color="orange")
+    ax[1].set_title("Epsilon Decay")
+    ax[1].set_xlabel("Episode")
+    ax[1].set_ylabel("ε")
+    ax[1].grid(True)
+
+    plt.tight_layout()
+    plt.savefig(f"{base_name}-summary.png")
+    if show:
+        plt.show()
+    plt.close()
+
+
+def plot_metrics_file(path, base_name: Optional[str] = None, env_name: str = "",
+                      agent_label: str = "", max_points: int = 5000, show: bool = False) -> int:
+    """Rebuilds the learning-curve PNGs from a metrics file; returns the number of episodes."""
+    metrics = load_metrics(path)
+    if metrics["reward"].size == 0:
+        raise ValueError(f"No episodes recorded in {path}")
+    if base_name is None:
+        base_name = str(path).rsplit(".", 1)[0].removesuffix("-metrics")
+    rewards = metrics["reward"]
+    epsilons = metrics.get("epsilon", np.zeros(0))
+    offset = metrics["episode"][0] if "episode" in metrics else 0.0
+
+    num_episodes = rewards.size
+    episodes, rewards = decimate(rewards, max_points)
+    if epsilons.size:
+        _, epsilons = decimate(epsilons, max_points)
+    block = num_episodes / rewards.size
+    plot_learning_curves(base_name, env_name, agent_label, rewards, epsilons, show, episodes + offset,
+                         smooth=block < MIN_BLOCK_FOR_RAW)
+    return int(metrics["reward"].size)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Rebuild learning-curve plots from a streamed metrics file")
+    parser.add_argument("metrics_file", type=str, help="CSV written by ql_train --metrics_file")
+    parser.add_argument("--base_name", type=str, default=None,
+                        help="Prefix of the PNG files (default: metrics file name without '-metrics.csv')")
+    parser.add_argument("--env_name", type=str, default="", help="Environment name shown in the titles")
+    parser.add_argument("--agent_label", type=str, default="", help="Agent label shown in the titles")
+    parser.add_argument("--max_points", type=int, default=5000,
+                        help="Average blocks of episodes so at most this many points are plotted")
+    parser.add_argument("--plot", action="store_true", help="Show the plots interactively")
+    args = parser.parse_args(argv)
+
+    if args.max_points < 1:
+        raise ValueError("max_points must be positive")
+    num_episodes = plot_metrics_file(args.metrics_file, args.base_name, args.env_name, args.agent_label,
+                                     args.max_points, args.plot)
+    print(f"Plotted {num_episodes} episodes from {args.metrics_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
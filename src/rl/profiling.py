@@ -0,0 +1,155 @@
+"""
+Low-overhead per-phase timers for the Q-learning train loops.
+
+The loops call `begin_step` once per environment step; on average only one
+step in `sample_every` is timed, so the clock is read a handful of times every
+N steps and the overhead stays in the noise. The gaps between timed steps are
+jittered, so phases that only run every k steps (e.g. ``update_from_replay``)
+are not over- or under-sampled. Phase times are extrapolated from the timed
+steps (``time * steps / timed_steps``). Episode-level phases (e.g.
+``env.reset``) are sampled the same way with `begin_episode`::
+
+    timed = profiler.begin_step()
+    if timed: t0 = perf_counter()
+    action = agent.choose_action(state)
+    if timed: t0 = profiler.lap("choose_action", t0)
+    ...
+"""
+
+import random
+from collections import defaultdict
+from time import perf_counter
+from typing import Dict, Optional
+
+
+class PhaseProfiler:
+    """Sampled per-phase timers and counters. Disabled profilers never read the clock."""
+
+    def __init__(self, enabled: bool = False, sample_every: int = 16):
+        if sample_every < 1:
+            raise ValueError("sample_every must be positive")
+        self.enabled = enabled
+        self.sample_every = sample_every
+        self.reset()
+        self.lap_overhead = self._calibrate() if enabled else 0.0
+
+    def reset(self) -> None:
+        self.steps = 0
+        self.timed_steps = 0
+        self.episodes = 0
+        self.timed_episodes = 0
+        self.step_times: Dict[str, float] = defaultdict(float)
+        self.step_calls: Dict[str, int] = defaultdict(int)
+        self.episode_times: Dict[str, float] = defaultdict(float)
+        self.episode_calls: Dict[str, int] = defaultdict(int)
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.wall_time = 0.0
+        self._started_at: Optional[float] = None
+        # Gerador próprio: não consome os fluxos aleatórios do treino
+        self._rng = random.Random(0)
+        self._next_timed_step = self._next_gap() if self.enabled else float("inf")
+        self._next_timed_episode = self._next_gap() if self.enabled else float("inf")
+
+    def _calibrate(self, rounds: int = 2000) -> float:
+        """Seconds that an empty phase measures (clock reads + bookkeeping), subtracted per call."""
+        t0 = perf_counter()
+        for _ in range(rounds):
+            t0 = self.lap("_calibration", t0)
+        overhead = self.step_times.pop("_calibration") / rounds
+        self.step_calls.pop("_calibration")
+        return overhead
+
+    def _next_gap(self) -> int:
+        return self._rng.randint(1, 2 * self.sample_every - 1)
+
+    # =========================================================
+    # Coleta
+    # =========================================================
+    def start(self) -> None:
+        if self.enabled:
+            self._started_at = perf_counter()
+
+    def stop(self) -> None:
+        if self.enabled and self._started_at is not None:
+            self.wall_time += perf_counter() - self._started_at
+            self._started_at = None
+
+    def begin_step(self) -> bool:
+        """Counts one step; True when this step should be timed."""
+        self.steps += 1
+        if self.steps < self._next_timed_step:
+            return False
+        self._next_timed_step = self.steps + self._next_gap()
+        self.timed_steps += 1
+        return True
+
+    def begin_episode(self) -> bool:
+        """Counts one episode; True when its episode-level phases should be timed."""
+        self.episodes += 1
+        if self.episodes < self._next_timed_episode:
+            return False
+        self._next_timed_episode = self.episodes + self._next_gap()
+        self.timed_episodes += 1
+        return True
+
+    def lap(self, phase: str, t0: float) -> float:
+        """Adds the time since `t0` to a step phase and returns the start time of the next one."""
+        self.step_times[phase] += perf_counter() - t0
+        self.step_calls[phase] += 1
+        return perf_counter()  # a contabilização acima não entra na próxima fase
+
+    def lap_episode(self, phase: str, t0: float) -> float:
+        self.episode_times[phase] += perf_counter() - t0
+        self.episode_calls[phase] += 1
+        return perf_counter()
+
+    def count(self, name: str, n: int = 1) -> None:
+        if self.enabled:
+            self.counters[name] += n
+
+    # =========================================================
+    # Relatório
+    # =========================================================
+    def summary(self) -> Dict[str, object]:
+        """Estimated total time, share of wall time and cost per call of every phase."""
+        phases = {}
+        for times, calls, total, timed in (
+            (self.episode_times, self.episode_calls, self.episodes, self.timed_episodes),
+            (self.step_times, self.step_calls, self.steps, self.timed_steps),
+        ):
+            scale = total / timed if timed else 0.0
+            for phase, seconds in times.items():
+                seconds = max(0.0, seconds - calls[phase] * self.lap_overhead)
+                estimated = seconds * scale
+                phases[phase] = {
+                    "seconds": estimated,
+                    "share": estimated / self.wall_time if self.wall_time > 0 else 0.0,
+                    "calls": int(round(calls[phase] * scale)),
+                    "us_per_call": 1e6 * seconds / calls[phase] if calls[phase] else 0.0,
+                }
+        accounted = sum(p["seconds"] for p in phases.values())
+        return {
+            "wall_time": self.wall_time,
+            "steps": self.steps,
+            "episodes": self.episodes,
+            "sample_every": self.sample_every,
+            "steps_per_sec": self.steps / self.wall_time if self.wall_time > 0 else 0.0,
+            "other_seconds": max(0.0, self.wall_time - accounted),
+            "phases": phases,
+            "counters": dict(self.counters),
+        }
+
+    def format_table(self) -> str:
+        summary = self.summary()
+        lines = [f"{'phase':<20} {'seconds':>9} {'share':>7} {'calls':>11} {'us/call':>9}"]
+        for phase, stats in sorted(summary["phases"].items(), key=lambda item: -item[1]["seconds"]):
+            lines.append(f"{phase:<20} {stats['seconds']:>9.3f} {stats['share']:>7.1%} "
+                         f"{stats['calls']:>11d} {stats['us_per_call']:>9.2f}")
+        other_share = summary["other_seconds"] / summary["wall_time"] if summary["wall_time"] > 0 else 0.0
+        lines.append(f"{'(other)':<20} {summary['other_seconds']:>9.3f} {other_share:>7.1%}")
+        lines.append(f"{summary['steps']} steps, {summary['episodes']} episodes in "
+                     f"{summary['wall_time']:.2f}s ({summary['steps_per_sec']:.0f} steps/s, "
+                     f"~1 in {summary['sample_every']} steps timed)")
+        for name, value in sorted(summary["counters"].items()):
+            lines.append(f"{name}: {value}")
+        return "\n".join(lines)
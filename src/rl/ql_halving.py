@@ -0,0 +1,234 @@
+"""
+Successive-halving search over `rl.ql_train` configs.
+
+Every config of a sweep spec (same JSON format as `rl.ql_sweep`) is first
+trained for a small budget of episodes; only the best ``1/eta`` by smoothed
+reward are trained further, with the budget multiplied by ``eta`` at each rung,
+until the survivors reach the full ``num_episodes``. Trials are never restarted:
+each one continues from its own agent (ε schedule and RNG streams included),
+kept in memory with ``--workers 1`` or pickled under ``out_dir/trials`` when
+rungs run on a process pool. Re-running the same command reuses those files.
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import os
+import pickle
+import random
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+if __package__ is None or __package__ == "":
+    package_root = Path(__file__).resolve().parents[1]
+    if str(package_root) not in sys.path:
+        sys.path.insert(0, str(package_root))
+
+import numpy as np
+from timeit import default_timer as timer
+
+from rl import ql_train
+from rl.parallel import process_pool
+from rl.ql_sweep import config_to_argv, expand_spec, trial_id, validate_configs
+
+
+# ============================================================
+# Estado de um trial
+# ============================================================
+def new_trial(config: Dict) -> Dict:
+    args = ql_train._prepare_parser().parse_args(config_to_argv(config))
+    args.quiet = True
+    agent, _ = ql_train.build_from_args(args)
+    return {
+        "trial_id": trial_id(config),
+        "config": config,
+        "args": args,
+        "agent": agent,
+        "rewards": [],
+        "steps": [],
+        "wall_time": 0.0,
+        # cada trial tem seu próprio fluxo aleatório, independente da ordem de execução
+        "rng_state": (np.random.get_state(), random.getstate()),
+    }
+
+
+def advance_trial(trial: Dict, budget: int, max_budget: int) -> Dict:
+    """Trains `trial` until it has seen `budget` episodes in total."""
+    remaining = budget - len(trial["rewards"])
+    if remaining <= 0:
+        return trial
+    args = trial["args"]
+    args.num_episodes = remaining
+    args.schedule_episodes = max_budget
+    agent_spec = ql_train.AGENT_REGISTRY[args.agent]
+
+    np_state, py_state = trial["rng_state"]
+    np.random.set_state(np_state)
+    random.setstate(py_state)
+    start = timer()
+    metrics = agent_spec.train_agent(trial["agent"], args)
+    trial["wall_time"] += timer() - start
+    trial["rng_state"] = (np.random.get_state(), random.getstate())
+
+    # O agente tabular devolve o histórico acumulado; os demais, só o desta chamada.
+    trial["rewards"].extend(list(metrics.get("rewards", []))[-remaining:])
+    trial["steps"].extend(list(metrics.get("steps", []))[-remaining:])
+    return trial
+
+
+def smoothed_score(rewards: List[float], window: int) -> float:
+    if not rewards:
+        return float("-inf")
+    return float(np.mean(rewards[-window:]))
+
+
+def _summary(trial: Dict, window: int) -> Dict:
+    return {
+        "trial_id": trial["trial_id"],
+        "config": trial["config"],
+        "episodes": len(trial["rewards"]),
+        "score": smoothed_score(trial["rewards"], window),
+        "wall_time": trial["wall_time"],
+        "total_steps": int(np.sum(trial["steps"])),
+    }
+
+
+# ============================================================
+# Estado em disco (execução com pool de processos)
+# ============================================================
+def _trial_path(state_dir: str, config: Dict) -> Path:
+    return Path(state_dir) / f"{trial_id(config)}.pkl"
+
+
+def load_trial(path: Path) -> Dict:
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def save_trial(trial: Dict, path: Path) -> None:
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        pickle.dump(trial, f)
+    os.replace(tmp_path, path)
+
+
+def advance_on_disk(config: Dict, budget: int, max_budget: int, state_dir: str, window: int) -> Dict:
+    path = _trial_path(state_dir, config)
+    log_path = path.with_suffix(".log")
+    with open(log_path, "a") as log, contextlib.redirect_stdout(log):
+        trial = load_trial(path) if path.exists() else new_trial(config)
+        advance_trial(trial, budget, max_budget)
+    save_trial(trial, path)
+    return _summary(trial, window)
+
+
+# ============================================================
+# Successive halving
+# ============================================================
+def rung_budgets(min_budget: int, max_budget: int, eta: int) -> List[int]:
+    budgets = []
+    budget = min_budget
+    while budget < max_budget:
+        budgets.append(budget)
+        budget *= eta
+    budgets.append(max_budget)
+    return budgets
+
+
+def _max_budget(configs: List[Dict]) -> int:
+    default = ql_train._prepare_parser().get_default("num_episodes")
+    budgets = {c.get("num_episodes", default) for c in configs}
+    if len(budgets) != 1:
+        raise ValueError("All configs must share num_episodes (the full budget)")
+    return budgets.pop()
+
+
+def successive_halving(configs: List[Dict], out_dir: str, eta: int = 3,
+                       min_budget: Optional[int] = None, workers: int = 1,
+                       threads_per_worker: int = 1, window: int = 100) -> Dict:
+    if eta < 2:
+        raise ValueError("eta must be at least 2")
+    out = Path(out_dir)
+    state_dir = out / "trials"
+    state_dir.mkdir(parents=True, exist_ok=True)
+
+    max_budget = _max_budget(configs)
+    min_budget = min_budget or max(1, max_budget // 10)
+    budgets = rung_budgets(min(min_budget, max_budget), max_budget, eta)
+    print(f"{len(configs)} configs, rungs at {budgets} episodes (eta={eta}, {workers} workers)")
+
+    survivors = list(configs)
+    in_memory: Dict[str, Dict] = {}
+    with open(out / "halving.jsonl", "a") as log:
+        for rung, budget in enumerate(budgets):
+            if workers > 1:
+                torch_threads = any(c.get("agent") == "neural" for c in survivors)
+                with process_pool(workers, threads_per_worker, torch_threads=torch_threads) as pool:
+                    futures = [pool.submit(advance_on_disk, c, budget, max_budget, str(state_dir), window)
+                               for c in survivors]
+                    summaries = [f.result() for f in futures]
+            else:
+                summaries = []
+                for config in survivors:
+                    tid = trial_id(config)
+                    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                        if tid not in in_memory:
+                            in_memory[tid] = new_trial(config)
+                        advance_trial(in_memory[tid], budget, max_budget)
+                    summaries.append(_summary(in_memory[tid], window))
+
+            summaries.sort(key=lambda r: r["score"], reverse=True)
+            is_last = rung == len(budgets) - 1
+            keep = len(summaries) if is_last else max(1, math.ceil(len(summaries) / eta))
+            for rank, summary in enumerate(summaries):
+                record = {"rung": rung, "budget": budget, "rank": rank, "promoted": rank < keep, **summary}
+                log.write(json.dumps(record, default=str) + "\n")
+            log.flush()
+            print(f"Rung {rung} ({budget} episodes): best {summaries[0]['score']:.2f}, "
+                  f"keeping {keep}/{len(summaries)}")
+
+            survivors = [r["config"] for r in summaries[:keep]]
+
+    best = summaries[0]
+    tid = best["trial_id"]
+    trial = in_memory[tid] if tid in in_memory else load_trial(state_dir / f"{tid}.pkl")
+    agent_spec = ql_train.AGENT_REGISTRY[trial["args"].agent]
+    model_path = out / agent_spec.filename_fn(f"{trial['args'].model_base_name}-best")
+    trial["agent"].save(str(model_path))
+    best["model_path"] = str(model_path)
+    return best
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Successive-halving search for ql_train configs")
+    parser.add_argument("--spec", type=str, required=True, help="JSON sweep spec (see rl.ql_sweep)")
+    parser.add_argument("--out_dir", type=str, default="halving", help="Directory for trial states and logs")
+    parser.add_argument("--eta", type=int, default=3, help="Keep the top 1/eta configs at each rung")
+    parser.add_argument("--min_budget", type=int, default=None,
+                        help="Episodes in the first rung (default: 10%% of num_episodes)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes (1 keeps every agent in memory)")
+    parser.add_argument("--threads_per_worker", type=int, default=1, help="torch/BLAS threads per worker")
+    parser.add_argument("--score_window", type=int, default=100,
+                        help="Episodes averaged for the smoothed reward used to rank configs")
+    args = parser.parse_args(argv)
+
+    if args.workers <= 0 or args.threads_per_worker <= 0:
+        raise ValueError("workers and threads_per_worker must be positive")
+
+    with open(args.spec) as f:
+        configs = expand_spec(json.load(f))
+    validate_configs(configs)
+
+    best = successive_halving(configs, args.out_dir, args.eta, args.min_budget, args.workers,
+                              args.threads_per_worker, args.score_window)
+    print(f"\nBest config ({best['score']:.2f} over the last {args.score_window} episodes):")
+    print(f"  {json.dumps(best['config'], sort_keys=True)}")
+    print(f"Saved agent to {best['model_path']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
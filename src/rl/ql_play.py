@@ -1,8 +1,11 @@
 import argparse
+import json
+import math
 import sys
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Callable, Dict, Optional, Tuple
+from timeit import default_timer as timer
+from typing import Callable, Dict, List, Optional, Tuple
 
 if __package__ is None or __package__ == "":
     package_root = Path(__file__).resolve().parents[1]
@@ -10,12 +13,18 @@ if __package__ is None or __package__ == "":
         sys.path.insert(0, str(package_root))
 
 import gymnasium as gym
+import numpy as np
 
 from rl.environment_blackjack import BlackjackEnvironment
+from rl.environment_box import BoxSpaceEnvironment
+from rl.environment_discrete import DiscreteSpaceEnvironment
 from rl.environment_taxi import TaxiEnvironment
+from rl.fast_envs import VectorTaxi
 from rl.qlt import QLearningAgentTabular
 from rl.qll import QLearningAgentLinear
-from rl.qln import QLearningAgentNeural
+from rl.tile_coding import QLearningAgentTileCoding
+from rl.model_io import is_npz_file, load_policy
+from rl.parallel import process_pool
 
 
 EnvironmentWrapper = Callable[[gym.Env], object]
@@ -25,6 +34,12 @@ ActionSelector = Callable[[object, object, object], int]
 ENVIRONMENT_WRAPPERS: Dict[str, EnvironmentWrapper] = {
     "Taxi-v3": TaxiEnvironment,
     "Blackjack-v1": BlackjackEnvironment,
+    "FrozenLake-v1": DiscreteSpaceEnvironment,
+    "CliffWalking-v0": DiscreteSpaceEnvironment,
+    "MountainCar-v0": BoxSpaceEnvironment,
+    "CartPole-v1": BoxSpaceEnvironment,
+    "Acrobot-v1": BoxSpaceEnvironment,
+    "LunarLander-v3": BoxSpaceEnvironment,
 }
 
 
@@ -39,17 +54,31 @@ class AgentPlaySpec:
 
 
 def _tabular_default_model(env_name: str) -> str:
-    return f"{env_name.lower()}-tabular-agent.pkl"
+    return f"{env_name.lower()}-tabular-agent.npz"
 
 
 def _linear_default_model(env_name: str) -> str:
-    return f"{env_name.lower()}-linear-agent.pkl"
+    return f"{env_name.lower()}-linear-agent.npz"
 
 
 def _neural_default_model(env_name: str) -> str:
     return f"{env_name.lower()}-neural-agent.pkl"
 
 
+def _tilecoding_default_model(env_name: str) -> str:
+    return f"{env_name.lower()}-tilecoding-agent.npz"
+
+
+def _table_default_model(env_name: str) -> str:
+    return f"{env_name.lower()}-policy-table.npz"
+
+
+def _load_neural_agent(path: str, env) -> object:
+    # torch só é importado quando um agente neural é de fato carregado
+    from rl.qln import QLearningAgentNeural
+    return QLearningAgentNeural.load_agent(path, env)
+
+
 def _select_action_tabular(agent: QLearningAgentTabular, env, state) -> int:
     state_id = env.get_state_id(state)
     return agent.choose_action(state_id, is_in_exploration_mode=False)
@@ -79,11 +108,28 @@ AGENT_REGISTRY: Dict[str, AgentPlaySpec] = {
     "neural": AgentPlaySpec(
         label="Neural",
         default_model_path=_neural_default_model,
-        load_agent=lambda path, env, **_: QLearningAgentNeural.load_agent(path, env),
+        load_agent=lambda path, env, **_: _load_neural_agent(path, env),
         requires_env_for_load=True,
         set_env_after_load=False,
         select_action=_select_action_policy,
     ),
+    "tilecoding": AgentPlaySpec(
+        label="Tile coding",
+        default_model_path=_tilecoding_default_model,
+        load_agent=lambda path, **_: QLearningAgentTileCoding.load_agent(path),
+        requires_env_for_load=False,
+        set_env_after_load=True,
+        select_action=_select_action_policy,
+    ),
+    # Tabela de ações gulosas exportada por rl.export_policy (sempre .npz)
+    "table": AgentPlaySpec(
+        label="Policy table",
+        default_model_path=_table_default_model,
+        load_agent=lambda path, **_: load_policy(path),
+        requires_env_for_load=False,
+        set_env_after_load=False,
+        select_action=_select_action_tabular,
+    ),
 }
 
 
@@ -102,7 +148,18 @@ def _resolve_render_mode(request_human: bool, env_name: str) -> Tuple[str, gym.E
     raise RuntimeError(f"Unable to create environment {env_name} with render modes human/ansi")
 
 
+def _resolve_model_path(spec: AgentPlaySpec, env_name: str) -> Path:
+    model_path = Path(spec.default_model_path(env_name))
+    legacy_path = model_path.with_suffix(".pkl")
+    if not model_path.exists() and legacy_path.exists():
+        return legacy_path  # modelos antigos, salvos como pickle
+    return model_path
+
+
 def _load_agent(spec: AgentPlaySpec, model_path: Path, wrapped_env) -> object:
+    if is_npz_file(model_path):
+        # Formato compacto: só a tabela/pesos, sem reconstruir o agente de treino
+        return load_policy(model_path, wrapped_env)
     if spec.requires_env_for_load:
         agent = spec.load_agent(str(model_path), env=wrapped_env)
     else:
@@ -112,18 +169,137 @@ def _load_agent(spec: AgentPlaySpec, model_path: Path, wrapped_env) -> object:
     return agent
 
 
+# ============================================================
+# Avaliação em lote (sem renderização)
+# ============================================================
+_EVAL_WORKER: Dict[str, object] = {}
+
+
+def _init_eval_worker(agent_name: str, env_name: str, model_path: str) -> None:
+    """Builds the headless environment and loads the agent once per worker process."""
+    base_env = gym.make(env_name)
+    if hasattr(base_env, "env"):
+        base_env = base_env.env
+    wrapped_env = ENVIRONMENT_WRAPPERS[env_name](base_env)
+    spec = AGENT_REGISTRY[agent_name]
+    _EVAL_WORKER.update(spec=spec, env=wrapped_env, agent=_load_agent(spec, Path(model_path), wrapped_env))
+
+
+def _evaluate_episodes(episode_seeds: List[int], max_steps: int) -> List[Tuple[float, int, bool]]:
+    """Runs greedy episodes (one reset seed each) and returns (return, length, success) tuples."""
+    spec, env, agent = _EVAL_WORKER["spec"], _EVAL_WORKER["env"], _EVAL_WORKER["agent"]
+    results = []
+    for seed in episode_seeds:
+        state, _ = env.env.reset(seed=seed)
+        terminated = truncated = False
+        episode_reward, steps, reward = 0.0, 0, 0.0
+        while not (terminated or truncated) and steps < max_steps:
+            action = spec.select_action(agent, env, state)
+            state, reward, terminated, truncated, _ = env.step(action)
+            episode_reward += reward
+            steps += 1
+        results.append((float(episode_reward), steps, bool(env.is_success(reward, terminated))))
+    return results
+
+
+def _evaluate_fast(num_episodes: int, max_steps: int, seed: int) -> List[Tuple[float, int, bool]]:
+    """Same as `_evaluate_episodes`, with all episodes stepped together by `VectorTaxi`."""
+    spec, env, agent = _EVAL_WORKER["spec"], _EVAL_WORKER["env"], _EVAL_WORKER["agent"]
+    vec_env = VectorTaxi(env.env, num_episodes, max_episode_steps=max_steps)
+    states, _ = vec_env.reset(seed=seed)  # sub-ambiente i usa a semente seed + i
+    q_table = getattr(agent, "q_table", None)
+    action_table = getattr(agent, "actions", None)
+    returns = np.zeros(num_episodes)
+    lengths = np.zeros(num_episodes, dtype=np.int64)
+    successes = np.zeros(num_episodes, dtype=bool)
+    active = np.ones(num_episodes, dtype=bool)
+    actions = np.zeros(num_episodes, dtype=np.int64)
+    while active.any():
+        if action_table is not None:
+            actions[active] = action_table[states[active]]
+        elif q_table is not None:
+            actions[active] = np.argmax(np.asarray(q_table)[states[active]], axis=1)
+        else:
+            actions[active] = [spec.select_action(agent, env, int(s)) for s in states[active]]
+        states, rewards, terminated, truncated, _ = vec_env.step(actions)
+        returns[active] += rewards[active]
+        lengths[active] += 1
+        successes |= active & env.is_success(rewards, terminated)
+        active &= ~(terminated | truncated)
+    return [(float(r), int(n), bool(ok)) for r, n, ok in zip(returns, lengths, successes)]
+
+
+def evaluate(agent_name: str, env_name: str, model_path: Path, num_episodes: int,
+             max_steps: int, workers: int = 1, seed: int = 42, env_backend: str = "gym") -> Dict[str, object]:
+    """
+    Evaluates the greedy policy over `num_episodes` episodes spread over `workers`
+    processes. Episode i is reset with seed `seed + i`, so the result does not
+    depend on the number of workers. With ``env_backend="fast"`` every episode
+    runs in a single `VectorTaxi` batch in this process, with identical results.
+    """
+    seeds = [seed + i for i in range(num_episodes)]
+    init_args = (agent_name, env_name, str(model_path))
+    start = timer()
+    if env_backend == "fast":
+        _init_eval_worker(*init_args)
+        results = _evaluate_fast(num_episodes, max_steps, seed)
+    elif workers > 1:
+        chunk = max(1, math.ceil(num_episodes / (workers * 4)))
+        chunks = [seeds[i:i + chunk] for i in range(0, num_episodes, chunk)]
+        # Só agentes neurais carregam torch; tabelas e modelos NumPy mantêm os workers sem torch
+        with process_pool(workers, initializer=_init_eval_worker, initargs=init_args,
+                          torch_threads=agent_name == "neural") as pool:
+            results = [r for part in pool.map(_evaluate_episodes, chunks, [max_steps] * len(chunks))
+                       for r in part]
+    else:
+        _init_eval_worker(*init_args)
+        results = _evaluate_episodes(seeds, max_steps)
+    wall_time = timer() - start
+
+    returns = np.array([r[0] for r in results])
+    lengths = np.array([r[1] for r in results])
+    successes = np.array([r[2] for r in results])
+    percentiles = (5, 25, 50, 75, 95)
+    return {
+        "agent": agent_name,
+        "env_name": env_name,
+        "model_path": str(model_path),
+        "episodes": num_episodes,
+        "max_steps": max_steps,
+        "seed": seed,
+        "workers": workers,
+        "env_backend": env_backend,
+        "mean_return": float(returns.mean()),
+        "std_return": float(returns.std()),
+        "success_rate": float(successes.mean()),
+        "mean_length": float(lengths.mean()),
+        "length_percentiles": {f"p{p}": float(v) for p, v in zip(percentiles, np.percentile(lengths, percentiles))},
+        "episodes_per_sec": num_episodes / wall_time if wall_time > 0 else float("nan"),
+        "wall_time": wall_time,
+    }
+
+
 def main(argv: Optional[list] = None) -> int:
     parser = argparse.ArgumentParser(description="Run a trained Q-Learning agent")
     parser.add_argument("--agent", choices=AGENT_REGISTRY.keys(), default="tabular",
-                        help="Agent variant to load (tabular, linear, neural)")
+                        help="Agent variant to load (tabular, linear, neural, tilecoding, or a "
+                             "policy table from rl.export_policy)")
     parser.add_argument("--env_name", type=str, default="Taxi-v3", help="Environment name")
     parser.add_argument("--num_episodes", type=int, default=5, help="Episodes to play")
     parser.add_argument("--max_steps", type=int, default=500, help="Maximum steps per episode")
     parser.add_argument("--render", action="store_true",
                         help="Render the environment (if supported)")
     parser.add_argument("--model_path", type=str, default=None,
-                        help="Custom path to the trained agent (.pkl)")
+                        help="Custom path to the trained agent (.npz or .pkl)")
     parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--eval", type=int, default=0, metavar="N",
+                        help="Headless batch evaluation over N greedy episodes (no rendering)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes used with --eval")
+    parser.add_argument("--env_backend", choices=["gym", "fast"], default="gym",
+                        help="Simulator for --eval: gymnasium, or the pure-NumPy rl.fast_envs batch (Taxi-v3 only); "
+                             "both stop episodes at --max_steps")
+    parser.add_argument("--eval_output", type=str, default=None,
+                        help="JSON summary path for --eval (default: <model>-eval.json)")
     args = parser.parse_args(argv)
 
     if args.num_episodes <= 0:
@@ -135,12 +311,36 @@ def main(argv: Optional[list] = None) -> int:
         raise ValueError(f"Unsupported environment: {args.env_name}. "
                          f"Choose from {list(ENVIRONMENT_WRAPPERS.keys())}")
 
+    if args.env_backend == "fast" and not args.eval:
+        raise ValueError("--env_backend fast only applies to --eval")
+
     spec = AGENT_REGISTRY[args.agent]
 
-    model_path = Path(args.model_path) if args.model_path else Path(spec.default_model_path(args.env_name))
+    model_path = Path(args.model_path) if args.model_path else _resolve_model_path(spec, args.env_name)
     if not model_path.exists():
         raise FileNotFoundError(f"Trained agent not found at {model_path}")
 
+    if args.eval:
+        if args.eval < 0 or args.workers <= 0:
+            raise ValueError("eval and workers must be positive")
+        if args.env_backend == "fast" and args.env_name != "Taxi-v3":
+            raise ValueError("--env_backend fast is only supported on Taxi-v3")
+        summary = evaluate(args.agent, args.env_name, model_path, args.eval, args.max_steps,
+                           args.workers, args.seed, args.env_backend)
+        output = Path(args.eval_output) if args.eval_output else model_path.with_name(f"{model_path.stem}-eval.json")
+        output.write_text(json.dumps(summary, indent=2))
+
+        pct = summary["length_percentiles"]
+        print(f"\n******** Evaluation ({spec.label}, {args.env_name}) ********")
+        print(f"Episodes: {summary['episodes']} on {summary['workers']} workers "
+              f"({summary['episodes_per_sec']:.1f} episodes/s)")
+        print(f"Return: {summary['mean_return']:.2f} ± {summary['std_return']:.2f}")
+        print(f"Success rate: {summary['success_rate']:.1%}")
+        print(f"Episode length p5/p50/p95: {pct['p5']:.0f}/{pct['p50']:.0f}/{pct['p95']:.0f}")
+        print(f"Summary written to {output}")
+        print("*************************\n")
+        return 0
+
     render_mode, base_env = _resolve_render_mode(args.render, args.env_name)
     base_env.reset(seed=args.seed)
     wrapper_cls = ENVIRONMENT_WRAPPERS[args.env_name]
@@ -0,0 +1,247 @@
+"""
+Parallel hyperparameter sweeps for `rl.ql_train`.
+
+A sweep is described by a JSON spec::
+
+    {
+      "agent": "tabular",
+      "env_name": "Taxi-v3",
+      "base": {"num_episodes": 2000, "seed": 42},
+      "grid": {"learning_rate": [0.1, 0.5, 0.9], "gamma": [0.6, 0.9, 0.99]}
+    }
+
+or, for random search, ``"random": {"num_trials": 20, "params": {...}}`` where
+each parameter is either a list of choices or ``{"low": a, "high": b,
+"log": true, "type": "int"}``. Keys are `ql_train` flag names without ``--``.
+
+Each trial runs in its own worker process; results are appended to
+``results.jsonl`` as soon as a trial finishes (and mirrored to ``results.csv``),
+so re-running the same command skips trials that already completed.
+"""
+
+import argparse
+import contextlib
+import csv
+import hashlib
+import itertools
+import json
+import os
+import sys
+import traceback
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, List, Optional
+
+if __package__ is None or __package__ == "":
+    package_root = Path(__file__).resolve().parents[1]
+    if str(package_root) not in sys.path:
+        sys.path.insert(0, str(package_root))
+
+import numpy as np
+from timeit import default_timer as timer
+
+from rl import ql_train
+from rl.parallel import process_pool
+
+
+RESULT_FIELDS = ["trial_id", "status", "final_mean_reward", "steps_per_sec", "wall_time",
+                 "total_steps", "num_episodes", "config", "error"]
+
+
+# ============================================================
+# Espaço de busca
+# ============================================================
+def _sample_param(rng: np.random.Generator, param_spec):
+    if isinstance(param_spec, list):
+        return param_spec[rng.integers(len(param_spec))]
+    low, high = param_spec["low"], param_spec["high"]
+    if param_spec.get("log", False):
+        value = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+    else:
+        value = float(rng.uniform(low, high))
+    if param_spec.get("type") == "int":
+        return int(round(value))
+    return value
+
+
+def expand_spec(spec: Dict) -> List[Dict]:
+    """Expands a sweep spec into the full list of trial configs (ql_train flag -> value)."""
+    base = dict(spec.get("base", {}))
+    for key in ("agent", "env_name"):
+        if key in spec:
+            base[key] = spec[key]
+
+    if "grid" in spec and "random" in spec:
+        raise ValueError("Sweep spec must define either 'grid' or 'random', not both")
+    if "grid" in spec:
+        keys = sorted(spec["grid"])
+        combos = itertools.product(*(spec["grid"][k] for k in keys))
+        return [{**base, **dict(zip(keys, values))} for values in combos]
+    if "random" in spec:
+        random_spec = spec["random"]
+        rng = np.random.default_rng(random_spec.get("seed", 0))
+        params = random_spec["params"]
+        return [{**base, **{k: _sample_param(rng, params[k]) for k in sorted(params)}}
+                for _ in range(random_spec["num_trials"])]
+    raise ValueError("Sweep spec must define 'grid' or 'random'")
+
+
+def trial_id(config: Dict) -> str:
+    payload = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def config_to_argv(config: Dict) -> List[str]:
+    argv = []
+    for key, value in sorted(config.items()):
+        if isinstance(value, bool):
+            if value:
+                argv.append(f"--{key}")
+        elif value is not None:
+            argv.extend([f"--{key}", str(value)])
+    return argv
+
+
+# ============================================================
+# Execução de um trial (processo worker)
+# ============================================================
+def run_trial(config: Dict, log_dir: str, final_window: int) -> Dict:
+    """Trains one config with ql_train and returns its result record."""
+    tid = trial_id(config)
+    record = {"trial_id": tid, "config": config}
+    log_path = Path(log_dir) / f"{tid}.log"
+    with open(log_path, "w") as log, contextlib.redirect_stdout(log):
+        try:
+            args = ql_train._prepare_parser().parse_args(config_to_argv(config))
+            args.quiet = True
+            agent, agent_spec = ql_train.build_from_args(args)
+            start = timer()
+            metrics = agent_spec.train_agent(agent, args)
+            wall_time = timer() - start
+        except (Exception, SystemExit):
+            traceback.print_exc(file=log)
+            record.update(status="error", error=traceback.format_exc(limit=1).strip().splitlines()[-1])
+            return record
+
+    rewards = np.asarray(metrics.get("rewards", []), dtype=float)
+    total_steps = int(np.sum(metrics.get("steps", [])))
+    record.update(
+        status="ok",
+        final_mean_reward=float(rewards[-final_window:].mean()) if rewards.size else float("nan"),
+        steps_per_sec=total_steps / wall_time if wall_time > 0 else float("nan"),
+        wall_time=wall_time,
+        total_steps=total_steps,
+        num_episodes=int(rewards.size),
+    )
+    return record
+
+
+# ============================================================
+# Resultados
+# ============================================================
+def load_completed(results_path: Path) -> Dict[str, Dict]:
+    completed = {}
+    if not results_path.exists():
+        return completed
+    with open(results_path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # linha truncada por um processo interrompido
+            if record.get("status") == "ok":
+                completed[record["trial_id"]] = record
+    return completed
+
+
+def write_csv(records: List[Dict], csv_path: Path) -> None:
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for record in records:
+            writer.writerow({**record, "config": json.dumps(record.get("config", {}), sort_keys=True)})
+
+
+def validate_configs(configs: List[Dict]) -> None:
+    parser = ql_train._prepare_parser()
+    for config in configs:
+        _, unknown = parser.parse_known_args(config_to_argv(config))
+        if unknown:
+            raise ValueError(f"Unknown ql_train flags in sweep spec: {unknown}")
+
+
+def run_sweep(spec: Dict, out_dir: str, workers: int, threads_per_worker: int = 1,
+              final_window: int = 100) -> List[Dict]:
+    out = Path(out_dir)
+    log_dir = out / "logs"
+    log_dir.mkdir(parents=True, exist_ok=True)
+    results_path = out / "results.jsonl"
+
+    configs = expand_spec(spec)
+    validate_configs(configs)
+    completed = load_completed(results_path)
+    pending = [c for c in configs if trial_id(c) not in completed]
+    print(f"{len(configs)} trials ({len(configs) - len(pending)} already completed, "
+          f"{len(pending)} to run on {workers} workers)")
+
+    failed = []
+    torch_threads = any(c.get("agent") == "neural" for c in pending)
+    with process_pool(workers, threads_per_worker, torch_threads=torch_threads) as pool, \
+            open(results_path, "a") as results:
+        futures = {pool.submit(run_trial, c, str(log_dir), final_window): c for c in pending}
+        for future in as_completed(futures):
+            try:
+                record = future.result()
+            except BrokenProcessPool:
+                # Um worker morreu (segfault, OOM...): o pool inteiro quebra e os trials
+                # ainda pendentes falham, mas os já concluídos continuam valendo
+                config = futures[future]
+                record = {"trial_id": trial_id(config), "config": config, "status": "error",
+                          "error": "worker process died (BrokenProcessPool)"}
+            results.write(json.dumps(record, default=str) + "\n")
+            results.flush()
+            if record["status"] == "ok":
+                completed[record["trial_id"]] = record
+                print(f"[{record['trial_id']}] reward {record['final_mean_reward']:.2f} | "
+                      f"{record['steps_per_sec']:.0f} steps/s | {record['wall_time']:.1f}s")
+            else:
+                failed.append(record)
+                print(f"[{record['trial_id']}] failed: {record['error']}")
+
+    if failed:
+        print(f"{len(failed)} trials failed; re-run the same command to retry them")
+    records = sorted(completed.values(), key=lambda r: r["final_mean_reward"], reverse=True)
+    write_csv(records + failed, out / "results.csv")
+    return records
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter sweep for ql_train")
+    parser.add_argument("--spec", type=str, required=True, help="JSON file with the sweep spec")
+    parser.add_argument("--out_dir", type=str, default="sweep", help="Directory for results and logs")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--threads_per_worker", type=int, default=1,
+                        help="torch/BLAS threads per worker")
+    parser.add_argument("--final_window", type=int, default=100,
+                        help="Episodes averaged for the final mean reward")
+    args = parser.parse_args(argv)
+
+    if args.workers <= 0 or args.threads_per_worker <= 0:
+        raise ValueError("workers and threads_per_worker must be positive")
+
+    with open(args.spec) as f:
+        spec = json.load(f)
+
+    records = run_sweep(spec, args.out_dir, args.workers, args.threads_per_worker, args.final_window)
+    print(f"\nBest trials (results in {Path(args.out_dir) / 'results.csv'}):")
+    for record in records[:5]:
+        print(f"  {record['final_mean_reward']:8.2f}  {json.dumps(record['config'], sort_keys=True)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,14 +1,16 @@
 import argparse
+import contextlib
+import copy
+import os
 import random
 import sys
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Callable, Dict, Iterable, List, MutableMapping, Optional
+from typing import Callable, Dict, Iterable, List, MutableMapping, Optional, Tuple
 
 import gymnasium as gym
 import matplotlib.pyplot as plt
 import numpy as np
-from scipy.signal import savgol_filter
 from timeit import default_timer as timer
 
 if __package__ is None or __package__ == "":
@@ -16,11 +18,21 @@ if __package__ is None or __package__ == "":
     if str(package_root) not in sys.path:
         sys.path.insert(0, str(package_root))
 
+from rl.checkpoint import resolve_checkpoint
+from rl.dataset import RecordingEnvironment
 from rl.environment_blackjack import BlackjackEnvironment
+from rl.environment_box import BoxSpaceEnvironment
+from rl.environment_discrete import DiscreteSpaceEnvironment
 from rl.environment_taxi import TaxiEnvironment
+from rl.fast_envs import VectorTaxi
 from rl.qln import QLearningAgentNeural as QLearningAgentNeural
 from rl.qll import QLearningAgentLinear
 from rl.qlt import QLearningAgentTabular
+from rl.tile_coding import QLearningAgentTileCoding
+from rl.parallel import process_pool
+from rl.metrics import MetricsWriter, truncate_metrics
+from rl.plot_metrics import plot_learning_curves, plot_metrics_file
+from rl.profiling import PhaseProfiler
 
 
 EnvironmentFactory = Callable[[gym.Env], object]
@@ -31,40 +43,70 @@ TrainFn = Callable[[object, argparse.Namespace], Dict[str, Iterable[float]]]
 environment_dict: Dict[str, EnvironmentFactory] = {
     "Blackjack-v1": BlackjackEnvironment,
     "Taxi-v3": TaxiEnvironment,
+    "FrozenLake-v1": DiscreteSpaceEnvironment,
+    "CliffWalking-v0": DiscreteSpaceEnvironment,
+    # Observações contínuas (apenas --agent tilecoding)
+    "MountainCar-v0": BoxSpaceEnvironment,
+    "CartPole-v1": BoxSpaceEnvironment,
+    "Acrobot-v1": BoxSpaceEnvironment,
+    "LunarLander-v3": BoxSpaceEnvironment,
 }
 
 
-def _safe_savgol(values: np.ndarray) -> np.ndarray:
-    if values.size <= 10:
-        return values
-    max_window = 501 if values.size > 600 else 101
-    window = min(values.size, max_window)
-    if window % 2 == 0:
-        window -= 1
-    if window < 3:
-        return values
-    polyorder = min(3, window - 1)
-    return savgol_filter(values, window_length=window, polyorder=polyorder)
+def _make_gym_env(env_name: str) -> gym.Env:
+    env = gym.make(env_name)
+    if hasattr(env, "env"):
+        env = env.env
+    return env
+
+
+def _make_vector_env(args: argparse.Namespace) -> gym.vector.VectorEnv:
+    env_fns = [lambda: _make_gym_env(args.env_name) for _ in range(args.num_envs)]
+    if args.vector_mode == "async":
+        return gym.vector.AsyncVectorEnv(env_fns)
+    return gym.vector.SyncVectorEnv(env_fns)
+
+
+def _attach_profile(agent, metrics: Dict[str, Iterable[float]]) -> Dict[str, Iterable[float]]:
+    profiler = getattr(agent, "profiler", None)
+    if profiler is not None and profiler.enabled:
+        metrics["profile"] = profiler.summary()
+    return metrics
 
 
 def _train_tabular(agent: QLearningAgentTabular, args: argparse.Namespace) -> Dict[str, Iterable[float]]:
-    history = agent.train(args.num_episodes)
+    if args.env_backend == "fast":
+        # Simulador NumPy: todos os sub-ambientes avançam numa única operação. Sem truncamento,
+        # como o backend gym (`_make_gym_env` remove o TimeLimit): mesmos episódios, só mais rápidos
+        vec_env = VectorTaxi(_make_gym_env(args.env_name), args.num_envs)
+        history = agent.train_vectorized(vec_env, args.num_episodes, seed=args.seed)
+    elif args.hogwild:
+        history = agent.train_hogwild(args.num_episodes, workers=args.hogwild, seed=args.seed)
+    elif args.num_envs > 1:
+        vec_env = _make_vector_env(args)
+        try:
+            history = agent.train_vectorized(vec_env, args.num_episodes, seed=args.seed)
+        finally:
+            vec_env.close()
+    else:
+        history = agent.train(args.num_episodes)
     epsilons = history.get("epsilons", getattr(agent, "epsilons_", []))
-    return {
+    return _attach_profile(agent, {
         "rewards": history.get("rewards", []),
         "penalties": history.get("penalties", []),
         "epsilons": epsilons,
         "steps": history.get("steps", []),
-    }
+    })
 
 
 def _train_linear(agent: QLearningAgentLinear, args: argparse.Namespace) -> Dict[str, Iterable[float]]:
     result = agent.train(
         num_episodes=args.num_episodes,
         max_steps_per_episode=args.max_steps,
+        schedule_episodes=getattr(args, "schedule_episodes", None),
     )
     if isinstance(result, dict):
-        return result
+        return _attach_profile(agent, result)
     # Backwards compatibility: older agents returned tuples
     penalties, rewards, successes = result
     return {
@@ -76,12 +118,20 @@ def _train_linear(agent: QLearningAgentLinear, args: argparse.Namespace) -> Dict
 
 
 def _train_neural(agent: QLearningAgentNeural, args: argparse.Namespace) -> Dict[str, Iterable[float]]:
+    if args.actors:
+        return agent.train_actor_learner(
+            num_episodes=args.num_episodes,
+            actors=args.actors,
+            max_steps_per_episode=args.max_steps,
+            updates_per_step=args.updates_per_step or None,
+            seed=args.seed,
+        )
     result = agent.train(
         num_episodes=args.num_episodes,
         max_steps_per_episode=args.max_steps,
     )
     if isinstance(result, dict):
-        return result
+        return _attach_profile(agent, result)
     penalties, rewards, successes = result
     return {
         "rewards": rewards,
@@ -91,6 +141,13 @@ def _train_neural(agent: QLearningAgentNeural, args: argparse.Namespace) -> Dict
     }
 
 
+def _train_tilecoding(agent: QLearningAgentTileCoding, args: argparse.Namespace) -> Dict[str, Iterable[float]]:
+    return _attach_profile(agent, agent.train(
+        num_episodes=args.num_episodes,
+        max_steps_per_episode=args.max_steps,
+    ))
+
+
 @dataclass
 class AgentSpec:
     build_agent: AgentBuilder
@@ -111,6 +168,7 @@ def _build_tabular(env, args: argparse.Namespace) -> QLearningAgentTabular:
         min_epsilon=args.min_epsilon,
         max_epsilon=args.max_epsilon,
         verbose=not args.quiet,
+        trace_lambda=args.trace_lambda,
     )
 
 
@@ -122,6 +180,7 @@ def _build_linear(env, args: argparse.Namespace) -> QLearningAgentLinear:
         epsilon_decay_rate=args.epsilon_decay_rate,
         min_epsilon=args.min_epsilon,
         max_epsilon=args.max_epsilon,
+        feature_cache_dir=args.feature_cache,
     )
 
 
@@ -131,13 +190,32 @@ def _build_neural(env, args: argparse.Namespace) -> QLearningAgentNeural:
         learning_rate=args.learning_rate,
         gamma=args.gamma,
         hidden_dim=args.hidden_dim,
+        replay_size=args.replay_size,
         batch_size=args.batch_size,
         epsilon_decay_rate=args.epsilon_decay_rate,
         min_epsilon=args.min_epsilon,
         max_epsilon=args.max_epsilon,
-        checkpoint_dir=args.checkpoint_dir,
-        checkpoint_interval=args.checkpoint_every if args.checkpoint_every else None,
-        checkpoint_prefix=args.checkpoint_prefix or getattr(args, "model_base_name", None),
+        feature_cache_dir=args.feature_cache,
+        replay_store_features=args.replay_features,
+        target_update_every=args.target_update_every,
+        q_head=args.q_head,
+        prioritized_replay=args.prioritized_replay,
+        priority_alpha=args.priority_alpha,
+        priority_beta=args.priority_beta,
+        priority_beta_steps=args.priority_beta_steps,
+    )
+
+
+def _build_tilecoding(env, args: argparse.Namespace) -> QLearningAgentTileCoding:
+    return QLearningAgentTileCoding(
+        gym_env=env,
+        learning_rate=args.learning_rate,
+        gamma=args.gamma,
+        tilings=args.tilings,
+        tiles_per_dim=args.tiles_per_dim,
+        epsilon_decay_rate=args.epsilon_decay_rate,
+        min_epsilon=args.min_epsilon,
+        max_epsilon=args.max_epsilon,
     )
 
 
@@ -146,7 +224,7 @@ AGENT_REGISTRY: MutableMapping[str, AgentSpec] = {
         build_agent=_build_tabular,
         train_agent=_train_tabular,
         basename_fn=lambda env_name: f"{env_name.lower()}-tabular-agent",
-        filename_fn=lambda base: f"{base}.pkl",
+        filename_fn=lambda base: f"{base}.npz",
         label="Tabular",
         default_min_epsilon=0.01,
         default_max_epsilon=1.0,
@@ -155,7 +233,7 @@ AGENT_REGISTRY: MutableMapping[str, AgentSpec] = {
         build_agent=_build_linear,
         train_agent=_train_linear,
         basename_fn=lambda env_name: f"{env_name.lower()}-linear-agent",
-        filename_fn=lambda base: f"{base}.pkl",
+        filename_fn=lambda base: f"{base}.npz",
         label="Linear",
         default_min_epsilon=0.05,
         default_max_epsilon=1.0,
@@ -169,8 +247,32 @@ AGENT_REGISTRY: MutableMapping[str, AgentSpec] = {
         default_min_epsilon=0.05,
         default_max_epsilon=1.0,
     ),
+    "tilecoding": AgentSpec(
+        build_agent=_build_tilecoding,
+        train_agent=_train_tilecoding,
+        basename_fn=lambda env_name: f"{env_name.lower()}-tilecoding-agent",
+        filename_fn=lambda base: f"{base}.npz",
+        label="Tile coding",
+        default_min_epsilon=0.0,
+        default_max_epsilon=0.1,
+    ),
 }
 
+def _parse_seeds(text: str) -> List[int]:
+    """Parses '0..15' (inclusive range) or a comma-separated list of seeds."""
+    try:
+        if ".." in text:
+            first, last = text.split("..", 1)
+            seeds = list(range(int(first), int(last) + 1))
+        else:
+            seeds = [int(s) for s in text.split(",") if s.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid seed list: {text!r}")
+    if not seeds:
+        raise argparse.ArgumentTypeError(f"empty seed list: {text!r}")
+    return seeds
+
+
 def _prepare_parser() -> argparse.ArgumentParser:
     agent_choices = sorted(set(AGENT_REGISTRY.keys()))
     parser = argparse.ArgumentParser(description="Train Q-Learning agents (tabular, linear, neural)")
@@ -182,26 +284,83 @@ def _prepare_parser() -> argparse.ArgumentParser:
     parser.add_argument("--learning_rate", type=float, default=0.7, help="Learning rate (alpha)")
     parser.add_argument("--gamma", type=float, default=0.618, help="Discount factor (gamma)")
     parser.add_argument("--seed", type=int, default=42, help="Random seed for reproducibility")
+    parser.add_argument("--seeds", type=_parse_seeds, default=None,
+                        help="Train one independent agent per seed in parallel, e.g. '0..15' or '1,7,42'")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes used with --seeds")
     parser.add_argument("--plot", action="store_true", help="Show plots interactively after training")
     parser.add_argument("--quiet", action="store_true", help="Run without verbose agent logging (tabular only)")
+    parser.add_argument("--num_envs", type=int, default=1,
+                        help="Number of parallel environments stepped as a gymnasium.vector batch (tabular only)")
+    parser.add_argument("--vector_mode", choices=["sync", "async"], default="sync",
+                        help="gymnasium.vector implementation used when --num_envs > 1")
+    parser.add_argument("--lambda", dest="trace_lambda", type=float, default=0.0,
+                        help="Watkins Q(lambda) with sparse eligibility traces (tabular only; 0 = one-step Q-learning)")
+    parser.add_argument("--hogwild", type=int, default=0, metavar="K",
+                        help="Train with K processes updating one shared-memory Q-table without locks (tabular only)")
+    parser.add_argument("--env_backend", choices=["gym", "fast"], default="gym",
+                        help="Environment simulator: gymnasium, or the pure-NumPy rl.fast_envs batch (Taxi-v3, tabular only). "
+                             "Neither backend truncates training episodes")
+    parser.add_argument("--metrics_file", type=str, nargs="?", const="", default=None,
+                        help="Stream per-episode metrics to this CSV instead of keeping them in memory "
+                             "(default path: <model>-metrics.csv); plots are rebuilt from the file")
+    parser.add_argument("--progress_every", type=int, default=1000,
+                        help="With --metrics_file, print smoothed progress every N episodes (0 disables it)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Time each train-loop phase (env step, action choice, update...) and print a breakdown")
+    parser.add_argument("--profile_every", type=int, default=16,
+                        help="With --profile, time one step in every N")
 
     # Agent-specific knobs (optional for tabular)
     parser.add_argument("--max_steps", type=int, default=500,
                         help="Maximum steps per episode (most relevant for linear/neural)")
     parser.add_argument("--batch_size", type=int, default=64,
                         help="Mini-batch size for neural agents")
+    parser.add_argument("--replay_size", type=int, default=50000,
+                        help="Replay buffer capacity for neural agents")
+    parser.add_argument("--replay_features", action="store_true",
+                        help="Store phi(s,a) in the replay buffer so minibatches are a pure gather (neural only)")
+    parser.add_argument("--actors", type=int, default=0, metavar="K",
+                        help="Actor/learner mode: K actor processes feed a continuously training learner (neural only)")
+    parser.add_argument("--updates_per_step", type=float, default=0.0,
+                        help="With --actors, cap gradient updates per received transition (0: no cap)")
+    parser.add_argument("--prioritized_replay", action="store_true",
+                        help="Sample replay transitions in proportion to their TD error (sum-tree; neural only)")
+    parser.add_argument("--priority_alpha", type=float, default=0.6,
+                        help="Prioritization exponent alpha (0 = uniform)")
+    parser.add_argument("--priority_beta", type=float, default=0.4,
+                        help="Initial importance-sampling exponent beta, annealed to 1")
+    parser.add_argument("--priority_beta_steps", type=int, default=100000,
+                        help="Number of replay updates over which beta is annealed to 1")
+    parser.add_argument("--target_update_every", type=int, default=0,
+                        help="Sync a frozen target network every K updates (neural only; 0 disables it)")
+    parser.add_argument("--q_head", choices=["single", "multi"], default="single",
+                        help="Neural architecture: Q(s,a) per feature row (single) or all Q(s,.) from state features (multi)")
     parser.add_argument("--hidden_dim", type=int, default=64,
                         help="Hidden layer size for approximate agents")
     parser.add_argument("--min_epsilon", type=float, default=None,
                         help="Minimum epsilon during training (default depends on agent)")
     parser.add_argument("--max_epsilon", type=float, default=None,
                         help="Maximum epsilon during training (default depends on agent)")
+    parser.add_argument("--feature_cache", type=str, default=None,
+                        help="Directory holding the precomputed, memory-mapped feature table (linear/neural, Taxi-v3)")
+    parser.add_argument("--tilings", type=int, default=8,
+                        help="Number of offset tilings (tilecoding only)")
+    parser.add_argument("--tiles_per_dim", type=int, default=8,
+                        help="Tiles per observation dimension in each tiling (tilecoding only)")
     parser.add_argument("--checkpoint_dir", type=str, default=None,
-                        help="Directory to store intermediate checkpoints (neural agent only)")
+                        help="Directory to store periodic training checkpoints (all agents)")
     parser.add_argument("--checkpoint_every", type=int, default=0,
-                        help="Number of episodes between neural checkpoints")
+                        help="Number of episodes between checkpoints")
     parser.add_argument("--checkpoint_prefix", type=str, default=None,
-                        help="Filename prefix for neural checkpoints (defaults to model base name)")
+                        help="Filename prefix for checkpoints (defaults to model base name)")
+    parser.add_argument("--record_dataset", type=str, default=None, metavar="DIR",
+                        help="Record every (s, a, r, s', done) transition to an on-disk dataset for rl.offline")
+    parser.add_argument("--dataset_chunk_size", type=int, default=100000,
+                        help="Transitions per dataset chunk file")
+    parser.add_argument("--resume", type=str, default=None, metavar="CKPT_OR_DIR",
+                        help="Continue training from a checkpoint (or the latest one in a directory) "
+                             "up to --num_episodes episodes in total")
     return parser
 
 
@@ -209,75 +368,62 @@ def _to_numpy(array_like: Iterable[float]) -> np.ndarray:
     return np.asarray(list(array_like), dtype=np.float32)
 
 
-def _plot_learning_curves(base_name: str,
-                          env_name: str,
-                          agent_label: str,
-                          rewards: np.ndarray,
-                          epsilons: np.ndarray,
-                          show: bool) -> None:
-    smooth_rewards = _safe_savgol(rewards)
-
-    plt.figure(figsize=(10, 4))
-    plt.plot(smooth_rewards, label="Smoothed reward")
-    plt.title(f"Learning Curve ({env_name}, {agent_label})")
-    plt.xlabel("Episode")
-    plt.ylabel("Total Reward")
-    plt.grid(True)
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(f"{base_name}-learning_curve.png")
-    if show:
-        plt.show()
-    plt.close()
-
-    plt.figure(figsize=(10, 4))
-    plt.plot(epsilons, color="orange")
-    plt.title(f"Epsilon Decay ({env_name}, {agent_label})")
-    plt.xlabel("Episode")
-    plt.ylabel("ε")
-    plt.grid(True)
-    plt.tight_layout()
-    plt.savefig(f"{base_name}-epsilons.png")
-    if show:
-        plt.show()
-    plt.close()
-
-    fig, ax = plt.subplots(1, 2, figsize=(10, 4))
-    ax[0].plot(smooth_rewards)
-    ax[0].set_title("Learning Curve")
-    ax[0].set_xlabel("Episode")
-    ax[0].set_ylabel("Reward")
-    ax[0].grid(True)
-
-    ax[1].plot(epsilons, color="orange")
-    ax[1].set_title("Epsilon Decay")
-    ax[1].set_xlabel("Episode")
-    ax[1].set_ylabel("ε")
-    ax[1].grid(True)
-
-    plt.tight_layout()
-    plt.savefig(f"{base_name}-summary.png")
-    if show:
-        plt.show()
-    plt.close()
-
-
-def main(argv: Optional[List[str]] = None) -> int:
-    parser = _prepare_parser()
-    args = parser.parse_args(argv)
-
+def build_from_args(args: argparse.Namespace) -> Tuple[object, AgentSpec]:
+    """Seeds the RNGs, validates `args` and builds the wrapped environment and the agent."""
     random.seed(args.seed)
     np.random.seed(args.seed)
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.manual_seed(args.seed)  # pesos iniciais da rede neural
 
     if args.env_name not in environment_dict:
         raise ValueError(f"Unsupported environment: {args.env_name}. "
                          f"Choose from {list(environment_dict.keys())}")
 
-    env = gym.make(args.env_name)
-    if hasattr(env, "env"):
-        env = env.env
+    continuous = environment_dict[args.env_name] is BoxSpaceEnvironment
+    if continuous != (args.agent == "tilecoding"):
+        raise ValueError("--agent tilecoding is for continuous-observation environments "
+                         "(MountainCar-v0, CartPole-v1, Acrobot-v1, LunarLander-v3), and the other "
+                         "agents for discrete ones")
+
+    if args.num_envs < 1:
+        raise ValueError("num_envs must be positive")
+    if args.num_envs > 1 and args.agent != "tabular":
+        raise ValueError("--num_envs is only supported by the tabular agent")
+    if args.env_backend == "fast" and (args.agent != "tabular" or args.env_name != "Taxi-v3"):
+        raise ValueError("--env_backend fast is only supported by the tabular agent on Taxi-v3")
+    if args.hogwild < 0:
+        raise ValueError("hogwild must be non-negative")
+    if args.hogwild and (args.agent != "tabular" or args.num_envs > 1 or args.env_backend == "fast"):
+        raise ValueError("--hogwild is only supported by the tabular agent with a single gym environment per worker")
+    if not 0.0 <= args.trace_lambda <= 1.0:
+        raise ValueError("lambda must be in [0, 1]")
+    if args.trace_lambda and (args.agent != "tabular" or args.num_envs > 1 or args.env_backend == "fast"
+                              or args.hogwild):
+        raise ValueError("--lambda is only supported by the serial tabular agent "
+                         "(num_envs 1, env_backend gym, no --hogwild)")
+    if args.actors < 0 or args.updates_per_step < 0:
+        raise ValueError("actors and updates_per_step must be non-negative")
+    if args.actors and args.agent != "neural":
+        raise ValueError("--actors is only supported by the neural agent")
+    if (args.hogwild or args.actors) and args.profile:
+        raise ValueError("--profile is not supported with --hogwild or --actors")
+    if args.checkpoint_every and (args.num_envs > 1 or args.env_backend == "fast" or args.hogwild or args.actors):
+        raise ValueError("--checkpoint_every requires a single gym environment "
+                         "(num_envs 1, env_backend gym, no --hogwild/--actors)")
+    if args.resume and (args.num_envs > 1 or args.env_backend == "fast"):
+        raise ValueError("--resume requires a single gym environment (num_envs 1, env_backend gym)")
+    if getattr(args, "record_dataset", None) and (args.num_envs > 1 or args.env_backend == "fast"
+                                                  or args.hogwild or args.actors or args.resume):
+        raise ValueError("--record_dataset requires a single gym environment in this process "
+                         "(num_envs 1, env_backend gym, no --hogwild/--actors/--resume)")
+
+    env = _make_gym_env(args.env_name)
     env.reset(seed=args.seed)
+    env.action_space.seed(args.seed)  # ações aleatórias dos agentes aproximados
     env = environment_dict[args.env_name](env)
+    if getattr(args, "record_dataset", None):
+        env = RecordingEnvironment.create(env, args.record_dataset, args.dataset_chunk_size)
 
     agent_spec = AGENT_REGISTRY[args.agent]
     base_name = agent_spec.basename_fn(args.env_name)
@@ -291,21 +437,145 @@ def main(argv: Optional[List[str]] = None) -> int:
     args.max_epsilon = max_epsilon
 
     agent = agent_spec.build_agent(env, args)
+    agent.configure_checkpoints(args.checkpoint_dir, args.checkpoint_every, args.checkpoint_prefix or base_name)
+    if args.profile:
+        agent.profiler = PhaseProfiler(enabled=True, sample_every=args.profile_every)
+    return agent, agent_spec
+
+
+def _train_seed(args: argparse.Namespace, seed: int) -> Dict[str, object]:
+    """Worker for --seeds: trains and saves one agent with its own RNG stream."""
+    args = copy.copy(args)
+    args.seed = seed
+    args.seeds = None
+    args.quiet = True
+    # Um prefixo por semente: sem ele os processos sobrescreveriam os checkpoints uns dos outros
+    prefix = args.checkpoint_prefix or AGENT_REGISTRY[args.agent].basename_fn(args.env_name)
+    args.checkpoint_prefix = f"{prefix}-seed{seed}"
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        agent, agent_spec = build_from_args(args)
+        start = timer()
+        metrics = agent_spec.train_agent(agent, args)
+        elapsed = timer() - start
+        model_path = agent_spec.filename_fn(f"{args.model_base_name}-seed{seed}")
+        agent.save(model_path)
+    return {
+        "seed": seed,
+        "rewards": list(metrics.get("rewards", [])),
+        "epsilons": list(metrics.get("epsilons", [])),
+        "elapsed": elapsed,
+        "model_path": model_path,
+    }
+
+
+def _main_multi_seed(args: argparse.Namespace) -> int:
+    agent_spec = AGENT_REGISTRY[args.agent]
+    base_name = agent_spec.basename_fn(args.env_name)
+    workers = max(1, min(args.workers, len(args.seeds)))
+    print(f"\nTraining {len(args.seeds)} {agent_spec.label} Q-Learning agents on {args.env_name} "
+          f"(seeds {args.seeds[0]}..{args.seeds[-1]}, {workers} workers)...\n")
+
+    start = timer()
+    with process_pool(workers, torch_threads=args.agent == "neural") as pool:
+        futures = [pool.submit(_train_seed, args, seed) for seed in args.seeds]
+        runs = []
+        for future in futures:
+            run = future.result()
+            runs.append(run)
+            print(f"Seed {run['seed']}: {run['elapsed']:.2f}s, "
+                  f"mean reward (last 100) {np.mean(run['rewards'][-100:]):.2f} -> {run['model_path']}")
+    elapsed = timer() - start
+    print(f"\nTraining finished in {elapsed:.2f} seconds "
+          f"({sum(r['elapsed'] for r in runs):.2f}s of single-run time).\n")
+
+    # O melhor agente (média final) também fica no caminho padrão, usado pelo ql_play.
+    best = max(runs, key=lambda r: np.mean(r["rewards"][-100:]))
+    model_path = agent_spec.filename_fn(base_name)
+    with open(best["model_path"], "rb") as src, open(model_path, "wb") as dst:
+        dst.write(src.read())
+    print(f"Best seed {best['seed']} copied to {model_path}")
+
+    length = min(len(r["rewards"]) for r in runs)
+    rewards = np.stack([_to_numpy(r["rewards"])[:length] for r in runs])
+    epsilons = np.stack([_to_numpy(r["epsilons"])[:length] for r in runs])
+    plot_learning_curves(base_name, args.env_name, agent_spec.label, rewards, epsilons, args.plot)
+
+    if not args.plot:
+        plt.close("all")
+
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = _prepare_parser()
+    args = parser.parse_args(argv)
+
+    if args.seeds:
+        if args.workers <= 0:
+            raise ValueError("workers must be positive")
+        if args.metrics_file is not None:
+            raise ValueError("--metrics_file is not supported with --seeds")
+        if args.resume:
+            raise ValueError("--resume is not supported with --seeds")
+        if args.record_dataset:
+            raise ValueError("--record_dataset is not supported with --seeds")
+        return _main_multi_seed(args)
+
+    agent, agent_spec = build_from_args(args)
+    base_name = args.model_base_name
+
+    done = 0
+    if args.resume:
+        checkpoint_path = resolve_checkpoint(args.resume)
+        done = agent.load_checkpoint(checkpoint_path)
+        if done > args.num_episodes:
+            raise ValueError(f"Checkpoint {checkpoint_path} already has {done} episodes "
+                             f"(more than num_episodes={args.num_episodes})")
+        print(f"Resumed from {checkpoint_path} after {done} episodes")
+        args.num_episodes -= done
+
+    writer = None
+    if args.metrics_file is not None:
+        args.metrics_file = args.metrics_file or f"{base_name}-metrics.csv"
+        if done and os.path.exists(args.metrics_file):
+            # Linhas escritas depois do checkpoint serão geradas de novo
+            truncate_metrics(args.metrics_file, done)
+        writer = MetricsWriter(args.metrics_file, progress_every=args.progress_every, append=bool(done))
+        agent.metrics_writer = writer
 
     print(f"\nTraining {agent_spec.label} Q-Learning agent on {args.env_name}...\n")
 
     start = timer()
-    metrics = agent_spec.train_agent(agent, args)
+    try:
+        metrics = agent_spec.train_agent(agent, args)
+    finally:
+        if writer is not None:
+            writer.close()
+            agent.metrics_writer = None
+        if args.record_dataset:
+            agent.env.close()
     elapsed = timer() - start
     print(f"\nTraining finished in {elapsed:.2f} seconds.\n")
+    if "profile" in metrics:
+        print(agent.profiler.format_table() + "\n")
 
     model_path = agent_spec.filename_fn(base_name)
     agent.save(model_path)
     print(f"Saved agent to {model_path}")
 
-    rewards = _to_numpy(metrics.get("rewards", []))
-    epsilons = _to_numpy(metrics.get("epsilons", []))
-    _plot_learning_curves(base_name, args.env_name, agent_spec.label, rewards, epsilons, args.plot)
+    if args.record_dataset:
+        print(f"Recorded {agent.env.writer.num_transitions} transitions to {args.record_dataset}")
+    if writer is not None:
+        print(f"Metrics streamed to {args.metrics_file}")
+        plot_metrics_file(args.metrics_file, base_name, args.env_name, agent_spec.label, show=args.plot)
+    else:
+        rewards = _to_numpy(metrics.get("rewards", []))
+        epsilons = _to_numpy(metrics.get("epsilons", []))
+        # Após --resume o histórico de ε pode incluir episódios anteriores a esta execução
+        epsilons = epsilons[-rewards.size:] if rewards.size else epsilons[:0]
+        episodes = np.arange(rewards.size) + agent.trained_episodes - rewards.size
+        plot_learning_curves(base_name, args.env_name, agent_spec.label, rewards, epsilons, args.plot,
+                             episodes=episodes)
 
     if not args.plot:
         plt.close("all")
@@ -1,7 +1,11 @@
-from timeit import default_timer as timer
+from time import perf_counter
+from typing import Optional
 import pickle
 import numpy as np
+from rl.checkpoint import CheckpointMixin
 from rl.environment import Environment
+from rl.model_io import save_model_npz
+from rl.profiling import PhaseProfiler
 
 from rl.qll_taxi_feature_extractor import TaxiFeatureExtractor
 from rl.qll_blackjack_feature_extractor import BlackjackFeatureExtractor
@@ -12,19 +16,22 @@ feature_extractors_dict = {
 }
 
 
-class QLearningAgentLinear:
+class QLearningAgentLinear(CheckpointMixin):
     """
     Q-Learning com aproximação linear:
         Q(s,a) = w · φ(s,a)
     """
 
+    agent_type = "linear"
+
     def __init__(self,
                  gym_env: Environment,
                  learning_rate: float,
                  gamma: float,
                  epsilon_decay_rate: float = 0.003,
                  min_epsilon: float = 0.05,
-                 max_epsilon: float = 1.0):
+                 max_epsilon: float = 1.0,
+                 feature_cache_dir: Optional[str] = None):
         self.env = gym_env
         env_name = getattr(self.env, "get_id", lambda: None)()
 
@@ -32,6 +39,10 @@ class QLearningAgentLinear:
             raise ValueError(f"Unsupported environment: {env_name}")
 
         self.fex = feature_extractors_dict[env_name](gym_env.env)
+        if feature_cache_dir:
+            if not hasattr(self.fex, "enable_feature_cache"):
+                raise ValueError(f"Feature cache not supported for environment: {env_name}")
+            self.fex.enable_feature_cache(feature_cache_dir)
 
         # pesos centrados em zero, compatíveis com as features
         self.w = np.random.uniform(-0.2, 0.2, size=self.fex.get_num_features())
@@ -44,14 +55,21 @@ class QLearningAgentLinear:
         self.learning_rate = learning_rate
         self.gamma = gamma
         self.epsilon_history = []
+        self.trained_episodes = 0
+        self.profiler = PhaseProfiler()
+        # Com um `rl.metrics.MetricsWriter`, os episódios vão para o arquivo em vez das listas
+        self.metrics_writer = None
 
     # =========================================================
     # Seleção de ações
     # =========================================================
     def choose_action(self, state, is_in_exploration_mode=True):
+        return self._choose_action_from_qvalues(self.get_qvalues(state), is_in_exploration_mode)
+
+    def _choose_action_from_qvalues(self, q_values, is_in_exploration_mode=True):
         if is_in_exploration_mode and np.random.rand() < self.epsilon:
             return self.env.get_random_action()
-        return self.policy(state)
+        return int(np.argmax(q_values))
 
     def policy(self, state):
         return self.__get_action_and_value(state)[0]
@@ -60,7 +78,7 @@ class QLearningAgentLinear:
         return self.__get_action_and_value(state)[1]
 
     def __get_action_and_value(self, state):
-        q_values = [self.get_qvalue(state, a) for a in range(self.env.get_num_actions())]
+        q_values = self.get_qvalues(state)
         best_action = int(np.argmax(q_values))
         best_value = float(np.max(q_values))
         return best_action, best_value
@@ -71,54 +89,103 @@ class QLearningAgentLinear:
     def get_features(self, state, action):
         return self.fex.get_features(state, action)
 
+    def get_features_all_actions(self, state):
+        return self.fex.get_features_all_actions(state)
+
+    def get_features_batch(self, states, actions):
+        return self.fex.get_features_batch(states, actions)
+
     def get_qvalue(self, state, action):
         return float(np.dot(self.w, self.get_features(state, action)))
 
+    def get_qvalues(self, state):
+        """Q(s,·) = Φ(s) · w, um único produto matriz-vetor."""
+        return self.get_features_all_actions(state) @ self.w
+
     # =========================================================
     # Atualização dos pesos
     # =========================================================
     def update(self, state, action, reward, next_state, terminated):
         next_value = 0 if terminated else self.get_value(next_state)
-        td_error = reward + self.gamma * next_value - self.get_qvalue(state, action)
+        self._apply_td_update(self.get_features(state, action), self.get_qvalue(state, action),
+                              reward, next_value)
+
+    def _apply_td_update(self, features, qvalue, reward, next_value):
+        """Mesmo passo de `update`, reaproveitando φ(s,a) e Q(s,a) já calculados."""
+        td_error = reward + self.gamma * next_value - qvalue
         td_error = np.clip(td_error, -10, 10)
-        features = self.get_features(state, action)
         self.w += self.learning_rate * td_error * features
         self.w = np.clip(self.w, -1e3, 1e3)
 
     # =========================================================
     # Treinamento
     # =========================================================
-    def train(self, num_episodes: int, max_steps_per_episode: int = 1000):
+    def train(self, num_episodes: int, max_steps_per_episode: int = 1000,
+              schedule_episodes: Optional[int] = None):
         """
         Treina o agente Linear Q-Learning.
         Inclui controle de limite de passos por episódio e logs detalhados.
+
+        Chamadas sucessivas continuam a contagem de episódios (e o decaimento de ε);
+        `schedule_episodes` é a duração total do decaimento linear de ε
+        (padrão: até o fim desta chamada).
         """
         rewards_per_episode = []
         penalties_per_episode = []
         cumulative_success = []
+        steps_per_episode = []
 
         successful_episodes = 0
-        start_time = timer()
-
-        for episode in range(num_episodes):
+        if getattr(self, "profiler", None) is None:
+            self.profiler = PhaseProfiler()  # agentes salvos antes do profiler
+        prof = self.profiler
+        prof.start()
+
+        start_episode = getattr(self, "trained_episodes", 0)
+        end_episode = start_episode + num_episodes
+        schedule_episodes = schedule_episodes or end_episode
+
+        for episode in range(start_episode, end_episode):
+            timed = prof.begin_episode()
+            if timed: t0 = perf_counter()
             state, _ = self.env.reset()
+            if timed: prof.lap_episode("env_reset", t0)
             terminated = truncated = False
             total_reward = 0
             total_penalties = 0
             self.steps = 0
 
+            # Φ(s) é calculado uma única vez por estado visitado e reaproveitado
+            # na escolha da ação, no alvo TD e na atualização dos pesos.
+            phi = self.get_features_all_actions(state)
+            q_values = phi @ self.w
+
             while not (terminated or truncated) and self.steps < max_steps_per_episode:
                 self.steps += 1
-                action = self.choose_action(state)
+                timed = prof.begin_step()
+                if timed: t0 = perf_counter()
+                action = self._choose_action_from_qvalues(q_values)
+                if timed: t0 = prof.lap("choose_action", t0)
                 next_state, reward, terminated, truncated, _ = self.env.step(action)
+                if timed: t0 = prof.lap("env_step", t0)
 
                 # Atualização
                 if reward == -10:
                     total_penalties += 1
 
-                self.update(state, action, reward, next_state, terminated)
+                if terminated:
+                    next_value = 0
+                else:
+                    next_phi = self.get_features_all_actions(next_state)
+                    next_value = float(np.max(next_phi @ self.w))
+                if timed: t0 = prof.lap("features", t0)
+                self._apply_td_update(phi[action], float(q_values[action]), reward, next_value)
                 total_reward += reward
                 state = next_state
+                if not terminated:
+                    phi = next_phi
+                    q_values = phi @ self.w  # pesos acabaram de mudar
+                if timed: prof.lap("update", t0)
 
                 # Diagnóstico opcional
                 if self.steps % 500 == 0:
@@ -129,35 +196,43 @@ class QLearningAgentLinear:
                 print(f"[Warning] Episode {episode} reached max_steps ({max_steps_per_episode}).")
 
             # Atualiza epsilon (decay linear)
-            frac = episode / max(1, num_episodes - 1)
+            frac = episode / max(1, schedule_episodes - 1)
             self.epsilon = max(self.min_epsilon, self.max_epsilon * (1 - frac))
-            self.epsilon_history.append(self.epsilon)
 
             if terminated:
                 successful_episodes += 1
-
-            rewards_per_episode.append(total_reward)
-            penalties_per_episode.append(total_penalties)
-            cumulative_success.append(successful_episodes)
+            self.trained_episodes = episode + 1
+
+            writer = getattr(self, "metrics_writer", None)
+            if writer is not None:
+                writer.write(episode=episode, reward=total_reward, penalties=total_penalties,
+                             steps=self.steps, epsilon=self.epsilon, success=int(terminated))
+            else:
+                self.epsilon_history.append(self.epsilon)
+                rewards_per_episode.append(total_reward)
+                penalties_per_episode.append(total_penalties)
+                cumulative_success.append(successful_episodes)
+                steps_per_episode.append(self.steps)
 
             # Log periódico
             if episode % 50 == 0:
-                elapsed = timer() - start_time
-                print(f"Episode {episode}/{num_episodes} ({successful_episodes} successful)")
+                print(f"Episode {episode}/{end_episode} ({successful_episodes} successful)")
                 print(f"\tSteps: {self.steps}")
                 print(f"\tTotal reward: {total_reward}")
                 print(f"\tEpsilon: {self.epsilon:.4f}")
-                print(f"\tWeight norm: {np.linalg.norm(self.w):.4f}")
-                print(f"\tElapsed: {elapsed:.2f}s\n")
-                start_time = timer()
+                print(f"\tWeight norm: {np.linalg.norm(self.w):.4f}\n")
 
             if episode == 5000: self.epsilon = 0.2  # reexploração tardia
+            self._maybe_checkpoint(episode)
+
+        prof.stop()
 
         return {
             "penalties": penalties_per_episode,
             "rewards": rewards_per_episode,
             "successes": cumulative_success,
             "epsilons": list(self.epsilon_history),
+            "steps": steps_per_episode,
         }
 
 
@@ -167,7 +242,37 @@ class QLearningAgentLinear:
     def get_weights(self):
         return self.w.copy()
 
+    def _checkpoint_state(self):
+        return {
+            "w": self.w.copy(),
+            "epsilon": self.epsilon,
+            "epsilon_history": list(self.epsilon_history),
+        }
+
+    def _restore_checkpoint_state(self, state):
+        if state["w"].shape != self.w.shape:
+            raise ValueError(f"Checkpoint weights shape {state['w'].shape} does not match {self.w.shape}")
+        self.w = state["w"].copy()
+        self.epsilon = state["epsilon"]
+        self.epsilon_history = list(state["epsilon_history"])
+
     def save(self, filename):
+        """Salva um .npz compacto (pesos + hiperparâmetros) ou, para outros sufixos, um pickle."""
+        if str(filename).endswith(".npz"):
+            save_model_npz(filename, "linear", {"w": self.w}, {
+                "env_id": self.env.get_id(),
+                "feature_extractor": type(self.fex).__name__,
+                "features_version": getattr(self.fex, "FEATURES_VERSION", None),
+                "num_features": int(self.w.size),
+                "learning_rate": self.learning_rate,
+                "gamma": self.gamma,
+                "epsilon": self.epsilon,
+                "min_epsilon": self.min_epsilon,
+                "max_epsilon": self.max_epsilon,
+                "epsilon_decay_rate": self.epsilon_decay_rate,
+                "trained_episodes": getattr(self, "trained_episodes", 0),
+            })
+            return
         with open(filename, "wb") as f:
             pickle.dump(self, f)
 
@@ -20,6 +20,8 @@ class BlackjackFeatureExtractor(FeatureExtractor):
     self.features_list = []
     self.features_list.append(self.f0)
     self.features_list.append(self.f1)
+    # Versões vetorizadas, na mesma ordem de features_list (usadas por get_features_batch)
+    self.batch_features_list = [self.f0_batch, self.f1_batch]
 
   def get_num_features(self):
     '''
@@ -27,6 +29,12 @@ class BlackjackFeatureExtractor(FeatureExtractor):
     '''
     return len(self.features_list) + self.get_num_actions()
 
+  def get_num_state_features(self):
+    '''
+    Returns the number of action-independent (state) features.
+    '''
+    return 4
+
   def get_num_actions(self):
     '''
     Returns the number of actions available in the environment.
@@ -66,6 +74,54 @@ class BlackjackFeatureExtractor(FeatureExtractor):
 
     return feature_vector
 
+  def get_features_all_actions(self, state):
+    '''
+    Returns the matrix with one feature vector per action (rows follow get_actions()).
+    The action one-hot block is just the identity matrix.
+    '''
+    num_actions = self.get_num_actions()
+    num_base = len(self.features_list)
+    feature_matrix = np.zeros((num_actions, num_base + num_actions))
+    for action in self.get_actions():
+      for index, feature in enumerate(self.features_list):
+        feature_matrix[action, index] = feature(state, action)
+    feature_matrix[:, num_base:] = np.eye(num_actions)
+    return feature_matrix
+
+  def get_state_features(self, state):
+    '''
+    Returns action-independent features: bias, scaled player sum,
+    scaled dealer card and the usable ace flag.
+    '''
+    player_sum, dealer_card, usable_ace = state
+    return np.array([1.0, player_sum / 21.0, dealer_card / 10.0, float(usable_ace)])
+
+  def get_features_batch(self, states, actions):
+    '''
+    Returns the (N x num_features) matrix whose row i is the feature vector of
+    (states[i], actions[i]). `states` is an (N x 3) array of observation tuples.
+    '''
+    states = np.asarray(states).reshape(-1, 3)
+    actions = np.asarray(actions, dtype=np.int64)
+    player_sum, dealer_card, usable_ace = states[:, 0], states[:, 1], states[:, 2]
+    base = [feature(player_sum, dealer_card, usable_ace, actions) for feature in self.batch_features_list]
+    one_hot = np.eye(self.get_num_actions())[actions]
+    return np.column_stack([np.broadcast_to(np.asarray(f, dtype=float), actions.shape) for f in base] + [one_hot])
+
+  def get_state_features_batch(self, states):
+    '''
+    Returns the (N x 4) matrix of action-independent features of an (N x 3) array of observations.
+    '''
+    states = np.asarray(states, dtype=float).reshape(-1, 3)
+    return np.column_stack([np.ones(len(states)), states[:, 0] / 21.0, states[:, 1] / 10.0, states[:, 2]])
+
+  def f0_batch(self, player_sum, dealer_card, usable_ace, actions):
+    return 1.0
+
+  def f1_batch(self, player_sum, dealer_card, usable_ace, actions):
+    # Versão vetorizada de f1: mantenha as duas em sincronia.
+    return 0
+
   def f0(self, state, action):
     '''
     This is just the bias term.
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+import numpy as np
 
 class FeatureExtractor(ABC):
     def __init__(self, env):
@@ -12,6 +13,45 @@ class FeatureExtractor(ABC):
     def get_action_one_hot_encoded(self):
         pass
 
+    @abstractmethod
+    def get_num_state_features(self):
+        pass
+
+    @abstractmethod
+    def get_state_features(self, state):
+        '''
+        Returns action-independent features ψ(s), used by networks that output
+        Q(s,·) for every action in a single pass.
+        '''
+        pass
+
+    def get_features_all_actions(self, state):
+        '''
+        Returns Φ(s), the matrix with one row φ(s,a) per action, so that
+        Q(s,·) = Φ(s) · w is a single matrix-vector product.
+        Subclasses may override it with a faster implementation.
+        '''
+        return np.array([self.get_features(state, a) for a in range(self.get_num_actions())])
+
+    def get_features_batch(self, states, actions):
+        '''
+        Returns the (N × num_features) matrix whose row i is φ(states[i], actions[i]).
+        `states` is an array of observations as stored by the replay buffer (state ids,
+        or one row per observation tuple). Subclasses override it with NumPy expressions.
+        '''
+        return np.array([self.get_features(self._to_observation(s), int(a)) for s, a in zip(states, actions)])
+
+    def get_state_features_batch(self, states):
+        '''
+        Returns the (N × num_state_features) matrix whose row i is ψ(states[i]).
+        '''
+        return np.array([self.get_state_features(self._to_observation(s)) for s in states])
+
+    @staticmethod
+    def _to_observation(row):
+        row = np.asarray(row)
+        return tuple(row.tolist()) if row.ndim else row.item()
+
     # @abstractmethod
     # def get_terminal_states():
     #     pass
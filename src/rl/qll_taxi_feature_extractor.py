@@ -1,3 +1,5 @@
+import os
+from pathlib import Path
 import numpy as np
 from rl.qll_feature_extractor import FeatureExtractor
 
@@ -21,8 +23,17 @@ class TaxiFeatureExtractor(FeatureExtractor):
     - Exponential epsilon decay compatibility.
     - Scaled features with stronger contrast (tanh-based).
     - Bias-centered spatial coordinates for smoother gradients.
+
+    Optionally, the full φ(s,a) table (500 states × 6 actions) can be
+    precomputed once and memory-mapped from disk (see `enable_feature_cache`);
+    `get_features` then becomes an index lookup.
     """
 
+    # Bump whenever the features below change, so stale cache files are ignored.
+    FEATURES_VERSION = 1
+    _feature_table = None
+    _feature_table_path = None
+
     __actions_one_hot_encoding = {
         Actions.DOWN:  np.array([1, 0, 0, 0, 0, 0]),
         Actions.UP:    np.array([0, 1, 0, 0, 0, 0]),
@@ -60,6 +71,9 @@ class TaxiFeatureExtractor(FeatureExtractor):
     def get_num_features(self):
         return len(self.features_list) * self.get_num_actions()
 
+    def get_num_state_features(self):
+        return 14
+
     def get_actions(self):
         return [Actions.DOWN, Actions.UP, Actions.RIGHT, Actions.LEFT, Actions.PICK, Actions.DROP]
 
@@ -77,6 +91,144 @@ class TaxiFeatureExtractor(FeatureExtractor):
         Extracts feature vector φ(s,a) combining base features and
         one-hot action encoding (via Kronecker product).
         """
+        if self._feature_table is not None:
+            return self._feature_table[state * self.get_num_actions() + action]
+        return self._compute_features(state, action)
+
+    def get_features_all_actions(self, state):
+        """
+        Returns Φ(s) (num_actions × num_features), row a equal to get_features(state, a).
+        The state is decoded once and the base features of all actions are built together.
+        """
+        num_actions = self.get_num_actions()
+        if self._feature_table is not None:
+            return self._feature_table[state * num_actions:(state + 1) * num_actions]
+
+        l, c, p, d = self.env.unwrapped.decode(state)
+        locs = self.env.unwrapped.locs
+        passenger = (l, c) if p == 4 else special_locations_dict[p]
+        dest = locs[d]
+        actions = np.arange(num_actions)
+        pick = actions == Actions.PICK
+        drop = actions == Actions.DROP
+
+        base_f = np.empty((num_actions, len(self.features_list)), dtype=float)
+        base_f[:, 0] = 1.0
+        base_f[:, 1] = (l - 2) / 2.0
+        base_f[:, 2] = (c - 2) / 2.0
+        base_f[:, 3] = np.tanh((passenger[1] - c) / 2.0)
+        base_f[:, 4] = np.tanh((passenger[0] - l) / 2.0)
+        base_f[:, 5] = 1.0 / (self.__manhattanDistance((l, c), passenger) + 0.5)
+        base_f[:, 6] = 1.0 / (self.__manhattanDistance((l, c), dest) + 0.5)
+        base_f[:, 7] = pick & (p < 4 and (l, c) == locs[p])
+        base_f[:, 8] = drop & (p == 4 and (l, c) == dest)
+        base_f[:, 9] = (pick & (p == 4)) | (drop & (p < 4))
+        base_f[:, 10] = [self._is_wall_bump(l, c, a) for a in actions]
+        base_f = np.tanh(base_f * 5.0)
+
+        # Bloco diagonal: a linha a só ocupa o bloco de features da ação a (kron com one-hot)
+        full = np.zeros((num_actions, self.get_num_features()))
+        full.reshape(num_actions, num_actions, -1)[actions, actions] = base_f
+        return full
+
+    # ============================================================
+    # Versões em lote (arrays de ids de estado)
+    # ============================================================
+    def _decode_batch(self, states):
+        """Decodes state ids arithmetically: id = ((row·5 + col)·5 + passenger)·4 + destination."""
+        states = np.asarray(states, dtype=np.int64)
+        d = states % 4
+        p = (states // 4) % 5
+        c = (states // 20) % 5
+        l = states // 100
+        return l, c, p, d
+
+    def _base_state_columns(self, l, c, p, d):
+        """Action-free base features (before the tanh) and the passenger/destination checks."""
+        locs = np.asarray(self.env.unwrapped.locs)
+        special = np.array([special_locations_dict[i] for i in range(4)] + [(0, 0)])
+        in_taxi = p == 4
+        pass_row = np.where(in_taxi, l, special[p, 0])
+        pass_col = np.where(in_taxi, c, special[p, 1])
+        dest_row, dest_col = locs[d, 0], locs[d, 1]
+        pick_loc = locs[np.minimum(p, 3)]
+        at_passenger = ~in_taxi & (l == pick_loc[:, 0]) & (c == pick_loc[:, 1])
+        at_dest = in_taxi & (l == dest_row) & (c == dest_col)
+        columns = [
+            np.ones(l.shape),
+            (l - 2) / 2.0,
+            (c - 2) / 2.0,
+            np.tanh((pass_col - c) / 2.0),
+            np.tanh((pass_row - l) / 2.0),
+            1.0 / (np.abs(l - pass_row) + np.abs(c - pass_col) + 0.5),
+            1.0 / (np.abs(l - dest_row) + np.abs(c - dest_col) + 0.5),
+        ]
+        return columns, at_passenger, at_dest, in_taxi
+
+    def get_features_batch(self, states, actions):
+        """
+        Returns the (N × num_features) matrix whose row i is φ(states[i], actions[i]).
+        All eleven base features are computed as NumPy expressions over the batch.
+        """
+        states = np.asarray(states, dtype=np.int64)
+        actions = np.asarray(actions, dtype=np.int64)
+        num_actions = self.get_num_actions()
+        if self._feature_table is not None:
+            return self._feature_table[states * num_actions + actions]
+
+        l, c, p, d = self._decode_batch(states)
+        columns, at_passenger, at_dest, in_taxi = self._base_state_columns(l, c, p, d)
+        pick = actions == Actions.PICK
+        drop = actions == Actions.DROP
+        columns += [
+            pick & at_passenger,
+            drop & at_dest,
+            (pick & in_taxi) | (drop & ~in_taxi),
+            _wall_bump_table()[l, c, actions],
+        ]
+        base_f = np.tanh(np.stack(columns, axis=1) * 5.0)
+
+        # Bloco da ação a: equivale ao kron com o one-hot de a
+        full = np.zeros((states.shape[0], self.get_num_features()))
+        full.reshape(states.shape[0], num_actions, -1)[np.arange(states.shape[0]), actions] = base_f
+        return full
+
+    def get_state_features_batch(self, states):
+        """Returns the (N × 14) matrix whose row i is ψ(states[i])."""
+        l, c, p, d = self._decode_batch(states)
+        columns, at_passenger, at_dest, in_taxi = self._base_state_columns(l, c, p, d)
+        walls = _wall_bump_table()[l, c, :4]
+        state_f = np.column_stack(columns + [at_passenger, at_dest, in_taxi, walls])
+        return np.tanh(state_f * 5.0)
+
+    def get_state_features(self, state):
+        """
+        Action-independent features ψ(s): the action-free base features plus the
+        state conditions behind the action-specific ones (at the passenger, at the
+        destination with the passenger on board, passenger on board, walls around).
+        """
+        l, c, p, d = self.env.unwrapped.decode(state)
+        locs = self.env.unwrapped.locs
+        passenger = (l, c) if p == 4 else special_locations_dict[p]
+        dest = locs[d]
+        walls = [self._is_wall_bump(l, c, a)
+                 for a in (Actions.DOWN, Actions.UP, Actions.RIGHT, Actions.LEFT)]
+        state_f = np.array([
+            1.0,
+            (l - 2) / 2.0,
+            (c - 2) / 2.0,
+            np.tanh((passenger[1] - c) / 2.0),
+            np.tanh((passenger[0] - l) / 2.0),
+            1.0 / (self.__manhattanDistance((l, c), passenger) + 0.5),
+            1.0 / (self.__manhattanDistance((l, c), dest) + 0.5),
+            p < 4 and (l, c) == locs[p],
+            p == 4 and (l, c) == dest,
+            p == 4,
+            *walls,
+        ], dtype=float)
+        return np.tanh(state_f * 5.0)
+
+    def _compute_features(self, state, action):
         base_f = np.array([f(state, action) for f in self.features_list], dtype=float)
 
         # Amplia contraste e mantém estabilidade
@@ -90,6 +242,49 @@ class TaxiFeatureExtractor(FeatureExtractor):
 
         return full_vector
 
+    # ============================================================
+    # Cache de features (tabela φ(s,a) memory-mapped)
+    # ============================================================
+    def build_feature_table(self):
+        """Computes φ(s,a) for every pair; row index is state * num_actions + action."""
+        num_states = self.env.unwrapped.observation_space.n
+        num_actions = self.get_num_actions()
+        pairs = np.arange(num_states * num_actions)
+        return self.get_features_batch(pairs // num_actions, pairs % num_actions).astype(np.float32)
+
+    def feature_table_path(self, cache_dir):
+        num_states = self.env.unwrapped.observation_space.n
+        num_actions = self.get_num_actions()
+        filename = (f"taxi-features-v{self.FEATURES_VERSION}-"
+                    f"{num_states * num_actions}x{self.get_num_features()}.npy")
+        return Path(cache_dir) / filename
+
+    def enable_feature_cache(self, cache_dir):
+        """
+        Loads (building it on first use) the feature table stored in `cache_dir`.
+        The file is opened with mmap_mode="r", so parallel processes share one copy.
+        """
+        path = self.feature_table_path(cache_dir)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npy")
+            np.save(tmp_path, self.build_feature_table())
+            os.replace(tmp_path, path)  # atomic: concurrent builders never see a partial file
+        self._feature_table = np.load(path, mmap_mode="r")
+        self._feature_table_path = str(path)
+
+    def __getstate__(self):
+        # Pickles keep only the cache path; the table is re-mapped on load.
+        state = self.__dict__.copy()
+        state.pop("_feature_table", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        path = state.get("_feature_table_path")
+        if path and Path(path).exists():
+            self._feature_table = np.load(path, mmap_mode="r")
+
     # ============================================================
     # Features base
     # ============================================================
@@ -159,6 +354,10 @@ class TaxiFeatureExtractor(FeatureExtractor):
 
     def f_wall_bump(self, state, action):
         l, c, _, _ = self.env.unwrapped.decode(state)
+        return 1.0 if self._is_wall_bump(l, c, action) else 0.0
+
+    @staticmethod
+    def _is_wall_bump(l, c, action):
         border_bump = ((c == 0) and (action == Actions.LEFT)) or \
                       ((c == 4) and (action == Actions.RIGHT)) or \
                       ((l == 0) and (action == Actions.UP)) or \
@@ -169,7 +368,7 @@ class TaxiFeatureExtractor(FeatureExtractor):
                         ((l == 3) and (c == 1) and (action == Actions.LEFT)) or \
                         ((l == 3) and (c == 2) and (action == Actions.RIGHT)) or \
                         ((l == 3) and (c == 3) and (action == Actions.LEFT))
-        return 1.0 if (border_bump or internal_bump) else 0.0
+        return border_bump or internal_bump
 
     # ============================================================
     # Auxiliar
@@ -177,3 +376,15 @@ class TaxiFeatureExtractor(FeatureExtractor):
     @staticmethod
     def __manhattanDistance(xy1, xy2):
         return abs(xy1[0] - xy2[0]) + abs(xy1[1] - xy2[1])
+
+
+_WALL_BUMP_TABLE = None
+
+
+def _wall_bump_table():
+    """(row, col, action) -> bool table of `TaxiFeatureExtractor._is_wall_bump`, built once."""
+    global _WALL_BUMP_TABLE
+    if _WALL_BUMP_TABLE is None:
+        _WALL_BUMP_TABLE = np.array([[[TaxiFeatureExtractor._is_wall_bump(l, c, a) for a in range(6)]
+                                      for c in range(5)] for l in range(5)])
+    return _WALL_BUMP_TABLE
@@ -1,14 +1,23 @@
+import copy
 import random
-from pathlib import Path
+import time
+from multiprocessing import shared_memory
 from typing import Optional
 import numpy as np
+import gymnasium as gym
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
+import torch.multiprocessing as torch_mp
 import torch.optim as optim
-from collections import deque
-from timeit import default_timer as timer
+from time import perf_counter
 import pickle
+from rl.checkpoint import CheckpointMixin, load_checkpoint_file
 from rl.environment import Environment
+from rl.parallel import worker_thread_limit
+from rl.profiling import PhaseProfiler
+from rl.replay_buffer import PrioritizedReplayBuffer, ReplayBuffer, replay_buffer_from_state
+from rl.transition_queue import SharedTransitionQueue
 
 from rl.qll_taxi_feature_extractor import TaxiFeatureExtractor
 from rl.qll_blackjack_feature_extractor import BlackjackFeatureExtractor
@@ -38,14 +47,36 @@ class QNetwork(nn.Module):
         return self.net(x)
 
 
+class MultiHeadQNetwork(nn.Module):
+    """Rede ψ(s) -> Q(s,·): uma saída por ação, todas num único forward pass."""
+    def __init__(self, input_dim, num_actions, hidden_dim=64):
+        super().__init__()
+        self.net = nn.Sequential(
+            nn.Linear(input_dim, hidden_dim),
+            nn.ReLU(),
+            nn.Linear(hidden_dim, hidden_dim),
+            nn.ReLU(),
+            nn.Linear(hidden_dim, num_actions)
+        )
+
+    def forward(self, x):
+        return self.net(x)
+
+
+Q_HEADS = ("single", "multi")
+
+
 # ============================================================
 #  Agente DQN simplificado com Replay e vetorização
 # ============================================================
-class QLearningAgentNeural:
+class QLearningAgentNeural(CheckpointMixin):
     """
     Q-Learning com aproximação neural, experience replay
     e vetorização no cálculo de Q(s,a).
     """
+
+    agent_type = "neural"
+
     def __init__(self,
                  gym_env: Environment,
                  learning_rate: float,
@@ -60,7 +91,15 @@ class QLearningAgentNeural:
                  max_epsilon: float = 1.0,
                  checkpoint_dir: Optional[str] = None,
                  checkpoint_interval: Optional[int] = None,
-                 checkpoint_prefix: Optional[str] = None):
+                 checkpoint_prefix: Optional[str] = None,
+                 feature_cache_dir: Optional[str] = None,
+                 replay_store_features: bool = False,
+                 target_update_every: Optional[int] = None,
+                 q_head: str = "single",
+                 prioritized_replay: bool = False,
+                 priority_alpha: float = 0.6,
+                 priority_beta: float = 0.4,
+                 priority_beta_steps: int = 100000):
 
         self.env = gym_env
         env_name = getattr(self.env, "get_id", lambda: None)()
@@ -69,13 +108,33 @@ class QLearningAgentNeural:
             raise ValueError(f"Unsupported environment: {env_name}")
 
         self.fex = feature_extractors_dict[env_name](gym_env.env)
+        if feature_cache_dir:
+            if not hasattr(self.fex, "enable_feature_cache"):
+                raise ValueError(f"Feature cache not supported for environment: {env_name}")
+            self.fex.enable_feature_cache(feature_cache_dir)
         self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
 
-        input_dim = self.fex.get_num_features()
-        self.model = QNetwork(input_dim, hidden_dim).to(self.device)
+        if q_head not in Q_HEADS:
+            raise ValueError(f"Unsupported q_head: {q_head}. Choose from {list(Q_HEADS)}")
+        self.q_head = q_head
+        self.hidden_dim = hidden_dim
+        if q_head == "multi":
+            input_dim = self.fex.get_num_state_features()
+            self.model = MultiHeadQNetwork(input_dim, self.env.get_num_actions(), hidden_dim).to(self.device)
+        else:
+            input_dim = self.fex.get_num_features()
+            self.model = QNetwork(input_dim, hidden_dim).to(self.device)
         self.optimizer = optim.Adam(self.model.parameters(), lr=learning_rate)
         self.loss_fn = nn.SmoothL1Loss()  # Huber loss
 
+        # Rede alvo congelada (opcional), sincronizada a cada K atualizações
+        self.target_update_every = target_update_every if target_update_every and target_update_every > 0 else None
+        self.target_model = None
+        if self.target_update_every:
+            self.target_model = copy.deepcopy(self.model)
+            self.target_model.requires_grad_(False)
+        self.num_updates = 0
+
         self.gamma = gamma
         self.learning_rate = learning_rate
         self.epsilon = max_epsilon
@@ -83,18 +142,29 @@ class QLearningAgentNeural:
         self.min_epsilon = min_epsilon
         self.epsilon_decay_rate = epsilon_decay_rate
         self.epsilon_history = []
+        self.trained_episodes = 0
         self.steps = 0
-
-        # Replay buffer
-        self.replay_buffer = deque(maxlen=replay_size)
+        self.profiler = PhaseProfiler()
+        # Com um `rl.metrics.MetricsWriter`, os episódios vão para o arquivo em vez das listas
+        self.metrics_writer = None
+
+        # Replay buffer (arrays pré-alocados; opcionalmente guarda φ(s,a)).
+        # Com `prioritized_replay`, amostra proporcionalmente a |δ| via sum-tree.
+        replay_kwargs = {}
+        replay_cls = ReplayBuffer
+        if prioritized_replay:
+            replay_cls = PrioritizedReplayBuffer
+            replay_kwargs = {"alpha": priority_alpha, "beta": priority_beta, "beta_steps": priority_beta_steps}
+        self.replay_buffer = replay_cls(
+            replay_size,
+            state_shape=self._observation_shape(),
+            feature_dim=input_dim if replay_store_features else None,
+            **replay_kwargs,
+        )
         self.batch_size = batch_size
         self.train_every = train_every
-        self.checkpoint_interval = checkpoint_interval if checkpoint_interval and checkpoint_interval > 0 else None
-        self.checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir else None
         default_prefix = env_name.lower() if isinstance(env_name, str) else "checkpoint"
-        self.checkpoint_prefix = checkpoint_prefix or default_prefix
-        if self.checkpoint_dir:
-            self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        self.configure_checkpoints(checkpoint_dir, checkpoint_interval, checkpoint_prefix or default_prefix)
 
     # =========================================================
     # Seleção de ações
@@ -116,46 +186,104 @@ class QLearningAgentNeural:
     # Versão vetorizada do cálculo Q(s,a)
     # =========================================================
     def get_qvalues_vectorized(self, state):
-        actions = range(self.env.get_num_actions())
-        features = np.array([self.fex.get_features(state, a) for a in actions], dtype=np.float32)
+        features = np.asarray(self._all_actions_input(state), dtype=np.float32)
         x = torch.as_tensor(features, device=self.device)
         with torch.no_grad():
-            q_values = self.model(x).squeeze().cpu().numpy()
+            q_values = self.model(x).reshape(-1).cpu().numpy()
         return q_values
 
+    def _all_actions_input(self, state):
+        """Entrada da rede para avaliar Q(s,·): ψ(s) (multi) ou uma linha φ(s,a) por ação (single)."""
+        if self.q_head == "multi":
+            return self.fex.get_state_features(state)
+        return self.fex.get_features_all_actions(state)
+
+    def _transition_input(self, state, action):
+        """Entrada da rede associada à transição (s, a), guardada no replay quando solicitado."""
+        if self.q_head == "multi":
+            return self.fex.get_state_features(state)
+        return self.fex.get_features(state, action)
+
+    def _transition_input_batch(self, states, actions):
+        """`_transition_input` for a minibatch, with states as stored in the replay buffer."""
+        if self.q_head == "multi":
+            return self.fex.get_state_features_batch(states)
+        return self.fex.get_features_batch(states, actions)
+
     # =========================================================
     # Replay buffer e atualização
     # =========================================================
+    def _observation_shape(self):
+        space = self.env.env.observation_space
+        if isinstance(space, gym.spaces.Tuple):
+            return (len(space.spaces),)
+        return space.shape
+
     def store_transition(self, s, a, r, s2, done):
-        self.replay_buffer.append((s, a, r, s2, done))
+        features = self._transition_input(s, a) if self.replay_buffer.stores_features else None
+        self.replay_buffer.add(s, a, r, s2, done, features)
 
     def update_from_replay(self):
         if len(self.replay_buffer) < self.batch_size:
             return
 
-        batch = random.sample(self.replay_buffer, self.batch_size)
-        states, actions, rewards, next_states, dones = zip(*batch)
+        batch = self.replay_buffer.sample(self.batch_size)
 
-        features = np.array([self.fex.get_features(s, a) for s, a in zip(states, actions)], dtype=np.float32)
-        x = torch.as_tensor(features, device=self.device)
-        rewards = torch.as_tensor(rewards, dtype=torch.float32, device=self.device)
-        dones = torch.as_tensor(dones, dtype=torch.bool, device=self.device)
+        if self.replay_buffer.stores_features:
+            features = batch["features"]
+        else:
+            features = self._transition_input_batch(batch["states"], batch["actions"])
+        x = torch.as_tensor(np.asarray(features, dtype=np.float32), device=self.device)
+        actions = torch.as_tensor(batch["actions"], device=self.device)
+        rewards = torch.as_tensor(batch["rewards"], device=self.device)
+        dones = torch.as_tensor(batch["dones"], device=self.device)
 
-        # Alvos TD
+        # Alvos TD: tensor (batch × ações × features) e um único forward pass
         with torch.no_grad():
-            next_values = torch.as_tensor(
-                [self.get_value(s2) for s2 in next_states],
-                dtype=torch.float32, device=self.device
-            )
+            next_values = self._max_next_qvalues(batch["next_states"])
             targets = rewards + self.gamma * next_values * (~dones)
 
         self.optimizer.zero_grad()
-        q_preds = self.model(x).squeeze()
-        loss = self.loss_fn(q_preds, targets)
+        q_preds = self._predict_taken(x, actions)
+        if "weights" in batch:
+            # Replay priorizado: Huber ponderado pelos pesos de importância
+            weights = torch.as_tensor(batch["weights"], device=self.device)
+            loss = (weights * F.smooth_l1_loss(q_preds, targets, reduction="none")).mean()
+            td_errors = (targets - q_preds).detach().cpu().numpy()
+            self.replay_buffer.update_priorities(batch["indices"], td_errors)
+        else:
+            loss = self.loss_fn(q_preds, targets)
         loss.backward()
         torch.nn.utils.clip_grad_norm_(self.model.parameters(), max_norm=5.0)
         self.optimizer.step()
 
+        self.num_updates += 1
+        if self.target_model is not None and self.num_updates % self.target_update_every == 0:
+            self.sync_target_network()
+
+    def _predict_taken(self, x, actions):
+        """Q(s,a) das ações efetivamente tomadas no minibatch."""
+        if self.q_head == "multi":
+            return self.model(x).gather(1, actions.unsqueeze(1)).squeeze(1)
+        return self.model(x).squeeze(-1)
+
+    def _max_next_qvalues(self, next_states):
+        """max_a' Q(s',a') para o minibatch (estados como no replay), usando a rede alvo quando houver."""
+        net = self.target_model if self.target_model is not None else self.model
+        batch_size = len(next_states)
+        if self.q_head == "multi":
+            inputs = self.fex.get_state_features_batch(next_states)
+            return net(torch.as_tensor(np.asarray(inputs, dtype=np.float32), device=self.device)).max(dim=1).values
+        # Uma linha φ(s', a') por par (estado, ação): (batch · ações) × features
+        num_actions = self.env.get_num_actions()
+        inputs = self.fex.get_features_batch(np.repeat(next_states, num_actions, axis=0),
+                                             np.tile(np.arange(num_actions), batch_size))
+        x = torch.as_tensor(np.asarray(inputs, dtype=np.float32), device=self.device)
+        return net(x).view(batch_size, -1).max(dim=1).values
+
+    def sync_target_network(self):
+        self.target_model.load_state_dict(self.model.state_dict())
+
     # =========================================================
     # Treinamento
     # =========================================================
@@ -163,11 +291,22 @@ class QLearningAgentNeural:
         rewards_per_episode = []
         penalties_per_episode = []
         cumulative_success = []
+        steps_per_episode = []
         successful_episodes = 0
-        start_time = timer()
-
-        for episode in range(num_episodes):
+        prof = self.profiler
+        prof.start()
+        updates_at_start = self.num_updates
+        start_time = perf_counter()
+        updates_at_log = self.num_updates
+
+        # Continua a contagem de episódios (e o decaimento de ε) entre chamadas
+        start_episode = self.trained_episodes
+        end_episode = start_episode + num_episodes
+        for episode in range(start_episode, end_episode):
+            timed = prof.begin_episode()
+            if timed: t0 = perf_counter()
             state, _ = self.env.reset()
+            if timed: prof.lap_episode("env_reset", t0)
             terminated = truncated = False
             total_reward = 0
             total_penalties = 0
@@ -175,96 +314,341 @@ class QLearningAgentNeural:
 
             while not (terminated or truncated) and self.steps < max_steps_per_episode:
                 self.steps += 1
+                timed = prof.begin_step()
+                if timed: t0 = perf_counter()
                 action = self.choose_action(state)
+                if timed: t0 = prof.lap("choose_action", t0)
                 next_state, reward, terminated, truncated, _ = self.env.step(action)
+                if timed: t0 = prof.lap("env_step", t0)
                 done = terminated or truncated
 
                 if reward == -10:
                     total_penalties += 1
 
                 self.store_transition(state, action, reward, next_state, done)
+                if timed: t0 = prof.lap("store_transition", t0)
 
                 # Atualiza modelo a cada N passos
                 if self.steps % self.train_every == 0:
                     self.update_from_replay()
+                    if timed: prof.lap("update_from_replay", t0)
 
                 total_reward += reward
                 state = next_state
 
             # Decaimento exponencial de epsilon
-            self.epsilon = self.min_epsilon + (self.max_epsilon - self.min_epsilon) * \
-                           np.exp(-self.epsilon_decay_rate * episode)
-            self.epsilon_history.append(self.epsilon)
+            self.epsilon = self._epsilon_at(episode)
 
             if terminated:
                 successful_episodes += 1
-
-            rewards_per_episode.append(total_reward)
-            penalties_per_episode.append(total_penalties)
-            cumulative_success.append(successful_episodes)
+            self.trained_episodes = episode + 1
+
+            writer = getattr(self, "metrics_writer", None)
+            if writer is not None:
+                writer.write(episode=episode, reward=total_reward, penalties=total_penalties,
+                             steps=self.steps, epsilon=self.epsilon, success=int(terminated))
+            else:
+                self.epsilon_history.append(self.epsilon)
+                rewards_per_episode.append(total_reward)
+                penalties_per_episode.append(total_penalties)
+                cumulative_success.append(successful_episodes)
+                steps_per_episode.append(self.steps)
             self._maybe_checkpoint(episode)
 
             if episode % 50 == 0:
-                elapsed = timer() - start_time
-                print(f"Episode {episode}/{num_episodes} ({successful_episodes} successful)")
+                print(f"Episode {episode}/{end_episode} ({successful_episodes} successful)")
                 print(f"\tTotal reward: {total_reward}")
                 print(f"\tEpsilon: {self.epsilon:.4f}")
-                print(f"\tReplay size: {len(self.replay_buffer)}")
+                print(f"\tReplay size: {len(self.replay_buffer)} "
+                      f"({self.replay_buffer.nbytes / 2**20:.1f} MiB allocated)")
+                elapsed = perf_counter() - start_time
+                updates = self.num_updates - updates_at_log
+                print(f"\tUpdates: {updates} ({updates / max(elapsed, 1e-9):.1f} updates/s)")
                 print(f"\tElapsed: {elapsed:.2f}s\n")
-                start_time = timer()
+                start_time = perf_counter()
+                updates_at_log = self.num_updates
+
+        prof.count("gradient_updates", self.num_updates - updates_at_start)
+        prof.stop()
 
         return {
             "penalties": penalties_per_episode,
             "rewards": rewards_per_episode,
             "successes": cumulative_success,
             "epsilons": list(self.epsilon_history),
+            "steps": steps_per_episode,
         }
 
     # =========================================================
-    # Utilitários
+    # Treinamento assíncrono: atores + aprendiz
     # =========================================================
-    def _should_checkpoint(self, episode: int) -> bool:
-        return (
-            self.checkpoint_dir is not None
-            and self.checkpoint_interval is not None
-            and (episode + 1) % self.checkpoint_interval == 0
-        )
-
-    def _checkpoint_path(self, episode: int) -> Path:
-        filename = f"{self.checkpoint_prefix}-ep{episode + 1:05d}.pkl"
-        if self.checkpoint_dir is None:
-            raise RuntimeError("Checkpoint directory not configured")
-        return self.checkpoint_dir / filename
-
-    def _maybe_checkpoint(self, episode: int) -> None:
-        if not self._should_checkpoint(episode):
-            return
-        path = self._checkpoint_path(episode)
-        self.save(path)
+    def _epsilon_at(self, episode: int) -> float:
+        return self.min_epsilon + (self.max_epsilon - self.min_epsilon) * np.exp(-self.epsilon_decay_rate * episode)
+
+    def _publish_policy(self, shared_model, version) -> None:
+        with version.get_lock():
+            with torch.no_grad():
+                for shared, param in zip(shared_model.parameters(), self.model.parameters()):
+                    shared.copy_(param.detach().cpu())
+            version.value += 1
+
+    def _drain_actor_queues(self, queues) -> int:
+        to_obs = self.replay_buffer.to_observation
+        received = 0
+        for queue in queues:
+            batch = queue.drain()
+            for s, a, r, s2, d in zip(batch["states"], batch["actions"].tolist(), batch["rewards"].tolist(),
+                                      batch["next_states"], batch["dones"].tolist()):
+                self.store_transition(to_obs(s), a, r, to_obs(s2), d)
+            received += len(batch["actions"])
+        return received
+
+    def train_actor_learner(self, num_episodes: int, actors: int = 1, max_steps_per_episode: int = 500,
+                            publish_every: int = 50, updates_per_step: Optional[float] = None,
+                            queue_capacity: int = 2048, seed=None):
+        """
+        Asynchronous training: `actors` processes play episodes with a copy of the
+        policy and push transitions through shared-memory queues, while this
+        process (the learner) drains them into the replay buffer and runs
+        `update_from_replay` continuously.
+
+        The learner publishes its weights to a shared model every `publish_every`
+        updates; actors refresh their copy before each episode when a new version
+        is available. Episode numbers come from a shared counter, so ε follows the
+        same schedule as ``train``. Actors block while their queue holds
+        `queue_capacity` transitions, so they cannot run far ahead of the learner.
+        `updates_per_step` optionally caps the number of
+        updates per received transition (None: no cap). Returns the usual
+        per-episode lists plus a ``throughput`` entry (env steps/s and updates/s).
+        """
+        if actors < 1 or publish_every < 1:
+            raise ValueError("actors and publish_every must be positive")
+        if seed is None:
+            seed = int(np.random.randint(2**31 - actors))
+        start_episode = self.trained_episodes
+        end_episode = start_episode + num_episodes
+        updates_at_start = self.num_updates
+
+        ctx = torch_mp.get_context("spawn")
+        counter = ctx.Value("q", start_episode)
+        version = ctx.Value("q", 0)
+        shared_model = copy.deepcopy(self.model).cpu().share_memory()
+        queues = [SharedTransitionQueue(queue_capacity, self._observation_shape()) for _ in range(actors)]
+        # Colunas: reward, penalties, steps, epsilon, success
+        results_shm = shared_memory.SharedMemory(create=True, size=max(1, num_episodes) * 5 * 8)
+        processes = []
+        try:
+            results = np.ndarray((num_episodes, 5), dtype=np.float64, buffer=results_shm.buf)
+            config = {
+                "env": self.env,
+                "hidden_dim": self.hidden_dim,
+                "q_head": self.q_head,
+                "min_epsilon": self.min_epsilon,
+                "max_epsilon": self.max_epsilon,
+                "epsilon_decay_rate": self.epsilon_decay_rate,
+                "max_steps": max_steps_per_episode,
+                "results_name": results_shm.name,
+                "start_episode": start_episode,
+                "end_episode": end_episode,
+            }
+            start = time.perf_counter()
+            with worker_thread_limit(1):
+                processes = [ctx.Process(target=_actor_worker,
+                                         args=(config, shared_model, version, counter, queues[i], seed + i))
+                             for i in range(actors)]
+                for process in processes:
+                    process.start()
+
+            env_steps = 0
+            last_report = start
+            while True:
+                running = any(p.is_alive() for p in processes)
+                received = self._drain_actor_queues(queues)
+                env_steps += received
+                if not running and not received:
+                    # Atores encerrados e filas vazias: sem limite de atualizações,
+                    # o aprendiz não pode continuar treinando indefinidamente
+                    break
+                budget = updates_per_step is None or \
+                    self.num_updates - updates_at_start < updates_per_step * env_steps
+                if len(self.replay_buffer) >= self.batch_size and budget:
+                    self.update_from_replay()
+                    if (self.num_updates - updates_at_start) % publish_every == 0:
+                        self._publish_policy(shared_model, version)
+                elif not received:
+                    time.sleep(1e-3)
+                if time.perf_counter() - last_report >= 10.0:
+                    last_report = time.perf_counter()
+                    print(f"Episodes started: {min(counter.value, end_episode)}/{end_episode} ({actors} actors) | "
+                          f"Env steps: {env_steps} | Updates: {self.num_updates - updates_at_start}")
+            elapsed = time.perf_counter() - start
+            failed = [p.exitcode for p in processes if p.exitcode != 0]
+            if failed:
+                raise RuntimeError(f"Actor processes exited with codes {failed}")
+
+            history = {"penalties": [], "rewards": [], "successes": [], "epsilons": [], "steps": []}
+            successful_episodes = 0
+            writer = getattr(self, "metrics_writer", None)
+            for i, (total_reward, penalties, steps, epsilon, success) in enumerate(results):
+                episode = start_episode + i
+                self.epsilon = float(epsilon)
+                successful_episodes += int(success)
+                if writer is not None:
+                    writer.write(episode=episode, reward=total_reward, penalties=int(penalties),
+                                 steps=int(steps), epsilon=self.epsilon, success=int(success))
+                else:
+                    self.epsilon_history.append(self.epsilon)
+                    history["rewards"].append(total_reward)
+                    history["penalties"].append(int(penalties))
+                    history["successes"].append(successful_episodes)
+                    history["steps"].append(int(steps))
+            self.trained_episodes = end_episode
+            del results  # a visão precisa sumir antes de fechar o segmento
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+            results_shm.close()
+            results_shm.unlink()
+            for queue in queues:
+                queue.close()
+
+        updates = self.num_updates - updates_at_start
+        history["epsilons"] = list(self.epsilon_history)
+        history["throughput"] = {
+            "actors": actors,
+            "seconds": elapsed,
+            "env_steps": env_steps,
+            "updates": updates,
+            "env_steps_per_sec": env_steps / elapsed if elapsed > 0 else 0.0,
+            "updates_per_sec": updates / elapsed if elapsed > 0 else 0.0,
+        }
+        print(f"Actor/learner: {env_steps} env steps ({history['throughput']['env_steps_per_sec']:.0f}/s), "
+              f"{updates} updates ({history['throughput']['updates_per_sec']:.1f}/s) in {elapsed:.2f}s")
+        return history
 
-    def save(self, filename):
+    # =========================================================
+    # Utilitários
+    # =========================================================
+    def _checkpoint_state(self):
+        state = self._save_dict(include_replay=True)
+        state["epsilon_history"] = list(self.epsilon_history)
+        state["num_updates"] = self.num_updates
+        return state
+
+    def _restore_checkpoint_state(self, state):
+        self._load_save_dict(state)
+        self.epsilon_history = list(state["epsilon_history"])
+        self.num_updates = state["num_updates"]
+
+    def _save_dict(self, include_replay=False):
+        checkpoint = {
+            "model_state": self.model.state_dict(),
+            "optimizer_state": self.optimizer.state_dict(),
+            "epsilon": self.epsilon,
+            "params": {
+                "gamma": self.gamma,
+                "learning_rate": self.learning_rate,
+                "epsilon_decay_rate": self.epsilon_decay_rate,
+                "hidden_dim": self.hidden_dim,
+                "q_head": self.q_head,
+            }
+        }
+        if self.target_model is not None:
+            checkpoint["target_model_state"] = self.target_model.state_dict()
+            checkpoint["params"]["target_update_every"] = self.target_update_every
+        if isinstance(self.replay_buffer, PrioritizedReplayBuffer):
+            checkpoint["params"]["prioritized_replay"] = {
+                "priority_alpha": self.replay_buffer.alpha,
+                "priority_beta": self.replay_buffer.beta_start,
+                "priority_beta_steps": self.replay_buffer.beta_steps,
+            }
+        if include_replay:
+            checkpoint["replay_buffer"] = self.replay_buffer.state_dict()
+        return checkpoint
+
+    def _load_save_dict(self, checkpoint):
+        self.model.load_state_dict(checkpoint["model_state"])
+        if self.target_model is not None and "target_model_state" in checkpoint:
+            self.target_model.load_state_dict(checkpoint["target_model_state"])
+        self.optimizer.load_state_dict(checkpoint["optimizer_state"])
+        self.epsilon = checkpoint["epsilon"]
+        replay_state = checkpoint.get("replay_buffer")
+        if replay_state is not None:
+            self.replay_buffer = replay_buffer_from_state(replay_state)
+
+    def save(self, filename, include_replay=False):
         with open(filename, "wb") as f:
-            pickle.dump({
-                "model_state": self.model.state_dict(),
-                "optimizer_state": self.optimizer.state_dict(),
-                "epsilon": self.epsilon,
-                "params": {
-                    "gamma": self.gamma,
-                    "learning_rate": self.learning_rate,
-                    "epsilon_decay_rate": self.epsilon_decay_rate
-                }
-            }, f)
+            pickle.dump(self._save_dict(include_replay), f)
 
     @staticmethod
     def load_agent(filename, gym_env):
-        checkpoint = pickle.load(open(filename, "rb"))
+        """Loads a saved model, or the model inside a training checkpoint (`.ckpt`)."""
+        with open(filename, "rb") as f:
+            checkpoint = pickle.load(f)
+        if checkpoint.get("format") == "rl-checkpoint":
+            checkpoint = load_checkpoint_file(filename)["state"]
         agent = QLearningAgentNeural(
             gym_env=gym_env,
             epsilon_decay_rate=checkpoint["params"]["epsilon_decay_rate"],
             learning_rate=checkpoint["params"]["learning_rate"],
-            gamma=checkpoint["params"]["gamma"]
+            gamma=checkpoint["params"]["gamma"],
+            target_update_every=checkpoint["params"].get("target_update_every"),
+            hidden_dim=checkpoint["params"].get("hidden_dim", 64),
+            q_head=checkpoint["params"].get("q_head", "single"),
+            prioritized_replay="prioritized_replay" in checkpoint["params"],
+            **checkpoint["params"].get("prioritized_replay", {}),
         )
-        agent.model.load_state_dict(checkpoint["model_state"])
-        agent.optimizer.load_state_dict(checkpoint["optimizer_state"])
-        agent.epsilon = checkpoint["epsilon"]
+        agent._load_save_dict(checkpoint)
         return agent
+
+
+def _actor_worker(config: dict, shared_model, version, counter, queue: SharedTransitionQueue, seed: int) -> None:
+    """Body of one actor process of `train_actor_learner`: plays episodes until the shared counter runs out."""
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+    env = config["env"]
+    env.env.reset(seed=seed)
+    env.env.action_space.seed(seed)
+    agent = QLearningAgentNeural(env, learning_rate=0.0, gamma=0.0, hidden_dim=config["hidden_dim"],
+                                 replay_size=1, device="cpu", epsilon_decay_rate=config["epsilon_decay_rate"],
+                                 min_epsilon=config["min_epsilon"], max_epsilon=config["max_epsilon"],
+                                 q_head=config["q_head"])
+    results_shm = shared_memory.SharedMemory(name=config["results_name"])
+    local_version = -1
+    try:
+        num_episodes = config["end_episode"] - config["start_episode"]
+        results = np.ndarray((num_episodes, 5), dtype=np.float64, buffer=results_shm.buf)
+        while True:
+            with counter.get_lock():
+                episode = counter.value
+                counter.value += 1
+            if episode >= config["end_episode"]:
+                break
+            if version.value != local_version:
+                with version.get_lock():
+                    agent.model.load_state_dict(shared_model.state_dict())
+                    local_version = version.value
+
+            # Mesmo ε que o treino serial usaria neste episódio
+            agent.epsilon = agent._epsilon_at(episode - 1) if episode > 0 else agent.max_epsilon
+            state, _ = env.reset()
+            terminated = truncated = False
+            total_reward, penalties, steps = 0.0, 0, 0
+            while not (terminated or truncated) and steps < config["max_steps"]:
+                steps += 1
+                action = agent.choose_action(state)
+                next_state, reward, terminated, truncated, _ = env.step(action)
+                if reward == -10:
+                    penalties += 1
+                queue.put(state, action, reward, next_state, terminated or truncated)
+                total_reward += reward
+                state = next_state
+            results[episode - config["start_episode"]] = (total_reward, penalties, steps,
+                                                          agent._epsilon_at(episode), int(terminated))
+        del results
+    finally:
+        results_shm.close()
+        queue.close()
@@ -1,16 +1,84 @@
 import numpy as np
 import pickle
 import logging
-from timeit import default_timer as timer
+import multiprocessing
+import random
+from multiprocessing import shared_memory
+from time import perf_counter
+import gymnasium as gym
+from rl.checkpoint import CheckpointMixin
 from rl.environment import Environment
+from rl.model_io import save_model_npz
+from rl.parallel import worker_thread_limit
+from rl.profiling import PhaseProfiler
 
 logger = logging.getLogger(__name__)
 
-class QLearningAgentTabular:
+
+class SparseEligibilityTraces:
+    """
+    Replacing eligibility traces for the (s, a) pairs visited since the last cut.
+
+    Only pairs whose trace is at least `cutoff` are kept, in parallel arrays of
+    states, actions and trace values, so decaying and applying the traces costs
+    O(active pairs) instead of a sweep over the whole Q-table. With decay γλ < 1
+    at most ``log(cutoff) / log(γλ)`` pairs are ever active.
+    """
+
+    def __init__(self, cutoff: float = 1e-3, capacity: int = 64):
+        self.cutoff = cutoff
+        self.states = np.zeros(capacity, dtype=np.int64)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.values = np.zeros(capacity)
+        self.size = 0
+
+    def clear(self) -> None:
+        self.size = 0
+
+    def mark(self, state: int, action: int) -> None:
+        """e(s,a) ← 1 (replacing trace)."""
+        n = self.size
+        hit = np.flatnonzero((self.states[:n] == state) & (self.actions[:n] == action))
+        if hit.size:
+            self.values[hit[0]] = 1.0
+            return
+        if n == self.states.size:
+            self.states = np.resize(self.states, 2 * n)
+            self.actions = np.resize(self.actions, 2 * n)
+            self.values = np.resize(self.values, 2 * n)
+        self.states[n], self.actions[n], self.values[n] = state, action, 1.0
+        self.size = n + 1
+
+    def apply(self, q_table: np.ndarray, step: float) -> None:
+        """Q(s,a) += step · e(s,a) for every active pair (pairs are unique, so fancy indexing is safe)."""
+        n = self.size
+        q_table[self.states[:n], self.actions[:n]] += step * self.values[:n]
+
+    def decay(self, factor: float) -> None:
+        """e ← factor · e, dropping the pairs that fall below `cutoff`."""
+        n = self.size
+        values = self.values[:n]
+        values *= factor
+        keep = values >= self.cutoff
+        kept = int(np.count_nonzero(keep))
+        if kept < n:
+            self.states[:kept] = self.states[:n][keep]
+            self.actions[:kept] = self.actions[:n][keep]
+            self.values[:kept] = values[keep]
+            self.size = kept
+
+
+class QLearningAgentTabular(CheckpointMixin):
     """
     Q-Learning agent for discrete environments.
+
+    With ``trace_lambda > 0`` the serial `train` runs Watkins's Q(λ): each TD
+    error is applied to every recently visited (s, a) pair through sparse
+    eligibility traces, which are cut whenever an exploratory action is taken.
     """
 
+    agent_type = "tabular"
+
     def __init__(
         self, 
         env: Environment, 
@@ -19,8 +87,12 @@ class QLearningAgentTabular:
         epsilon_decay_rate: float, 
         min_epsilon: float = 0.01,
         max_epsilon: float = 1.0,
-        verbose: bool = True
+        verbose: bool = True,
+        trace_lambda: float = 0.0,
+        trace_cutoff: float = 1e-3
     ):
+        if not 0.0 <= trace_lambda <= 1.0:
+            raise ValueError("trace_lambda must be in [0, 1]")
         self.env = env
         self.q_table = np.zeros((env.get_num_states(), env.get_num_actions()))
         self.epsilon = max_epsilon
@@ -29,8 +101,14 @@ class QLearningAgentTabular:
         self.decay_rate = epsilon_decay_rate
         self.learning_rate = learning_rate
         self.gamma = gamma
+        self.trace_lambda = trace_lambda
+        self.trace_cutoff = trace_cutoff
         self.epsilons_ = []
+        self.trained_episodes = 0
         self.verbose = verbose
+        self.profiler = PhaseProfiler()
+        # Com um `rl.metrics.MetricsWriter`, os episódios vão para o arquivo em vez de `history`
+        self.metrics_writer = None
         self.history = {
             "rewards": [],
             "penalties": [],
@@ -47,28 +125,58 @@ class QLearningAgentTabular:
             return np.random.randint(self.env.get_num_actions())
         return np.argmax(self.q_table[state, :])
 
-    def update(self, state: int, action: int, reward: float, next_state: int) -> None:
-        """Q(s,a) ← Q(s,a) + α [r + γ max_a' Q(s',a') − Q(s,a)]"""
-        best_next_q = np.max(self.q_table[next_state, :])
+    def update(self, state: int, action: int, reward: float, next_state: int, terminated: bool = False) -> None:
+        """
+        Q(s,a) ← Q(s,a) + α [r + γ max_a' Q(s',a') − Q(s,a)], with no bootstrap
+        when s' is terminal (same rule as `update_batch` and the linear agent).
+        """
+        best_next_q = 0.0 if terminated else np.max(self.q_table[next_state, :])
         td_target = reward + self.gamma * best_next_q
         td_error = td_target - self.q_table[state, action]
         self.q_table[state, action] += self.learning_rate * td_error
 
+    def _epsilon_at(self, episode: int) -> float:
+        return self.min_epsilon + (self.max_epsilon - self.min_epsilon) * np.exp(-self.decay_rate * episode)
+
     def _epsilon_decay(self, episode: int) -> None:
-        self.epsilon = self.min_epsilon + (self.max_epsilon - self.min_epsilon) * \
-                       np.exp(-self.decay_rate * episode)
-        self.epsilons_.append(self.epsilon)
+        self.epsilon = self._epsilon_at(episode)
+        if getattr(self, "metrics_writer", None) is None:
+            self.epsilons_.append(self.epsilon)
+
+    def _record_episode(self, episode: int, total_reward: float, penalties: int, steps: int) -> None:
+        writer = getattr(self, "metrics_writer", None)
+        if writer is not None:
+            writer.write(episode=episode, reward=total_reward, penalties=penalties, steps=steps,
+                         epsilon=self.epsilon)
+            return
+        self.history["rewards"].append(total_reward)
+        self.history["penalties"].append(penalties)
+        self.history["steps"].append(steps)
+
+    def _get_profiler(self) -> PhaseProfiler:
+        if getattr(self, "profiler", None) is None:
+            self.profiler = PhaseProfiler()  # agentes salvos antes do profiler
+        return self.profiler
 
     def _run_episode(self, episode: int):
+        prof = self.profiler
+        timed = prof.begin_episode()
+        if timed: t0 = perf_counter()
         state, _ = self.env.reset()
         state = self.env.get_state_id(state)
+        if timed: prof.lap_episode("env_reset", t0)
         total_reward, penalties, steps = 0.0, 0, 0
 
         while True:
+            timed = prof.begin_step()
+            if timed: t0 = perf_counter()
             action = self.choose_action(state)
+            if timed: t0 = prof.lap("choose_action", t0)
             next_state, reward, terminated, truncated, _ = self.env.step(action)
             next_state = self.env.get_state_id(next_state)
-            self.update(state, action, reward, next_state)
+            if timed: t0 = prof.lap("env_step", t0)
+            self.update(state, action, reward, next_state, terminated)
+            if timed: prof.lap("update", t0)
 
             total_reward += reward
             if reward < 0:
@@ -82,29 +190,79 @@ class QLearningAgentTabular:
 
         return total_reward, penalties, steps
 
+    def _run_episode_watkins(self, episode: int):
+        """One episode of Watkins's Q(λ) with sparse replacing traces."""
+        prof = self.profiler
+        traces = SparseEligibilityTraces(self.trace_cutoff)
+        decay = self.gamma * self.trace_lambda
+        timed = prof.begin_episode()
+        if timed: t0 = perf_counter()
+        state, _ = self.env.reset()
+        state = self.env.get_state_id(state)
+        if timed: prof.lap_episode("env_reset", t0)
+        action = self.choose_action(state)
+        total_reward, penalties, steps = 0.0, 0, 0
+
+        while True:
+            timed = prof.begin_step()
+            if timed: t0 = perf_counter()
+            next_state, reward, terminated, truncated, _ = self.env.step(action)
+            next_state = self.env.get_state_id(next_state)
+            if timed: t0 = prof.lap("env_step", t0)
+            # A próxima ação é escolhida antes da atualização: se for exploratória, o traço é cortado
+            next_action = self.choose_action(next_state)
+            next_q = self.q_table[next_state]
+            greedy = next_q[next_action] == next_q.max()  # empates contam como gulosos
+            if timed: t0 = prof.lap("choose_action", t0)
+
+            best_next_q = 0.0 if terminated else next_q.max()
+            td_error = reward + self.gamma * best_next_q - self.q_table[state, action]
+            traces.mark(state, action)
+            traces.apply(self.q_table, self.learning_rate * td_error)
+            if greedy:
+                traces.decay(decay)
+            else:
+                traces.clear()
+            if timed: prof.lap("update", t0)
+
+            total_reward += reward
+            if reward < 0:
+                penalties += 1
+            steps += 1
+            state, action = next_state, next_action
+
+            if terminated or truncated:
+                self._epsilon_decay(episode)
+                break
+
+        return total_reward, penalties, steps
+
     def train(self, num_episodes: int):
-        start_time = timer()
+        prof = self._get_profiler()
+        prof.start()
         if self.verbose:
             print("\n===========================================")
             print("Q-table before training:")
             print(self.q_table)
 
-        for episode in range(num_episodes):
-            total_reward, penalties, steps = self._run_episode(episode)
-            self.history["rewards"].append(total_reward)
-            self.history["penalties"].append(penalties)
-            self.history["steps"].append(steps)
+        # Continua o escalonamento de ε de onde um treinamento anterior parou
+        start_episode = getattr(self, "trained_episodes", 0)
+        end_episode = start_episode + num_episodes
+        run_episode = self._run_episode_watkins if getattr(self, "trace_lambda", 0.0) > 0 else self._run_episode
+        for episode in range(start_episode, end_episode):
+            total_reward, penalties, steps = run_episode(episode)
+            self._record_episode(episode, total_reward, penalties, steps)
+            self.trained_episodes = episode + 1
+            self._maybe_checkpoint(episode)
 
             if self.verbose and episode % 100 == 0:
-                elapsed = timer() - start_time
-                print(f"Episode {episode}/{num_episodes}")
+                print(f"Episode {episode}/{end_episode}")
                 print(f"\tSteps: {steps}")
                 print(f"\tReward: {total_reward:.2f}")
                 print(f"\tPenalties: {penalties}")
                 print(f"\tEpsilon: {self.epsilon:.4f}")
-                print(f"\tElapsed: {elapsed:.2f}s")
-                start_time = timer()
 
+        prof.stop()
         if self.verbose:
             print("\n===========================================")
             print("Q-table after training:")
@@ -112,7 +270,243 @@ class QLearningAgentTabular:
 
         return self.history
 
+    # =========================================================
+    # Treinamento vetorizado (gymnasium.vector)
+    # =========================================================
+    def _vector_state_ids(self, observations) -> np.ndarray:
+        """Maps a batch of vector-env observations to Q-table row ids."""
+        if hasattr(self.env, "get_state_ids"):
+            return self.env.get_state_ids(observations)
+        if isinstance(observations, tuple):
+            # Tuple spaces (e.g. Blackjack) come back as one array per component.
+            states = zip(*(np.asarray(component).tolist() for component in observations))
+            return np.fromiter((self.env.get_state_id(s) for s in states), dtype=np.int64)
+        return np.fromiter((self.env.get_state_id(s) for s in np.asarray(observations).tolist()),
+                           dtype=np.int64)
+
+    @staticmethod
+    def _autoreset_same_step(vec_env) -> bool:
+        """True when the vector env returns the reset obs in the same step as the episode end."""
+        mode = vec_env.metadata.get("autoreset_mode")
+        if mode is None:
+            # gymnasium < 1.0 resets in the same step; 1.0 resets on the next step.
+            return int(gym.__version__.split(".")[0]) < 1
+        mode = str(getattr(mode, "value", mode)).lower().replace("_", "")
+        if mode not in ("samestep", "nextstep"):
+            raise ValueError(f"Unsupported vector autoreset mode: {mode}")
+        return mode == "samestep"
+
+    def choose_actions(self, states: np.ndarray) -> np.ndarray:
+        """ε-greedy selection for a batch of states (one row per sub-environment)."""
+        num_actions = self.q_table.shape[1]
+        greedy = np.argmax(self.q_table[states], axis=1)
+        explore = np.random.rand(states.shape[0]) < self.epsilon
+        random_actions = np.random.randint(num_actions, size=states.shape[0])
+        return np.where(explore, random_actions, greedy)
+
+    def update_batch(self, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray,
+                     next_states: np.ndarray, terminated: np.ndarray) -> None:
+        """Applies the TD update for N transitions at once.
+
+        TD errors are computed against the current table and accumulated with
+        ``np.add.at``, so repeated (s, a) pairs in the same batch all count.
+        """
+        best_next_q = np.max(self.q_table[next_states], axis=1) * (~terminated)
+        td_error = rewards + self.gamma * best_next_q - self.q_table[states, actions]
+        np.add.at(self.q_table, (states, actions), self.learning_rate * td_error)
+
+    def train_vectorized(self, vec_env, num_episodes: int, seed=None):
+        """
+        Trains on a ``gymnasium.vector`` batch of environments.
+
+        Every call to ``vec_env.step`` advances all sub-environments; ε-greedy
+        selection and the TD update run over the whole batch with fancy indexing.
+        One history entry is recorded per finished episode, in completion order,
+        and ε decays with the number of finished episodes exactly as in ``train``.
+        """
+        num_envs = vec_env.num_envs
+        same_step = self._autoreset_same_step(vec_env)
+        prof = self._get_profiler()
+        prof.start()
+
+        observations, _ = vec_env.reset(seed=seed)
+        states = self._vector_state_ids(observations)
+        ep_rewards = np.zeros(num_envs)
+        ep_penalties = np.zeros(num_envs, dtype=np.int64)
+        ep_steps = np.zeros(num_envs, dtype=np.int64)
+        # Only used by next-step autoreset: marks sub-envs whose next step is a reset.
+        resetting = np.zeros(num_envs, dtype=bool)
+        episode = getattr(self, "trained_episodes", 0)
+        end_episode = episode + num_episodes
+
+        while episode < end_episode:
+            timed = prof.begin_step()
+            if timed: t0 = perf_counter()
+            actions = self.choose_actions(states)
+            if timed: t0 = prof.lap("choose_action", t0)
+            observations, rewards, terminated, truncated, infos = vec_env.step(actions)
+            rewards = np.asarray(rewards, dtype=np.float64)
+            terminated = np.asarray(terminated, dtype=bool)
+            dones = terminated | np.asarray(truncated, dtype=bool)
+            next_states = self._vector_state_ids(observations)
+
+            bootstrap_states = next_states
+            if same_step and dones.any():
+                final_obs = infos.get("final_obs", infos.get("final_observation"))
+                bootstrap_states = next_states.copy()
+                for i in np.flatnonzero(dones):
+                    bootstrap_states[i] = self.env.get_state_id(final_obs[i])
+
+            if timed: t0 = prof.lap("env_step", t0)
+
+            live = ~resetting
+            self.update_batch(states[live], actions[live], rewards[live],
+                              bootstrap_states[live], terminated[live])
+            if timed: prof.lap("update", t0)
+
+            ep_rewards[live] += rewards[live]
+            ep_penalties[live] += rewards[live] < 0
+            ep_steps[live] += 1
+
+            finished = np.flatnonzero(dones & live)
+            for i in finished:
+                if episode >= end_episode:
+                    break
+                self._epsilon_decay(episode)
+                self._record_episode(episode, float(ep_rewards[i]), int(ep_penalties[i]), int(ep_steps[i]))
+                self.trained_episodes = episode + 1
+                prof.begin_episode()
+
+                if self.verbose and episode % 100 == 0:
+                    print(f"Episode {episode}/{end_episode} ({num_envs} envs)")
+                    print(f"\tSteps: {ep_steps[i]}")
+                    print(f"\tReward: {ep_rewards[i]:.2f}")
+                    print(f"\tPenalties: {ep_penalties[i]}")
+                    print(f"\tEpsilon: {self.epsilon:.4f}")
+                episode += 1
+
+            ep_rewards[dones] = 0.0
+            ep_penalties[dones] = 0
+            ep_steps[dones] = 0
+            if not same_step:
+                resetting = dones & live
+            states = next_states
+
+        prof.stop()
+        return self.history
+
+    # =========================================================
+    # Treinamento paralelo Hogwild (memória compartilhada)
+    # =========================================================
+    def train_hogwild(self, num_episodes: int, workers: int, seed=None):
+        """
+        Trains with `workers` processes that each own a copy of the environment and
+        update one Q-table in `multiprocessing.shared_memory` without locks (Hogwild).
+
+        Workers claim global episode numbers from a shared counter, so the ε schedule
+        follows the total number of episodes exactly as in ``train``. Per-episode
+        results go to a shared array and are recorded in episode order at the end.
+        Lost updates from concurrent writes to the same (s, a) are rare and tolerated.
+        """
+        if workers < 1:
+            raise ValueError("workers must be positive")
+        if seed is None:
+            seed = int(np.random.randint(2**31 - workers))
+        start_episode = getattr(self, "trained_episodes", 0)
+        end_episode = start_episode + num_episodes
+        prof = self._get_profiler()
+        prof.start()
+
+        ctx = multiprocessing.get_context("spawn")
+        counter = ctx.Value("q", start_episode)
+        q_shm = shared_memory.SharedMemory(create=True, size=self.q_table.nbytes)
+        results_shm = shared_memory.SharedMemory(create=True, size=max(1, num_episodes) * 4 * 8)
+        try:
+            q_table = np.ndarray(self.q_table.shape, dtype=np.float64, buffer=q_shm.buf)
+            q_table[:] = self.q_table
+            # Colunas: reward, penalties, steps, epsilon
+            results = np.ndarray((num_episodes, 4), dtype=np.float64, buffer=results_shm.buf)
+            config = {
+                "env": self.env,
+                "learning_rate": self.learning_rate,
+                "gamma": self.gamma,
+                "epsilon_decay_rate": self.decay_rate,
+                "min_epsilon": self.min_epsilon,
+                "max_epsilon": self.max_epsilon,
+                "q_shape": self.q_table.shape,
+                "q_name": q_shm.name,
+                "results_name": results_shm.name,
+                "start_episode": start_episode,
+                "end_episode": end_episode,
+            }
+            with worker_thread_limit(1):
+                processes = [ctx.Process(target=_hogwild_worker, args=(config, counter, seed + i))
+                             for i in range(workers)]
+                for process in processes:
+                    process.start()
+            last_report = start_episode
+            for process in processes:
+                while process.is_alive():
+                    process.join(timeout=1.0)
+                    claimed = min(counter.value, end_episode)
+                    if self.verbose and claimed - last_report >= 1000:
+                        print(f"Episode {claimed}/{end_episode} ({workers} Hogwild workers)")
+                        last_report = claimed
+            failed = [p.exitcode for p in processes if p.exitcode != 0]
+            if failed:
+                raise RuntimeError(f"Hogwild workers exited with codes {failed}")
+
+            self.q_table = q_table.copy()
+            for i, (total_reward, penalties, steps, epsilon) in enumerate(results):
+                self.epsilon = float(epsilon)
+                if getattr(self, "metrics_writer", None) is None:
+                    self.epsilons_.append(self.epsilon)
+                self._record_episode(start_episode + i, float(total_reward), int(penalties), int(steps))
+                prof.begin_episode()
+            self.trained_episodes = end_episode
+            del q_table, results  # as visões precisam sumir antes de fechar os segmentos
+        finally:
+            for shm in (q_shm, results_shm):
+                shm.close()
+                shm.unlink()
+        prof.stop()
+        return self.history
+
+    # =========================================================
+    # Checkpoints
+    # =========================================================
+    def _checkpoint_state(self) -> dict:
+        return {
+            "q_table": self.q_table.copy(),
+            "epsilon": self.epsilon,
+            "history": {key: list(values) for key, values in self.history.items()},
+        }
+
+    def _restore_checkpoint_state(self, state: dict) -> None:
+        if state["q_table"].shape != self.q_table.shape:
+            raise ValueError(f"Checkpoint Q-table shape {state['q_table'].shape} does not match "
+                             f"{self.q_table.shape}")
+        self.q_table = state["q_table"].copy()
+        self.epsilon = state["epsilon"]
+        self.epsilons_ = list(state["history"]["epsilons"])
+        self.history = {key: list(values) for key, values in state["history"].items()}
+        self.history["epsilons"] = self.epsilons_
+
     def save(self, filename: str) -> None:
+        """Saves a compact .npz (Q-table + hyperparameters) or, for other suffixes, a pickle."""
+        if str(filename).endswith(".npz"):
+            save_model_npz(filename, "tabular", {"q_table": self.q_table}, {
+                "env_id": self.env.get_id() if self.env is not None else None,
+                "learning_rate": self.learning_rate,
+                "gamma": self.gamma,
+                "epsilon": self.epsilon,
+                "min_epsilon": self.min_epsilon,
+                "max_epsilon": self.max_epsilon,
+                "epsilon_decay_rate": self.decay_rate,
+                "trace_lambda": getattr(self, "trace_lambda", 0.0),
+                "trained_episodes": getattr(self, "trained_episodes", 0),
+            })
+            return
         with open(filename, 'wb') as f:
             pickle.dump(self, f)
 
@@ -120,3 +514,34 @@ class QLearningAgentTabular:
     def load_agent(filename: str):
         with open(filename, 'rb') as f:
             return pickle.load(f)
+
+
+def _hogwild_worker(config: dict, counter, seed: int) -> None:
+    """Body of one `train_hogwild` process: plays episodes until the shared counter runs out."""
+    random.seed(seed)
+    np.random.seed(seed)
+    env = config["env"]
+    env.env.reset(seed=seed)  # cada processo com seu próprio fluxo de episódios
+    agent = QLearningAgentTabular(env, config["learning_rate"], config["gamma"], config["epsilon_decay_rate"],
+                                  config["min_epsilon"], config["max_epsilon"], verbose=False)
+    q_shm = shared_memory.SharedMemory(name=config["q_name"])
+    results_shm = shared_memory.SharedMemory(name=config["results_name"])
+    try:
+        agent.q_table = np.ndarray(config["q_shape"], dtype=np.float64, buffer=q_shm.buf)
+        num_episodes = config["end_episode"] - config["start_episode"]
+        results = np.ndarray((num_episodes, 4), dtype=np.float64, buffer=results_shm.buf)
+        while True:
+            with counter.get_lock():
+                episode = counter.value
+                counter.value += 1
+            if episode >= config["end_episode"]:
+                break
+            # Mesmo ε que o treino serial usaria neste episódio
+            agent.epsilon = agent._epsilon_at(episode - 1) if episode > 0 else agent.max_epsilon
+            total_reward, penalties, steps = agent._run_episode(episode)
+            agent.epsilons_.clear()
+            results[episode - config["start_episode"]] = (total_reward, penalties, steps, agent.epsilon)
+        del agent.q_table, results
+    finally:
+        q_shm.close()
+        results_shm.close()
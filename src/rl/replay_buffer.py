@@ -0,0 +1,290 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class ReplayBuffer:
+    """
+    Replay buffer circular em formato struct-of-arrays.
+
+    Todas as transições (s, a, r, s', done) ficam em arrays NumPy pré-alocados,
+    de modo que a memória ocupada é conhecida na construção (`nbytes`) e um
+    minibatch é obtido com um único gather por índices. Opcionalmente guarda
+    também φ(s,a) de cada transição (`feature_dim`), evitando recalcular as
+    features a cada atualização.
+    """
+
+    def __init__(self,
+                 capacity: int,
+                 state_shape: Tuple[int, ...] = (),
+                 feature_dim: Optional[int] = None,
+                 state_dtype=np.int64):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.state_shape = tuple(state_shape)
+        self.feature_dim = feature_dim
+        self.position = 0
+        self.size = 0
+
+        self.states = np.zeros((capacity, *self.state_shape), dtype=state_dtype)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros((capacity, *self.state_shape), dtype=state_dtype)
+        self.dones = np.zeros(capacity, dtype=bool)
+        self.features = np.zeros((capacity, feature_dim), dtype=np.float32) if feature_dim else None
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def stores_features(self) -> bool:
+        return self.features is not None
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self.states, self.actions, self.rewards, self.next_states, self.dones]
+        if self.features is not None:
+            arrays.append(self.features)
+        return sum(a.nbytes for a in arrays)
+
+    def add(self, state, action, reward, next_state, done, features=None) -> None:
+        i = self.position
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        if self.features is not None:
+            self.features[i] = features
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def sample_indices(self, batch_size: int) -> np.ndarray:
+        """
+        Índices uniformes sem reposição entre as transições armazenadas, como o
+        `random.sample` do buffer original. Sorteia com reposição e sorteia de novo
+        só as repetições: O(batch_size), sem permutar o buffer inteiro como
+        ``np.random.choice(size, batch_size, replace=False)``.
+        """
+        if batch_size > self.size:
+            raise ValueError(f"Cannot sample {batch_size} distinct transitions from {self.size}")
+        indices = np.random.randint(0, self.size, size=batch_size)
+        while True:
+            _, first = np.unique(indices, return_index=True)
+            if first.size == batch_size:
+                return indices
+            repeated = np.ones(batch_size, dtype=bool)
+            repeated[first] = False
+            indices[repeated] = np.random.randint(0, self.size, size=int(repeated.sum()))
+
+    def sample(self, batch_size: int) -> dict:
+        return self.gather(self.sample_indices(batch_size))
+
+    def gather(self, indices: np.ndarray) -> dict:
+        batch = {
+            "indices": indices,
+            "states": self.states[indices],
+            "actions": self.actions[indices],
+            "rewards": self.rewards[indices],
+            "next_states": self.next_states[indices],
+            "dones": self.dones[indices],
+        }
+        if self.features is not None:
+            batch["features"] = self.features[indices]
+        return batch
+
+    def to_observation(self, row):
+        """Converte uma linha de `states` de volta ao formato de observação do ambiente."""
+        if self.state_shape:
+            return tuple(row.tolist())
+        return int(row)
+
+    # =========================================================
+    # Checkpoints
+    # =========================================================
+    def state_dict(self) -> dict:
+        # Só a parte preenchida é salva; a ordem física do anel é preservada.
+        n = self.size
+        return {
+            "capacity": self.capacity,
+            "state_shape": self.state_shape,
+            "feature_dim": self.feature_dim,
+            "position": self.position,
+            "size": n,
+            "states": self.states[:n].copy(),
+            "actions": self.actions[:n].copy(),
+            "rewards": self.rewards[:n].copy(),
+            "next_states": self.next_states[:n].copy(),
+            "dones": self.dones[:n].copy(),
+            "features": None if self.features is None else self.features[:n].copy(),
+        }
+
+    def load_state_dict(self, state: dict) -> None:
+        if state["capacity"] != self.capacity or tuple(state["state_shape"]) != self.state_shape:
+            raise ValueError("Replay buffer checkpoint does not match buffer capacity/state shape")
+        n = state["size"]
+        self.states[:n] = state["states"]
+        self.actions[:n] = state["actions"]
+        self.rewards[:n] = state["rewards"]
+        self.next_states[:n] = state["next_states"]
+        self.dones[:n] = state["dones"]
+        if self.features is not None and state["features"] is not None:
+            self.features[:n] = state["features"]
+        elif self.features is not None:
+            raise ValueError("Replay buffer checkpoint has no stored features")
+        self.position = state["position"]
+        self.size = n
+
+
+class SumTree:
+    """
+    Árvore de somas em array (heap implícito): as folhas guardam as prioridades
+    e cada nó interno a soma dos filhos, de modo que atualizar uma prioridade e
+    amostrar proporcionalmente a elas custam O(log n). As operações em lote
+    descem/sobem a árvore nível a nível para todos os índices de uma vez.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.leaf_offset = 1 << (capacity - 1).bit_length()  # folhas em [offset, 2·offset)
+        self.depth = self.leaf_offset.bit_length() - 1
+        self.tree = np.zeros(2 * self.leaf_offset, dtype=np.float64)
+
+    @property
+    def total(self) -> float:
+        return float(self.tree[1])
+
+    def priorities(self, indices) -> np.ndarray:
+        return self.tree[np.asarray(indices) + self.leaf_offset]
+
+    def set(self, index: int, priority: float) -> None:
+        node = index + self.leaf_offset
+        self.tree[node] = priority
+        node //= 2
+        while node >= 1:
+            self.tree[node] = self.tree[2 * node] + self.tree[2 * node + 1]
+            node //= 2
+
+    def set_batch(self, indices: np.ndarray, priorities: np.ndarray) -> None:
+        nodes = np.asarray(indices, dtype=np.int64) + self.leaf_offset
+        self.tree[nodes] = priorities  # índices repetidos: vale o último
+        for _ in range(self.depth):
+            nodes = np.unique(nodes // 2)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def find(self, values: np.ndarray) -> np.ndarray:
+        """
+        Index of the leaf whose cumulative-priority interval contains each value.
+        The descent never enters a subtree with zero sum, so only leaves with
+        positive priority are returned, even for values ≥ `total` after rounding.
+        """
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(values.shape, dtype=np.int64)
+        for _ in range(self.depth):
+            left = 2 * nodes
+            left_sum = self.tree[left]
+            go_right = (values >= left_sum) & (self.tree[left + 1] > 0)
+            values -= np.where(go_right, left_sum, 0.0)
+            nodes = left + go_right
+        return nodes - self.leaf_offset
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """
+    Replay priorizado proporcional (Schaul et al., 2016) sobre um `SumTree`.
+
+    A transição i é amostrada com probabilidade P(i) = p_i^α / Σ p_k^α, com
+    p_i = |δ_i| + `priority_eps`; transições novas entram com a maior prioridade
+    já vista, garantindo que sejam usadas ao menos uma vez. O minibatch traz os
+    pesos de importância w_i = (N · P(i))^(-β) / max_batch w, com β crescendo
+    linearmente de `beta` até 1 ao longo de `beta_steps` amostragens.
+    """
+
+    def __init__(self,
+                 capacity: int,
+                 state_shape: Tuple[int, ...] = (),
+                 feature_dim: Optional[int] = None,
+                 state_dtype=np.int64,
+                 alpha: float = 0.6,
+                 beta: float = 0.4,
+                 beta_steps: int = 100000,
+                 priority_eps: float = 1e-3):
+        super().__init__(capacity, state_shape, feature_dim, state_dtype)
+        if alpha < 0 or not 0 <= beta <= 1 or beta_steps <= 0:
+            raise ValueError("alpha must be >= 0, beta in [0, 1] and beta_steps positive")
+        self.alpha = alpha
+        self.beta_start = beta
+        self.beta_steps = beta_steps
+        self.priority_eps = priority_eps
+        self.tree = SumTree(capacity)
+        self.max_priority = 1.0  # em unidades de |δ|, antes do expoente α
+        self.num_samples = 0
+
+    @property
+    def beta(self) -> float:
+        return min(1.0, self.beta_start + (1.0 - self.beta_start) * self.num_samples / self.beta_steps)
+
+    def add(self, state, action, reward, next_state, done, features=None) -> None:
+        self.tree.set(self.position, self.max_priority ** self.alpha)
+        super().add(state, action, reward, next_state, done, features)
+
+    def sample_indices(self, batch_size: int) -> np.ndarray:
+        """Amostragem estratificada: um valor uniforme em cada fatia de Σp."""
+        segment = self.tree.total / batch_size
+        values = (np.arange(batch_size) + np.random.rand(batch_size)) * segment
+        # Folhas além de `size` têm prioridade zero e nunca são alcançadas por `find`
+        return self.tree.find(values)
+
+    def sample(self, batch_size: int) -> dict:
+        indices = self.sample_indices(batch_size)
+        batch = self.gather(indices)
+        probs = self.tree.priorities(indices) / self.tree.total
+        weights = (self.size * probs) ** (-self.beta)
+        batch["weights"] = (weights / weights.max()).astype(np.float32)
+        self.num_samples += 1
+        return batch
+
+    def update_priorities(self, indices: np.ndarray, td_errors: np.ndarray) -> None:
+        priorities = np.abs(td_errors) + self.priority_eps
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.set_batch(indices, priorities ** self.alpha)
+
+    # =========================================================
+    # Checkpoints
+    # =========================================================
+    def state_dict(self) -> dict:
+        state = super().state_dict()
+        state["prioritized"] = {
+            "alpha": self.alpha,
+            "beta": self.beta_start,
+            "beta_steps": self.beta_steps,
+            "priority_eps": self.priority_eps,
+            "max_priority": self.max_priority,
+            "num_samples": self.num_samples,
+            "priorities": self.tree.priorities(np.arange(self.size)).copy(),
+        }
+        return state
+
+    def load_state_dict(self, state: dict) -> None:
+        super().load_state_dict(state)
+        prioritized = state["prioritized"]
+        self.max_priority = prioritized["max_priority"]
+        self.num_samples = prioritized["num_samples"]
+        self.tree = SumTree(self.capacity)
+        self.tree.set_batch(np.arange(self.size), prioritized["priorities"])
+
+
+def replay_buffer_from_state(state: dict) -> ReplayBuffer:
+    """Builds an empty buffer of the right kind for `state` (from `state_dict`) and loads it."""
+    kwargs = {}
+    buffer_cls = ReplayBuffer
+    if "prioritized" in state:
+        buffer_cls = PrioritizedReplayBuffer
+        kwargs = {key: state["prioritized"][key] for key in ("alpha", "beta", "beta_steps", "priority_eps")}
+    buffer = buffer_cls(state["capacity"], state_shape=state["state_shape"], feature_dim=state["feature_dim"],
+                        **kwargs)
+    buffer.load_state_dict(state)
+    return buffer
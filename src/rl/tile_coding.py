@@ -0,0 +1,282 @@
+"""
+Sparse tile coding for continuous observations.
+
+`TileCoder` (a vectorized take on `misc/tilecoding.py`) maps a batch of
+observations to one active tile index per tiling. `QLearningAgentTileCoding`
+keeps one weight row per tile, so
+
+    Q(s, ·) = Σ_t w[tile_t(s), ·]
+
+is a gather of `tilings` rows, and the TD update is a scatter-add into the
+same rows; no dense one-hot feature vector is ever built.
+"""
+
+import pickle
+from time import perf_counter
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from rl.checkpoint import CheckpointMixin
+from rl.environment import Environment
+from rl.model_io import save_model_npz
+from rl.profiling import PhaseProfiler
+
+
+# ============================================================
+# Codificador
+# ============================================================
+class TileCoder:
+    """
+    `tilings` grids of `tiles_per_dim` tiles over `value_limits` (one (low, high)
+    pair per dimension), each shifted by a fraction of a tile along the
+    asymmetric displacement vector (1, 3, 5, ...). Observations outside the
+    limits are clipped to the border tiles.
+    """
+
+    def __init__(self, tiles_per_dim: Sequence[int], value_limits, tilings: int):
+        tiles_per_dim = np.asarray(tiles_per_dim, dtype=np.int64)
+        limits = np.asarray(value_limits, dtype=np.float64)
+        if tilings < 1 or (tiles_per_dim < 1).any():
+            raise ValueError("tilings and tiles_per_dim must be positive")
+        if limits.shape != (len(tiles_per_dim), 2) or not (limits[:, 1] > limits[:, 0]).all():
+            raise ValueError("value_limits must hold one (low, high) pair with low < high per dimension")
+        self.tiles_per_dim = tiles_per_dim
+        self.value_limits = limits
+        self.tilings = tilings
+
+        num_dims = len(tiles_per_dim)
+        tiling_dims = tiles_per_dim + 1  # um tile extra acomoda o deslocamento
+        # offsets[t, i]: deslocamento da tiling t na dimensão i, em frações de tile
+        self._offsets = (2 * np.arange(num_dims) + 1) * np.arange(tilings)[:, None] / tilings % 1
+        self._scale = tiles_per_dim / (limits[:, 1] - limits[:, 0])
+        self._strides = np.concatenate([[1], np.cumprod(tiling_dims[:-1])]).astype(np.int64)
+        self._tiling_base = np.prod(tiling_dims) * np.arange(tilings, dtype=np.int64)
+        self.n_tiles = int(tilings * np.prod(tiling_dims))
+
+    def indices(self, observations) -> np.ndarray:
+        """Active tile of every tiling: (tilings,) for one observation, (N, tilings) for a batch."""
+        x = np.asarray(observations, dtype=np.float64)
+        x = np.clip(x, self.value_limits[:, 0], self.value_limits[:, 1])
+        scaled = (x - self.value_limits[:, 0]) * self._scale
+        # (..., tilings, dims): coordenada inteira do tile em cada tiling
+        coords = (scaled[..., None, :] + self._offsets).astype(np.int64)
+        return self._tiling_base + coords @ self._strides
+
+    def config(self) -> Dict[str, object]:
+        return {
+            "tiles_per_dim": self.tiles_per_dim.tolist(),
+            "value_limits": self.value_limits.tolist(),
+            "tilings": self.tilings,
+        }
+
+
+# ============================================================
+# Agente
+# ============================================================
+class QLearningAgentTileCoding(CheckpointMixin):
+    """
+    Q-Learning com aproximação linear sobre tile coding esparso:
+        Q(s,a) = Σ_t w[tile_t(s), a]
+    `learning_rate` é dividido pelo número de tilings (passo α/m usual).
+    """
+
+    agent_type = "tilecoding"
+
+    def __init__(self,
+                 gym_env: Environment,
+                 learning_rate: float,
+                 gamma: float,
+                 tilings: int = 8,
+                 tiles_per_dim: int = 8,
+                 epsilon_decay_rate: float = 0.003,
+                 min_epsilon: float = 0.0,
+                 max_epsilon: float = 0.1,
+                 bounds=None):
+        self.env = gym_env
+        if bounds is None:
+            bounds = self.env.get_observation_bounds()
+        num_dims = len(bounds)
+        self.coder = TileCoder([tiles_per_dim] * num_dims, bounds, tilings)
+        # Pesos nulos: com recompensas negativas, Q=0 é otimista e já induz exploração
+        self.w = np.zeros((self.coder.n_tiles, self.env.get_num_actions()))
+
+        self.steps = 0
+        self.epsilon = max_epsilon
+        self.max_epsilon = max_epsilon
+        self.min_epsilon = min_epsilon
+        self.epsilon_decay_rate = epsilon_decay_rate
+        self.learning_rate = learning_rate
+        self.gamma = gamma
+        self.epsilon_history = []
+        self.trained_episodes = 0
+        self.profiler = PhaseProfiler()
+        # Com um `rl.metrics.MetricsWriter`, os episódios vão para o arquivo em vez das listas
+        self.metrics_writer = None
+
+    # =========================================================
+    # Q-values (gather de `tilings` linhas)
+    # =========================================================
+    def get_qvalues(self, state) -> np.ndarray:
+        return self.w[self.coder.indices(state)].sum(axis=0)
+
+    def get_value(self, state) -> float:
+        return float(np.max(self.get_qvalues(state)))
+
+    def policy(self, state) -> int:
+        return int(np.argmax(self.get_qvalues(state)))
+
+    def choose_action(self, state, is_in_exploration_mode=True) -> int:
+        if is_in_exploration_mode and np.random.rand() < self.epsilon:
+            return self.env.get_random_action()
+        return self.policy(state)
+
+    def _epsilon_at(self, episode: int) -> float:
+        return self.min_epsilon + (self.max_epsilon - self.min_epsilon) * np.exp(-self.epsilon_decay_rate * episode)
+
+    # =========================================================
+    # Treinamento
+    # =========================================================
+    def train(self, num_episodes: int, max_steps_per_episode: int = 500):
+        rewards_per_episode = []
+        penalties_per_episode = []
+        cumulative_success = []
+        steps_per_episode = []
+        successful_episodes = 0
+        prof = self.profiler
+        prof.start()
+
+        start_episode = self.trained_episodes
+        end_episode = start_episode + num_episodes
+        for episode in range(start_episode, end_episode):
+            timed = prof.begin_episode()
+            if timed: t0 = perf_counter()
+            state, _ = self.env.reset()
+            if timed: prof.lap_episode("env_reset", t0)
+            terminated = truncated = False
+            total_reward, reward = 0.0, 0.0
+            self.steps = 0
+
+            # Tiles e Q(s,·) do estado atual são reaproveitados na escolha da ação e no alvo TD,
+            # por isso a atualização fica aqui e não num método `update` separado
+            tiles = self.coder.indices(state)
+            q_values = self.w[tiles].sum(axis=0)
+            while not (terminated or truncated) and self.steps < max_steps_per_episode:
+                self.steps += 1
+                timed = prof.begin_step()
+                if timed: t0 = perf_counter()
+                if np.random.rand() < self.epsilon:
+                    action = self.env.get_random_action()
+                else:
+                    action = int(np.argmax(q_values))
+                if timed: t0 = prof.lap("choose_action", t0)
+                next_state, reward, terminated, truncated, _ = self.env.step(action)
+                if timed: t0 = prof.lap("env_step", t0)
+
+                next_tiles = self.coder.indices(next_state)
+                next_q_values = self.w[next_tiles].sum(axis=0)
+                next_value = 0.0 if terminated else float(next_q_values.max())
+                td_error = reward + self.gamma * next_value - q_values[action]
+                # Um tile ativo por tiling: os índices são distintos e a atribuição direta basta
+                self.w[tiles, action] += self.learning_rate / self.coder.tilings * td_error
+                if timed: prof.lap("update", t0)
+
+                total_reward += reward
+                tiles = next_tiles
+                q_values = self.w[tiles].sum(axis=0)  # o próximo estado pode compartilhar tiles com s
+
+            self.epsilon = self._epsilon_at(episode)
+            success = bool(self.env.is_success(reward, terminated))
+            successful_episodes += success
+            self.trained_episodes = episode + 1
+
+            writer = getattr(self, "metrics_writer", None)
+            if writer is not None:
+                writer.write(episode=episode, reward=total_reward, penalties=0,
+                             steps=self.steps, epsilon=self.epsilon, success=int(success))
+            else:
+                self.epsilon_history.append(self.epsilon)
+                rewards_per_episode.append(total_reward)
+                penalties_per_episode.append(0)
+                cumulative_success.append(successful_episodes)
+                steps_per_episode.append(self.steps)
+            self._maybe_checkpoint(episode)
+
+            if episode % 50 == 0:
+                print(f"Episode {episode}/{end_episode} ({successful_episodes} successful)")
+                print(f"\tSteps: {self.steps}")
+                print(f"\tTotal reward: {total_reward:.2f}")
+                print(f"\tEpsilon: {self.epsilon:.4f}\n")
+
+        prof.stop()
+        return {
+            "penalties": penalties_per_episode,
+            "rewards": rewards_per_episode,
+            "successes": cumulative_success,
+            "epsilons": list(self.epsilon_history),
+            "steps": steps_per_episode,
+        }
+
+    # =========================================================
+    # Checkpoints e persistência
+    # =========================================================
+    def _checkpoint_state(self):
+        return {
+            "w": self.w.copy(),
+            "epsilon": self.epsilon,
+            "epsilon_history": list(self.epsilon_history),
+        }
+
+    def _restore_checkpoint_state(self, state):
+        if state["w"].shape != self.w.shape:
+            raise ValueError(f"Checkpoint weights shape {state['w'].shape} does not match {self.w.shape}")
+        self.w = state["w"].copy()
+        self.epsilon = state["epsilon"]
+        self.epsilon_history = list(state["epsilon_history"])
+
+    def get_weights(self):
+        return self.w.copy()
+
+    def save(self, filename):
+        """Saves a compact .npz (weights + tile coder + hyperparameters) or, for other suffixes, a pickle."""
+        if str(filename).endswith(".npz"):
+            save_model_npz(filename, "tilecoding", {"w": self.w}, {
+                "env_id": self.env.get_id(),
+                "learning_rate": self.learning_rate,
+                "gamma": self.gamma,
+                "epsilon": self.epsilon,
+                "min_epsilon": self.min_epsilon,
+                "max_epsilon": self.max_epsilon,
+                "epsilon_decay_rate": self.epsilon_decay_rate,
+                "trained_episodes": self.trained_episodes,
+                "tile_coder": self.coder.config(),
+            })
+            return
+        with open(filename, "wb") as f:
+            pickle.dump(self, f)
+
+    @staticmethod
+    def load_agent(filename):
+        with open(filename, "rb") as f:
+            return pickle.load(f)
+
+
+class TileCodingPolicy:
+    """Greedy policy over tile-coding weights loaded from a `.npz` model."""
+
+    def __init__(self, w: np.ndarray, coder: TileCoder, params: Optional[Dict] = None):
+        self.w = w
+        self.coder = coder
+        self.params = params or {}
+
+    def get_qvalues(self, state) -> np.ndarray:
+        return self.w[self.coder.indices(state)].sum(axis=0)
+
+    def policy(self, state) -> int:
+        return int(np.argmax(self.get_qvalues(state)))
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], params: Dict) -> "TileCodingPolicy":
+        config = params["tile_coder"]
+        coder = TileCoder(config["tiles_per_dim"], config["value_limits"], config["tilings"])
+        return cls(np.asarray(arrays["w"]), coder, params)
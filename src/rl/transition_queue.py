@@ -0,0 +1,92 @@
+"""
+Single-producer/single-consumer ring of transitions in `multiprocessing.shared_memory`.
+
+Used by the actor/learner mode of the neural agent: each actor process owns
+one queue and appends (s, a, r, s', done) records; the learner drains every
+queue into its replay buffer. Records and the two counters (written / read)
+live in one shared segment, so no pickling or pipe traffic is involved. The
+producer writes the record before advancing `written`, and the consumer
+advances `read` only after copying, so no lock is needed.
+"""
+
+import time
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+class SharedTransitionQueue:
+    """Fixed-capacity ring of transitions shared between two processes."""
+
+    def __init__(self, capacity: int, state_shape: Tuple[int, ...] = (), name: Optional[str] = None):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.state_shape = tuple(state_shape)
+        state_size = int(np.prod(self.state_shape, dtype=np.int64))
+        # Layout: [written, read] | states | next_states | actions | rewards | dones
+        layout = [
+            ("counters", np.int64, (2,)),
+            ("states", np.int64, (capacity, *self.state_shape)),
+            ("next_states", np.int64, (capacity, *self.state_shape)),
+            ("actions", np.int64, (capacity,)),
+            ("rewards", np.float64, (capacity,)),
+            ("dones", np.bool_, (capacity,)),
+        ]
+        nbytes = 16 + capacity * (16 * state_size + 8 + 8 + 1)
+        self._owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self._owner, size=nbytes)
+        offset = 0
+        self._arrays: Dict[str, np.ndarray] = {}
+        for field, dtype, shape in layout:
+            array = np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset)
+            self._arrays[field] = array
+            offset += array.nbytes
+        if self._owner:
+            self._arrays["counters"][:] = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def __getstate__(self):
+        # Outro processo se conecta ao mesmo segmento pelo nome
+        return {"capacity": self.capacity, "state_shape": self.state_shape, "name": self.shm.name}
+
+    def __setstate__(self, state):
+        self.__init__(state["capacity"], state["state_shape"], name=state["name"])
+
+    def __len__(self):
+        written, read = self._arrays["counters"]
+        return int(written - read)
+
+    def put(self, state, action, reward, next_state, done, poll_interval: float = 1e-3) -> None:
+        """Appends one transition; blocks while the ring is full."""
+        counters = self._arrays["counters"]
+        while counters[0] - counters[1] >= self.capacity:
+            time.sleep(poll_interval)
+        i = int(counters[0] % self.capacity)
+        self._arrays["states"][i] = state
+        self._arrays["next_states"][i] = next_state
+        self._arrays["actions"][i] = action
+        self._arrays["rewards"][i] = reward
+        self._arrays["dones"][i] = done
+        counters[0] += 1  # publica o registro já escrito
+
+    def drain(self, max_items: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Removes and returns (copies of) the available transitions, oldest first."""
+        counters = self._arrays["counters"]
+        written, read = int(counters[0]), int(counters[1])
+        count = written - read if max_items is None else min(written - read, max_items)
+        indices = (read + np.arange(count)) % self.capacity
+        batch = {field: self._arrays[field][indices].copy()
+                 for field in ("states", "actions", "rewards", "next_states", "dones")}
+        counters[1] = read + count
+        return batch
+
+    def close(self) -> None:
+        self._arrays = {}
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
@@ -0,0 +1,19 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+
+def test_default_actor_learner_run_terminates(tmp_path):
+    # Sem --updates_per_step o aprendiz não tem limite de atualizações: precisa sair quando os atores terminam
+    env = dict(os.environ, PYTHONPATH=str(SRC), MPLBACKEND="Agg")
+    result = subprocess.run(
+        [sys.executable, "-m", "rl.ql_train", "--agent", "neural", "--actors", "1",
+         "--num_episodes", "20", "--max_steps", "50"],
+        cwd=tmp_path, env=env, capture_output=True, text=True, timeout=180,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "Actor/learner: 1000 env steps" in result.stdout
+    assert (tmp_path / "taxi-v3-neural-agent.pkl").exists()
@@ -0,0 +1,28 @@
+import gymnasium as gym
+import numpy as np
+
+from rl.environment_box import BoxSpaceEnvironment
+from rl.environment_taxi import TaxiEnvironment
+
+
+def _wrap(wrapper, env_id):
+    return wrapper(gym.make(env_id).env)
+
+
+def test_mountain_car_goal_counts_as_success():
+    env = _wrap(BoxSpaceEnvironment, "MountainCar-v0")
+    assert env.is_success(-1.0, True)
+    assert not env.is_success(-1.0, False)
+
+
+def test_cartpole_success_is_surviving_without_termination():
+    env = _wrap(BoxSpaceEnvironment, "CartPole-v1")
+    assert not env.is_success(1.0, True)  # o pêndulo caiu
+    assert env.is_success(1.0, False)
+
+
+def test_success_rule_is_vectorized():
+    env = _wrap(TaxiEnvironment, "Taxi-v3")
+    rewards = np.array([20.0, -1.0, -10.0])
+    terminated = np.array([True, False, False])
+    np.testing.assert_array_equal(env.is_success(rewards, terminated), [True, False, False])
@@ -0,0 +1,13 @@
+from rl.fast_envs import VectorTaxi, check_equivalence
+
+
+def test_vector_taxi_matches_gymnasium_step_for_step():
+    assert check_equivalence(num_envs=8, num_steps=2000, seed=0) == 0
+
+
+def test_vector_taxi_without_time_limit_never_truncates():
+    env = VectorTaxi(num_envs=4)
+    env.reset(seed=0)
+    for _ in range(500):
+        _, _, _, truncated, _ = env.step(env.states % env.num_actions)
+        assert not truncated.any()
@@ -0,0 +1,35 @@
+import gymnasium as gym
+import numpy as np
+import pytest
+
+from rl.environment_taxi import TaxiEnvironment
+from rl.model_io import LinearPolicy, load_policy, save_model_npz
+from rl.qll_taxi_feature_extractor import TaxiFeatureExtractor
+
+
+def _save_linear(path, env, **overrides):
+    fex = TaxiFeatureExtractor(env.env)
+    params = {"env_id": "Taxi-v3", "feature_extractor": "TaxiFeatureExtractor",
+              "features_version": fex.FEATURES_VERSION, "num_features": fex.get_num_features()}
+    params.update(overrides)
+    save_model_npz(path, "linear", {"w": np.zeros(params["num_features"])}, params)
+
+
+def test_linear_model_loads_with_matching_features(tmp_path):
+    env = TaxiEnvironment(gym.make("Taxi-v3").env)
+    _save_linear(tmp_path / "model.npz", env)
+    assert isinstance(load_policy(tmp_path / "model.npz", env), LinearPolicy)
+
+
+def test_linear_model_with_another_feature_version_is_rejected(tmp_path):
+    env = TaxiEnvironment(gym.make("Taxi-v3").env)
+    _save_linear(tmp_path / "model.npz", env, features_version=TaxiFeatureExtractor.FEATURES_VERSION - 1)
+    with pytest.raises(ValueError, match="features"):
+        load_policy(tmp_path / "model.npz", env)
+
+
+def test_linear_model_with_another_feature_count_is_rejected(tmp_path):
+    env = TaxiEnvironment(gym.make("Taxi-v3").env)
+    _save_linear(tmp_path / "model.npz", env, num_features=3)
+    with pytest.raises(ValueError, match="features"):
+        load_policy(tmp_path / "model.npz", env)
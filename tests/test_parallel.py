@@ -0,0 +1,28 @@
+from rl import ql_play
+from rl.export_policy import export_policy
+from rl.parallel import process_pool
+
+
+def _torch_loaded(pool) -> bool:
+    return pool.submit(eval, "'torch' in __import__('sys').modules").result()
+
+
+def test_eval_workers_do_not_import_torch_for_numpy_policies(tmp_path):
+    import gymnasium as gym
+    from rl.environment_taxi import TaxiEnvironment
+    from rl.qlt import QLearningAgentTabular
+
+    env = TaxiEnvironment(gym.make("Taxi-v3").env)
+    agent = QLearningAgentTabular(env, 0.7, 0.618, 0.001, verbose=False)
+    model_path = tmp_path / "taxi-v3-policy-table.npz"
+    export_policy(agent, env, model_path)
+
+    with process_pool(1, initializer=ql_play._init_eval_worker,
+                      initargs=("table", "Taxi-v3", str(model_path))) as pool:
+        assert not _torch_loaded(pool)
+
+
+def test_torch_threads_are_capped_on_request():
+    with process_pool(1, threads_per_worker=1, torch_threads=True) as pool:
+        assert _torch_loaded(pool)
+        assert pool.submit(eval, "__import__('torch').get_num_threads()").result() == 1
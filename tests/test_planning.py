@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+import gymnasium as gym
+import numpy as np
+import pytest
+
+from rl.planning import compile_transition_model, optimality_gap, policy_evaluation, value_iteration
+
+GAMMA = 0.9
+
+# 0 ↺ (+0.5) | 0 → 1 (0) → 2 (+1) → 3 (terminal, +10); 1 → 0 (-1), 2 → 1 (0)
+CHAIN_P = {
+    0: {0: [(1.0, 1, 0.0, False)], 1: [(1.0, 0, 0.5, False)]},
+    1: {0: [(1.0, 2, 1.0, False)], 1: [(1.0, 0, -1.0, False)]},
+    2: {0: [(1.0, 3, 10.0, True)], 1: [(1.0, 1, 0.0, False)]},
+    3: {0: [(1.0, 3, 0.0, True)], 1: [(1.0, 3, 0.0, True)]},
+}
+
+
+def _chain_model():
+    return compile_transition_model(SimpleNamespace(unwrapped=SimpleNamespace(P=CHAIN_P)))
+
+
+def _monte_carlo_values(P, policy, gamma, episodes=200, horizon=400, seed=0):
+    """Média dos retornos descontados simulando `policy` sobre a tabela P a partir de cada estado."""
+    rng = np.random.default_rng(seed)
+    values = np.zeros(len(P))
+    for start in range(len(P)):
+        returns = []
+        for _ in range(episodes):
+            state, ret, discount = start, 0.0, 1.0
+            for _ in range(horizon):
+                outcomes = P[state][policy[state]]
+                prob, next_state, reward, done = outcomes[rng.choice(len(outcomes), p=[o[0] for o in outcomes])]
+                ret += discount * reward
+                discount *= gamma
+                if done:
+                    break
+                state = next_state
+            returns.append(ret)
+        values[start] = np.mean(returns)
+    return values
+
+
+@pytest.mark.parametrize("policy", [[0, 0, 0, 0], [1, 0, 1, 0], [0, 1, 1, 0]])
+def test_policy_evaluation_matches_monte_carlo_returns(policy):
+    model = _chain_model()
+    exact = policy_evaluation(model, np.array(policy), GAMMA)
+    np.testing.assert_allclose(exact, _monte_carlo_values(CHAIN_P, policy, GAMMA), atol=1e-6)
+
+
+def test_value_iteration_on_chain():
+    values, q_values, _ = value_iteration(_chain_model(), GAMMA)
+    # Ótimo: 0 → 1 → 2 → 3, com V(2) = 10, V(1) = 1 + 0.9·V(2), V(0) = 0.9·V(1)
+    np.testing.assert_allclose(values, [0.9 * 10.0, 1.0 + 0.9 * 10.0, 10.0, 0.0], atol=1e-8)
+    np.testing.assert_array_equal(q_values.argmax(axis=1)[:3], [0, 0, 0])
+
+
+def test_taxi_greedy_policy_of_value_iteration_is_optimal():
+    model = compile_transition_model(gym.make("Taxi-v3"))
+    optimal_values, optimal_q, _ = value_iteration(model, GAMMA)
+    policy = optimal_q.argmax(axis=1)
+
+    np.testing.assert_allclose(policy_evaluation(model, policy, GAMMA), optimal_values, atol=1e-6)
+    report = optimality_gap(model, policy, GAMMA, optimal_values)
+    assert report["gap"] == pytest.approx(0.0, abs=1e-6)
+    assert report["max_gap"] == pytest.approx(0.0, abs=1e-6)
+    assert report["optimal_action_rate"] == 1.0
+
+    # Uma política fixa (sempre "sul") nunca entrega o passageiro: V^π = -1 / (1 - γ) em todo estado
+    south = np.zeros(model.num_states, dtype=np.int64)
+    np.testing.assert_allclose(policy_evaluation(model, south, GAMMA), -1.0 / (1.0 - GAMMA))
+    assert optimality_gap(model, south, GAMMA, optimal_values)["gap"] > 0
@@ -0,0 +1,32 @@
+import csv
+import json
+import os
+import time
+
+from rl import ql_sweep
+
+
+def _trial_or_crash(config, log_dir, final_window):
+    """Stand-in for `ql_sweep.run_trial` whose worker dies on learning_rate 0.5."""
+    if config["learning_rate"] == 0.5:
+        time.sleep(0.5)  # deixa o resultado do trial anterior chegar ao processo principal
+        os._exit(1)
+    return {"trial_id": ql_sweep.trial_id(config), "config": config, "status": "ok",
+            "final_mean_reward": config["learning_rate"], "steps_per_sec": 1.0, "wall_time": 0.0,
+            "total_steps": 0, "num_episodes": 0}
+
+
+def test_worker_crash_keeps_completed_results(tmp_path, monkeypatch):
+    monkeypatch.setattr(ql_sweep, "run_trial", _trial_or_crash)
+    spec = {"agent": "tabular", "grid": {"learning_rate": [0.1, 0.5, 0.9]}}
+
+    records = ql_sweep.run_sweep(spec, str(tmp_path), workers=1)
+
+    assert [r["config"]["learning_rate"] for r in records] == [0.1]
+    with open(tmp_path / "results.csv") as f:
+        rows = list(csv.DictReader(f))
+    assert rows[0]["status"] == "ok"
+    assert sorted((json.loads(r["config"])["learning_rate"], r["status"]) for r in rows) == \
+        [(0.1, "ok"), (0.5, "error"), (0.9, "error")]
+    # Na próxima execução só os trials que falharam são repetidos
+    assert set(ql_sweep.load_completed(tmp_path / "results.jsonl")) == {records[0]["trial_id"]}
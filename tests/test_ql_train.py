@@ -0,0 +1,19 @@
+import numpy as np
+
+from rl import ql_train
+from rl.checkpoint import load_checkpoint_file
+
+
+def test_seed_workers_write_distinct_checkpoints(tmp_path, monkeypatch):
+    monkeypatch.setenv("MPLBACKEND", "Agg")
+    monkeypatch.chdir(tmp_path)
+    checkpoint_dir = tmp_path / "ckpt"
+    assert ql_train.main(["--agent", "tabular", "--num_episodes", "10", "--seeds", "0,1", "--workers", "2",
+                          "--checkpoint_dir", str(checkpoint_dir), "--checkpoint_every", "5"]) == 0
+
+    names = sorted(path.name for path in checkpoint_dir.iterdir())
+    assert names == [f"taxi-v3-tabular-agent-seed{seed}-ep{episode:05d}.ckpt"
+                     for seed in (0, 1) for episode in (5, 10)]
+    q_tables = [load_checkpoint_file(checkpoint_dir / f"taxi-v3-tabular-agent-seed{seed}-ep00010.ckpt")
+                ["state"]["q_table"] for seed in (0, 1)]
+    assert not np.array_equal(q_tables[0], q_tables[1])
@@ -0,0 +1,96 @@
+import numpy as np
+
+from rl.environment import Environment
+from rl.qlt import QLearningAgentTabular, SparseEligibilityTraces
+
+ALPHA, GAMMA, LAMBDA = 0.5, 0.9, 0.8
+
+
+class ChainEnvironment(Environment):
+    """0 → 1 → 2 (terminal, reward 1); action 0 moves right, action 1 stays put."""
+
+    def __init__(self):
+        super().__init__(None)
+        self.state = 0
+
+    def get_num_states(self):
+        return 3
+
+    def get_num_actions(self):
+        return 2
+
+    def get_state_id(self, state):
+        return state
+
+    def get_random_action(self):
+        return 1
+
+    def reset(self):
+        self.state = 0
+        return self.state, {}
+
+    def step(self, action):
+        if action == 0:
+            self.state += 1
+        terminated = self.state == 2
+        return self.state, float(terminated), terminated, False, {}
+
+
+def _agent(trace_lambda=LAMBDA):
+    return QLearningAgentTabular(ChainEnvironment(), ALPHA, GAMMA, 0.0, min_epsilon=0.0, max_epsilon=0.0,
+                                 verbose=False, trace_lambda=trace_lambda)
+
+
+def test_watkins_propagates_terminal_error_along_greedy_trace():
+    agent = _agent()
+    agent.train(1)  # ε = 0: 0 →(a0) 1 →(a0) 2
+    # Só o último passo tem erro TD (δ = 1); (0, 0) recebe δ·γλ pelo traço
+    expected = np.zeros((3, 2))
+    expected[1, 0] = ALPHA
+    expected[0, 0] = ALPHA * GAMMA * LAMBDA
+    np.testing.assert_allclose(agent.q_table, expected)
+
+    plain = _agent(trace_lambda=0.0)
+    plain.train(1)
+    assert plain.q_table[0, 0] == 0.0
+
+
+def test_watkins_cuts_traces_after_exploratory_action():
+    agent = _agent()
+    agent.q_table[1, 0] = 0.5  # a0 é a ação gulosa em 1
+    script = iter([0, 1, 0, 0])  # a escolha de a1 em 1 é exploratória
+    agent.choose_action = lambda state, is_in_exploration_mode=True: next(script)
+    agent.train(1)
+
+    q = np.zeros((3, 2))
+    q[1, 0] = 0.5
+    # 0 →(a0) 1, próxima ação a1 (exploratória): atualiza (0, 0) e corta o traço
+    q[0, 0] += ALPHA * (GAMMA * q[1, 0] - q[0, 0])
+    # 1 →(a1) 1, próxima ação a0 (gulosa): atualiza (1, 1), cujo traço decai para γλ
+    delta = GAMMA * q[1, 0] - q[1, 1]
+    q[1, 1] += ALPHA * delta
+    # 1 →(a0) 2, terminal: δ chega a (1, 0) e a (1, 1), mas não a (0, 0)
+    delta = 1.0 - q[1, 0]
+    q[1, 0] += ALPHA * delta
+    q[1, 1] += ALPHA * GAMMA * LAMBDA * delta
+    np.testing.assert_allclose(agent.q_table, q)
+
+
+def test_sparse_traces_replace_decay_and_prune():
+    traces = SparseEligibilityTraces(cutoff=0.1, capacity=2)
+    traces.mark(0, 0)
+    traces.decay(0.5)
+    traces.mark(1, 1)
+    traces.mark(2, 0)  # cresce além da capacidade inicial
+    traces.mark(0, 0)  # traço de substituição: volta a 1, sem duplicar o par
+    assert traces.size == 3
+    q = np.zeros((3, 2))
+    traces.apply(q, 2.0)
+    np.testing.assert_allclose(q, [[2.0, 0.0], [0.0, 2.0], [2.0, 0.0]])
+
+    traces.decay(0.3)
+    traces.mark(1, 1)
+    traces.decay(0.3)  # (0, 0) e (2, 0) caem para 0.09 < cutoff; (1, 1) fica com 0.3
+    assert traces.size == 1
+    assert (traces.states[0], traces.actions[0]) == (1, 1)
+    np.testing.assert_allclose(traces.values[:1], [0.3])
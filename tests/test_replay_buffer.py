@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from rl.replay_buffer import PrioritizedReplayBuffer, ReplayBuffer, SumTree
+
+
+def _filled_buffer(size, capacity=16, **kwargs):
+    buffer = PrioritizedReplayBuffer(capacity, **kwargs)
+    for i in range(size):
+        buffer.add(i, 0, 0.0, i, False)
+    return buffer
+
+
+def test_sum_tree_internal_nodes_hold_child_sums():
+    tree = SumTree(5)
+    tree.set_batch(np.array([0, 1, 2, 3, 4, 1]), np.array([1.0, 9.0, 2.0, 3.0, 4.0, 5.0]))  # 1 repetido: vale 5
+    tree.set(3, 0.5)
+    np.testing.assert_allclose(tree.priorities(np.arange(5)), [1.0, 5.0, 2.0, 0.5, 4.0])
+    assert tree.total == pytest.approx(12.5)
+    internal = np.arange(1, tree.leaf_offset)
+    np.testing.assert_allclose(tree.tree[internal], tree.tree[2 * internal] + tree.tree[2 * internal + 1])
+
+
+def test_sum_tree_find_maps_cumulative_intervals_to_leaves():
+    tree = SumTree(4)
+    tree.set_batch(np.arange(3), np.array([1.0, 2.0, 3.0]))
+    np.testing.assert_array_equal(tree.find([0.0, 0.99, 1.0, 2.99, 3.0, 5.99]), [0, 0, 1, 1, 2, 2])
+
+
+@pytest.mark.parametrize("size", [1, 3, 5, 9, 16])
+def test_descent_never_returns_empty_leaves(size):
+    buffer = _filled_buffer(size, capacity=16)
+    total = buffer.tree.total
+    # Valores na borda superior (ou além dela, por arredondamento) não podem cair em folhas vazias
+    values = np.array([0.0, total, np.nextafter(total, np.inf), total * (1 + 1e-9)])
+    assert buffer.tree.find(values).max() < size
+    np.random.seed(size)
+    for _ in range(100):
+        assert buffer.sample_indices(8).max() < size
+
+
+def test_sampling_frequencies_match_priorities():
+    np.random.seed(0)
+    buffer = _filled_buffer(4, capacity=8, alpha=1.0)
+    td_errors = np.array([1.0, 2.0, 3.0, 4.0])
+    buffer.update_priorities(np.arange(4), td_errors)
+    counts = np.bincount(np.concatenate([buffer.sample_indices(8) for _ in range(5000)]), minlength=4)
+    expected = (td_errors + buffer.priority_eps) / (td_errors + buffer.priority_eps).sum()
+    np.testing.assert_allclose(counts / counts.sum(), expected, atol=0.01)
+
+
+def test_priority_updates_land_in_the_tree():
+    buffer = _filled_buffer(6, alpha=0.6, priority_eps=0.01)
+    indices = np.array([1, 4])
+    td_errors = np.array([-3.0, 0.5])
+    buffer.update_priorities(indices, td_errors)
+    np.testing.assert_allclose(buffer.tree.priorities(indices), (np.abs(td_errors) + 0.01) ** 0.6)
+    assert buffer.tree.total == pytest.approx(4 * 1.0 + ((3.01 ** 0.6) + (0.51 ** 0.6)))
+    assert buffer.max_priority == pytest.approx(3.01)
+    buffer.add(6, 0, 0.0, 6, False)  # transições novas entram com a maior prioridade
+    assert buffer.tree.priorities([6])[0] == pytest.approx(3.01 ** 0.6)
+
+
+def test_importance_weights_are_normalized():
+    np.random.seed(1)
+    buffer = _filled_buffer(10, alpha=1.0, beta=0.5)
+    buffer.update_priorities(np.arange(10), np.arange(1.0, 11.0))
+    beta = buffer.beta
+    batch = buffer.sample(32)
+    probs = buffer.tree.priorities(batch["indices"]) / buffer.tree.total
+    expected = (buffer.size * probs) ** -beta
+    np.testing.assert_allclose(batch["weights"], expected / expected.max(), rtol=1e-6)
+    assert batch["weights"].max() == pytest.approx(1.0)
+    assert buffer.num_samples == 1
+
+
+def test_uniform_sampling_is_without_replacement():
+    np.random.seed(0)
+    buffer = ReplayBuffer(100)
+    for i in range(10):
+        buffer.add(i, 0, 0.0, i, False)
+    for _ in range(200):
+        indices = buffer.sample_indices(8)
+        assert len(np.unique(indices)) == 8 and indices.max() < 10
+    assert sorted(buffer.sample_indices(10)) == list(range(10))
+    counts = np.bincount(np.concatenate([buffer.sample_indices(5) for _ in range(4000)]), minlength=10)
+    np.testing.assert_allclose(counts / counts.sum(), 0.1, atol=0.01)
+    with pytest.raises(ValueError):
+        buffer.sample_indices(11)